@@ -0,0 +1,316 @@
+"""Variante ASGI de la API de libros sobre el backend asíncrono (asyncpg).
+
+Mismas rutas y contratos que main.py para /books, pero cada petición cede el
+bucle de eventos mientras espera a PostgreSQL, así que un único proceso atiende
+muchas peticiones concurrentes con un pool pequeño de conexiones::
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+Las rutas de streaming, importación y exportación (COPY) y la caché de lectura
+siguen disponibles solo en la aplicación Flask.
+"""
+import functools
+import json
+import sys
+import time
+from contextlib import asynccontextmanager
+import asyncpg
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from models.book import Book, BookFilter, BookUpdate
+from db.factory import DatabaseFactory
+from db.pagination import parse_limit, decode_book_cursor, InvalidCursorError
+from db.batch import execute_batch_async, BatchTooLargeError
+from etag import book_etag, collection_etag, etag_matches
+from health import HealthProber
+from serialization import dumps
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type,x-api-key,If-None-Match'),
+    (b'access-control-allow-methods', b'GET,POST,PUT,PATCH,DELETE,OPTIONS'),
+    (b'access-control-expose-headers', b'ETag'),
+]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse con el codificador compartido (serialization.dumps): acepta modelos directamente."""
+
+    def render(self, content) -> bytes:
+        return dumps(content).encode('utf-8')
+
+
+class CORSMiddleware:
+    """Añade las mismas cabeceras CORS que la aplicación Flask y responde a OPTIONS."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        if scope['method'] == 'OPTIONS':
+            await FastJSONResponse({'status': 'ok'})(scope, receive, self._with_cors(send))
+            return
+        await self.app(scope, receive, self._with_cors(send))
+
+    @staticmethod
+    def _with_cors(send):
+        async def send_with_cors(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + CORS_HEADERS
+            await send(message)
+        return send_with_cors
+
+
+def _error(status: int, error: str, details=None) -> FastJSONResponse:
+    body = {'error': error}
+    if details is not None:
+        body['details'] = details
+    return FastJSONResponse(body, status_code=status)
+
+
+def _db_errors(handler):
+    """Traduce los errores de asyncpg a las mismas respuestas que la aplicación Flask."""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        try:
+            return await handler(request)
+        except asyncpg.IntegrityConstraintViolationError as e:
+            return _error(409, 'Database integrity error', str(e))
+        except (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, OSError, TimeoutError) as e:
+            return _error(503, 'Database connection error', str(e))
+        except asyncpg.PostgresError as e:
+            return _error(500, 'Database error', str(e))
+        except Exception as e:
+            return _error(500, 'Internal server error', str(e))
+    return wrapper
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag})
+
+
+@_db_errors
+async def create_book(request):
+    data = await _json_body(request)
+    if not data:
+        return _error(400, 'No se proporcionaron datos JSON')
+    try:
+        book = Book(**data)
+    except ValidationError as e:
+        return _error(400, 'Validation error', e.errors(include_url=False, include_context=False))
+    created = await request.app.state.db.create_book(book)
+    return FastJSONResponse(created, status_code=201)
+
+
+@_db_errors
+async def batch_books(request):
+    data = await _json_body(request)
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        return _error(400, 'Se esperaba una lista de operaciones en "operations"')
+    try:
+        results = await execute_batch_async(request.app.state.db, operations)
+    except BatchTooLargeError as e:
+        return _error(413, 'Batch too large', str(e))
+    return FastJSONResponse({'results': results})
+
+
+@_db_errors
+async def get_all_books(request):
+    db = request.app.state.db
+    args = request.query_params
+    # Los parámetros se validan antes de consultar nada
+    try:
+        filters = BookFilter.from_query(args) or BookFilter()
+    except ValidationError as e:
+        return _error(400, 'Invalid filter parameters', e.errors(include_url=False, include_context=False))
+    paginated = 'limit' in args or 'cursor' in args
+    cursor = args.get('cursor') or None
+    try:
+        limit = parse_limit(args.get('limit')) if paginated else None
+        if cursor:
+            decode_book_cursor(cursor)
+    except InvalidCursorError as e:
+        return _error(400, 'Invalid cursor', str(e))
+    except ValueError as e:
+        return _error(400, 'Invalid pagination parameters', str(e))
+
+    # Solo con If-None-Match se consulta antes la versión para responder 304 sin leer filas
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        max_updated_at, count = await db.get_collection_version()
+        etag = collection_etag(max_updated_at, count, request.url.query)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+    # El ETag sale de la versión leída en la misma sentencia que las filas
+    page = await db.query_books(filters, limit, cursor, with_version=True)
+    etag = collection_etag(*page.version, request.url.query)
+    if paginated:
+        return FastJSONResponse({'items': page.items, 'next_cursor': page.next_cursor}, headers={'ETag': etag})
+    return FastJSONResponse(page.items, headers={'ETag': etag})
+
+
+@_db_errors
+async def search_books(request):
+    args = request.query_params
+    query = args.get('q', '').strip()
+    if not query:
+        return _error(400, 'Query parameter q is required')
+    try:
+        limit = parse_limit(args.get('limit'))
+        page = await request.app.state.db.search_books(query, limit, args.get('cursor') or None)
+    except InvalidCursorError as e:
+        return _error(400, 'Invalid cursor', str(e))
+    except ValueError as e:
+        return _error(400, 'Invalid pagination parameters', str(e))
+    return FastJSONResponse({'items': page.items, 'next_cursor': page.next_cursor})
+
+
+@_db_errors
+async def get_stats(request):
+    return FastJSONResponse(await request.app.state.db.get_stats())
+
+
+@_db_errors
+async def get_tags(request):
+    try:
+        limit = parse_limit(request.query_params.get('limit'))
+    except ValueError as e:
+        return _error(400, 'Invalid pagination parameters', str(e))
+    return FastJSONResponse(await request.app.state.db.get_tag_counts(limit))
+
+
+@_db_errors
+async def get_book(request):
+    db = request.app.state.db
+    book_id = request.path_params['book_id']
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        version = await db.get_book_version(book_id)
+        if version is None:
+            return _error(404, 'Book not found')
+        etag = book_etag(book_id, version)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+    book = await db.get_book(book_id)
+    if book:
+        return FastJSONResponse(book, headers={'ETag': book_etag(book.book_id, book.updated_at)})
+    return _error(404, 'Book not found')
+
+
+@_db_errors
+async def update_book(request):
+    data = await _json_body(request)
+    if not data:
+        return _error(400, 'No se proporcionaron datos JSON')
+    data.pop('book_id', None)
+    data.pop('created_at', None)
+    try:
+        book = Book(**data)
+    except ValidationError as e:
+        return _error(400, 'Validation error', e.errors(include_url=False, include_context=False))
+    updated = await request.app.state.db.update_book(request.path_params['book_id'], book)
+    if updated:
+        return FastJSONResponse(updated)
+    return _error(404, 'Book not found')
+
+
+@_db_errors
+async def patch_book(request):
+    data = await _json_body(request)
+    if not isinstance(data, dict):
+        return _error(400, 'No se proporcionaron datos JSON')
+    try:
+        changes = BookUpdate(**data)
+    except ValidationError as e:
+        return _error(400, 'Validation error', e.errors(include_url=False, include_context=False))
+    if not changes.model_fields_set:
+        return _error(400, 'No fields to update')
+    patched = await request.app.state.db.patch_book(request.path_params['book_id'], changes)
+    if patched:
+        return FastJSONResponse(patched)
+    return _error(404, 'Book not found')
+
+
+@_db_errors
+async def delete_book(request):
+    if await request.app.state.db.delete_book(request.path_params['book_id']):
+        return Response(status_code=204)
+    return _error(404, 'Book not found')
+
+
+async def health(request):
+    # Liveness: el proceso responde. La base de datos se informa desde el último estado del prober
+    prober = request.app.state.prober
+    return FastJSONResponse({
+        'status': 'healthy',
+        'timestamp': time.time(),
+        'app': 'running',
+        'uptime_s': round(time.time() - prober.started_at, 1),
+        'database': prober.state['status'],
+        'prober': 'running' if prober.prober_alive() else 'stopped'
+    })
+
+
+async def ready(request):
+    # Readiness: solo lectura del último estado; nunca usa una conexión del pool
+    prober = request.app.state.prober
+    is_ready = prober.is_ready()
+    response_data = {
+        'status': 'ready' if is_ready else 'not_ready',
+        'timestamp': time.time(),
+        'database': prober.database()
+    }
+    db = getattr(request.app.state, 'db', None)
+    if hasattr(db, 'get_pool_stats'):
+        response_data['pool'] = db.get_pool_stats()
+    return FastJSONResponse(response_data, status_code=200 if is_ready else 503)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    print("Inicializando base de datos (asyncpg)...", file=sys.stderr)
+    app.state.db = await DatabaseFactory.create_async()
+    print("Base de datos inicializada exitosamente", file=sys.stderr)
+    # Como en main.py: primera comprobación antes de recibir tráfico y después en segundo plano
+    app.state.prober = HealthProber(lambda: app.state.db)
+    await app.state.prober.check_async()
+    app.state.prober.start_async()
+    try:
+        yield
+    finally:
+        app.state.prober.stop()
+        await app.state.db.close()
+
+
+routes = [
+    Route('/books', get_all_books, methods=['GET']),
+    Route('/books', create_book, methods=['POST']),
+    Route('/books/batch', batch_books, methods=['POST']),
+    Route('/books/search', search_books, methods=['GET']),
+    Route('/books/stats', get_stats, methods=['GET']),
+    Route('/books/{book_id}', get_book, methods=['GET']),
+    Route('/books/{book_id}', update_book, methods=['PUT']),
+    Route('/books/{book_id}', patch_book, methods=['PATCH']),
+    Route('/books/{book_id}', delete_book, methods=['DELETE']),
+    Route('/tags', get_tags, methods=['GET']),
+    Route('/health', health, methods=['GET']),
+    Route('/ready', ready, methods=['GET']),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(CORSMiddleware)])
@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Tuple
+from models.book import Book, BookUpdate, BookFilter, BookPage, BookStats, BatchResult, TagCount
+
+
+class AsyncDatabase(ABC):
+    """Versión asíncrona de Database para la variante ASGI: mismos contratos, con await."""
+
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def initialize(self):
+        pass
+
+    @abstractmethod
+    async def create_book(self, book: Book) -> Book:
+        pass
+
+    @abstractmethod
+    async def get_book(self, book_id: str) -> Optional[Book]:
+        pass
+
+    @abstractmethod
+    async def get_all_books(self) -> List[Book]:
+        pass
+
+    async def get_books_page(self, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Página del listado completo: query_books sin filtros."""
+        return await self.query_books(BookFilter(), limit, cursor)
+
+    @abstractmethod
+    async def query_books(self, filters: BookFilter, limit: Optional[int] = None,
+                          cursor: Optional[str] = None, with_version: bool = False) -> BookPage:
+        pass
+
+    @abstractmethod
+    async def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        pass
+
+    @abstractmethod
+    async def get_stats(self) -> BookStats:
+        pass
+
+    @abstractmethod
+    async def get_tag_counts(self, limit: int) -> List[TagCount]:
+        pass
+
+    @abstractmethod
+    async def get_book_version(self, book_id: str) -> Optional[datetime]:
+        pass
+
+    @abstractmethod
+    async def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        pass
+
+    @abstractmethod
+    async def update_book(self, book_id: str, book: Book) -> Optional[Book]:
+        pass
+
+    @abstractmethod
+    async def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        pass
+
+    @abstractmethod
+    async def delete_book(self, book_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        pass
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+import asyncpg
+from .async_db import AsyncDatabase
+from .pagination import encode_cursor, decode_cursor, decode_book_cursor, InvalidCursorError
+from .schema import (BOOK_COLUMNS, COLLECTION_VERSION, QUALIFIED_BOOK_COLUMNS, SEARCH_TEXT, filter_conditions,
+                     like_pattern, split_collection_version, with_collection_version)
+from .migrate import DB_AUTO_MIGRATE, connect as migrate_connect, latest_version, migrate, outdated_schema
+from models.book import Book, BookUpdate, BookFilter, BookPage, BookStats, BatchResult, TagCount, book_from_row
+
+# Tipos de las columnas de BOOK_COLUMNS para unnest() en los lotes; tags viaja como texto
+_BATCH_ARRAY_TYPES = ('varchar', 'varchar', 'varchar', 'varchar', 'integer', 'varchar',
+                      'varchar', 'timestamp', 'timestamp', 'text')
+
+
+def _tags_json(tags) -> Optional[str]:
+    # Solo para los arrays de unnest(): los parámetros jsonb sueltos usan el codec de la conexión
+    return json.dumps(tags) if tags else None
+
+
+def _patch_assignments(changes: BookUpdate, first: int) -> Tuple[str, list]:
+    """SET de un PATCH con parámetros posicionales ($n) a partir de ``first``."""
+    values = changes.model_dump(exclude_unset=True)
+    if 'tags' in values:
+        values['tags'] = values['tags'] or None
+    values['updated_at'] = datetime.utcnow()
+    assignments = ", ".join(
+        f"{column} = ${first + i}" + ("::jsonb" if column == 'tags' else "")
+        for i, column in enumerate(values)
+    )
+    return assignments, list(values.values())
+
+
+def _migrate_blocking():
+    # El runner de migraciones usa psycopg2; se ejecuta en un hilo
+    conn = migrate_connect()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+
+class AsyncPostgresDatabase(AsyncDatabase):
+    """Backend de PostgreSQL sobre asyncpg con un pool asíncrono.
+
+    Cada consulta ocupa una conexión del pool solo mientras espera a la base de
+    datos, así que un proceso atiende muchas peticiones concurrentes.
+    """
+
+    def __init__(self):
+        self.db_config = {
+            'host': os.getenv('DB_HOST'),
+            'user': os.getenv('DB_USER'),
+            'password': os.getenv('DB_PASS'),
+            'database': os.getenv('DB_NAME'),
+            'timeout': 5
+        }
+        self.pool_config = {
+            'min_size': int(os.getenv('DB_POOL_MIN', '1')),
+            'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+            'max_inactive_connection_lifetime': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+            'max_queries': int(os.getenv('DB_POOL_MAX_QUERIES', '50000'))
+        }
+        self.pool = None
+
+    async def connect(self):
+        self.pool = await asyncpg.create_pool(**self.db_config, **self.pool_config, init=self._init_connection)
+        # Como en el backend síncrono, al arrancar solo se compara la versión del esquema
+        async with self.pool.acquire() as conn:
+            try:
+                version = await conn.fetchval("SELECT coalesce(max(version), 0) FROM schema_migrations")
+            except asyncpg.UndefinedTableError:
+                version = 0
+        # Con el esquema atrasado falla, salvo DB_AUTO_MIGRATE (como check_version)
+        latest = latest_version()
+        if version < latest:
+            if not DB_AUTO_MIGRATE:
+                await self.pool.close()
+                raise outdated_schema(version, latest)
+            await asyncio.to_thread(_migrate_blocking)
+
+    @staticmethod
+    async def _init_connection(conn):
+        await conn.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+    def get_pool_stats(self) -> dict:
+        return {
+            'size': self.pool.get_size(),
+            'idle': self.pool.get_idle_size(),
+            'min_size': self.pool.get_min_size(),
+            'max_size': self.pool.get_max_size()
+        }
+
+    async def ping(self):
+        async with self.pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+    def _row_to_book(self, row) -> Book:
+        row = dict(row)
+        tags = row['tags']
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except json.JSONDecodeError:
+                tags = []
+        row['tags'] = tags if isinstance(tags, list) else []
+        return book_from_row(row)
+
+    async def initialize(self):
+        """Aplica las migraciones pendientes del esquema."""
+        await asyncio.to_thread(_migrate_blocking)
+
+    async def create_book(self, book: Book) -> Book:
+        await self.pool.execute(f"""
+            INSERT INTO books ({BOOK_COLUMNS})
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10::jsonb)
+        """, book.book_id, book.title, book.author, book.genre, book.year, book.status,
+            book.rating, book.created_at, book.updated_at, book.tags or None)
+        return book
+
+    async def get_book(self, book_id: str) -> Optional[Book]:
+        row = await self.pool.fetchrow(f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = $1", book_id)
+        return self._row_to_book(row) if row else None
+
+    async def get_all_books(self) -> List[Book]:
+        rows = await self.pool.fetch(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC")
+        return [self._row_to_book(row) for row in rows]
+
+    async def query_books(self, filters: BookFilter, limit: Optional[int] = None,
+                          cursor: Optional[str] = None, with_version: bool = False) -> BookPage:
+        """Libros que cumplen los filtros, de más reciente a más antiguo; sin limit, todos.
+
+        Con ``with_version`` la página trae también la versión de la colección
+        (``page.version``), leída en la misma sentencia que las filas.
+        """
+        conditions, params = filter_conditions(filters, lambda n: f'${n}')
+        if cursor:
+            params.extend(decode_book_cursor(cursor))
+            conditions.append(f"(created_at, book_id) < (${len(params) - 1}, ${len(params)})")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC"
+        if limit is not None:
+            params.append(limit + 1)
+            sql += f" LIMIT ${len(params)}"
+        if with_version:
+            sql = with_collection_version(sql)
+
+        rows = await self.pool.fetch(sql, *params)
+
+        version = None
+        if with_version:
+            rows, version = split_collection_version(rows)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last['created_at'].isoformat(), last['book_id'])
+        return BookPage(items=[self._row_to_book(row) for row in rows], next_cursor=next_cursor, version=version)
+
+    async def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Búsqueda por texto completo (tsvector) y por subcadena (trigram), ordenada por relevancia."""
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError(f"Cursor no válido: {cursor}")
+
+        rows = await self.pool.fetch(f"""
+            SELECT {BOOK_COLUMNS},
+                   ts_rank(search_vector, q) + similarity({SEARCH_TEXT}, $1) AS rank
+            FROM books, websearch_to_tsquery('simple', $1) AS q
+            WHERE search_vector @@ q OR {SEARCH_TEXT} LIKE $2
+            ORDER BY rank DESC, created_at DESC, book_id DESC
+            LIMIT $3 OFFSET $4
+        """, query.lower(), like_pattern(query), limit + 1, offset)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(offset + limit)
+        return BookPage(items=[self._row_to_book(row) for row in rows], next_cursor=next_cursor)
+
+    async def get_stats(self) -> BookStats:
+        row = await self.pool.fetchrow("""
+            SELECT s.total_books, s.total_authors, s.total_genres,
+                   (SELECT min(year) FROM book_year_counts) AS oldest_year
+            FROM book_stats s
+        """)
+        return BookStats(**dict(row)) if row else BookStats()
+
+    async def get_tag_counts(self, limit: int) -> List[TagCount]:
+        rows = await self.pool.fetch("SELECT tag, books FROM book_tag_counts ORDER BY books DESC, tag LIMIT $1", limit)
+        return [TagCount(**dict(row)) for row in rows]
+
+    async def get_book_version(self, book_id: str) -> Optional[datetime]:
+        return await self.pool.fetchval("SELECT updated_at FROM books WHERE book_id = $1", book_id)
+
+    async def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        row = await self.pool.fetchrow(COLLECTION_VERSION)
+        return row[0], row[1]
+
+    async def update_book(self, book_id: str, book: Book) -> Optional[Book]:
+        book.updated_at = datetime.utcnow()
+        row = await self.pool.fetchrow(f"""
+            UPDATE books
+            SET title=$1, author=$2, genre=$3, year=$4, status=$5,
+                rating=$6, updated_at=$7, tags=$8::jsonb
+            WHERE book_id=$9
+            RETURNING {BOOK_COLUMNS}
+        """, book.title, book.author, book.genre, book.year, book.status,
+            book.rating, book.updated_at, book.tags or None, book_id)
+        return self._row_to_book(row) if row else None
+
+    async def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        """Actualiza solo los campos enviados y devuelve la fila en la misma sentencia."""
+        assignments, params = _patch_assignments(changes, 2)
+        row = await self.pool.fetchrow(
+            f"UPDATE books SET {assignments} WHERE book_id = $1 RETURNING {BOOK_COLUMNS}",
+            book_id, *params
+        )
+        return self._row_to_book(row) if row else None
+
+    async def delete_book(self, book_id: str) -> bool:
+        status = await self.pool.execute("DELETE FROM books WHERE book_id = $1", book_id)
+        return status != "DELETE 0"
+
+    async def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        """Aplica el lote con una sentencia multi-fila (unnest) por tipo de operación en una transacción."""
+        result = BatchResult()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if creates:
+                    columns = list(zip(*[
+                        (b.book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                         b.created_at, b.updated_at, _tags_json(b.tags))
+                        for b in creates
+                    ]))
+                    arrays = ", ".join(f"${i + 1}::{t}[]" for i, t in enumerate(_BATCH_ARRAY_TYPES))
+                    rows = await conn.fetch(f"""
+                        INSERT INTO books ({BOOK_COLUMNS})
+                        SELECT book_id, title, author, genre, year, status, rating,
+                               created_at, updated_at, tags::jsonb
+                        FROM unnest({arrays}) AS v ({BOOK_COLUMNS})
+                        ON CONFLICT (book_id) DO NOTHING
+                        RETURNING book_id
+                    """, *[list(column) for column in columns])
+                    result.created = [row['book_id'] for row in rows]
+
+                if updates:
+                    columns = list(zip(*[
+                        (book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                         b.updated_at, _tags_json(b.tags))
+                        for book_id, b in updates
+                    ]))
+                    types = _BATCH_ARRAY_TYPES[:7] + _BATCH_ARRAY_TYPES[8:]
+                    arrays = ", ".join(f"${i + 1}::{t}[]" for i, t in enumerate(types))
+                    rows = await conn.fetch(f"""
+                        UPDATE books AS b
+                        SET title = v.title, author = v.author, genre = v.genre, year = v.year,
+                            status = v.status, rating = v.rating, updated_at = v.updated_at,
+                            tags = v.tags::jsonb
+                        FROM unnest({arrays})
+                            AS v (book_id, title, author, genre, year, status, rating, updated_at, tags)
+                        WHERE b.book_id = v.book_id
+                        RETURNING {QUALIFIED_BOOK_COLUMNS}
+                    """, *[list(column) for column in columns])
+                    result.updated = [self._row_to_book(row) for row in rows]
+
+                if deletes:
+                    rows = await conn.fetch(
+                        "DELETE FROM books WHERE book_id = ANY($1::varchar[]) RETURNING book_id", deletes
+                    )
+                    result.deleted = [row['book_id'] for row in rows]
+        return result
@@ -0,0 +1,115 @@
+import os
+from datetime import datetime
+from typing import List
+from pydantic import ValidationError
+from .db import Database
+from .async_db import AsyncDatabase
+from models.book import Book, BatchOperation, BatchResult
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+
+
+class BatchTooLargeError(ValueError):
+    pass
+
+
+def _error(index: int, op, book_id, status: int, error: str, details=None) -> dict:
+    result = {'index': index, 'op': op, 'book_id': book_id, 'status': status, 'error': error}
+    if details is not None:
+        result['details'] = details
+    return result
+
+
+def _plan(operations: list):
+    """Valida las operaciones y las reparte en creates/updates/deletes para apply_batch."""
+    if len(operations) > BATCH_MAX_ITEMS:
+        raise BatchTooLargeError(f"El lote admite como máximo {BATCH_MAX_ITEMS} operaciones")
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    pending = []
+    seen_ids = set()
+
+    for index, raw in enumerate(operations):
+        try:
+            operation = BatchOperation.model_validate(raw)
+        except ValidationError as e:
+            results[index] = _error(index, None, None, 400, 'Validation error', e.errors(include_url=False))
+            continue
+
+        data = dict(operation.data or {})
+        book_id = operation.book_id or data.get('book_id')
+        try:
+            if operation.op == 'create':
+                book = Book(**data)
+                book_id = book.book_id
+            elif not book_id:
+                results[index] = _error(index, operation.op, None, 400, 'Book ID is required')
+                continue
+            elif operation.op == 'update':
+                data.pop('book_id', None)
+                data.pop('created_at', None)
+                data.pop('updated_at', None)
+                book = Book(**data)
+                book.updated_at = datetime.utcnow()
+        except ValidationError as e:
+            results[index] = _error(index, operation.op, book_id, 400, 'Validation error', e.errors(include_url=False))
+            continue
+
+        # Un mismo libro solo puede aparecer una vez por lote: el orden entre
+        # sentencias multi-fila de distinto tipo no está definido
+        if book_id in seen_ids:
+            results[index] = _error(index, operation.op, book_id, 400, 'Duplicate book_id in batch')
+            continue
+        seen_ids.add(book_id)
+
+        if operation.op == 'create':
+            creates.append(book)
+        elif operation.op == 'update':
+            updates.append((book_id, book))
+        else:
+            deletes.append(book_id)
+        pending.append((index, operation.op, book_id, book if operation.op == 'create' else None))
+    return results, pending, (creates, updates, deletes)
+
+
+def _collect(results: list, pending: list, outcome: BatchResult) -> List[dict]:
+    created = set(outcome.created)
+    updated = {book.book_id: book for book in outcome.updated}
+    deleted = set(outcome.deleted)
+
+    for index, op, book_id, book in pending:
+        if op == 'create':
+            if book_id in created:
+                results[index] = {'index': index, 'op': op, 'book_id': book_id, 'status': 201, 'book': book.model_dump(mode='json')}
+            else:
+                results[index] = _error(index, op, book_id, 409, 'Book already exists')
+        elif op == 'update':
+            if book_id in updated:
+                results[index] = {'index': index, 'op': op, 'book_id': book_id, 'status': 200, 'book': updated[book_id].model_dump(mode='json')}
+            else:
+                results[index] = _error(index, op, book_id, 404, 'Book not found')
+        else:
+            if book_id in deleted:
+                results[index] = {'index': index, 'op': op, 'book_id': book_id, 'status': 204}
+            else:
+                results[index] = _error(index, op, book_id, 404, 'Book not found')
+    return results
+
+
+def execute_batch(db: Database, operations: list) -> List[dict]:
+    """Valida un lote de operaciones create/update/delete y lo aplica en una sola transacción.
+
+    Devuelve un resultado por operación, en el mismo orden que la entrada. Las
+    operaciones no válidas se rechazan sin afectar al resto del lote.
+    """
+    results, pending, changes = _plan(operations)
+    outcome = db.apply_batch(*changes) if pending else BatchResult()
+    return _collect(results, pending, outcome)
+
+
+async def execute_batch_async(db: AsyncDatabase, operations: list) -> List[dict]:
+    """Igual que execute_batch, sobre un backend asíncrono."""
+    results, pending, changes = _plan(operations)
+    outcome = await db.apply_batch(*changes) if pending else BatchResult()
+    return _collect(results, pending, outcome)
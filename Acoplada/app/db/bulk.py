@@ -0,0 +1,224 @@
+"""Importación y exportación masiva de libros en CSV o NDJSON.
+
+Al importar, las filas se leen en streaming, se validan contra ``Book`` (y
+contra la longitud de las columnas) por bloques y cada bloque válido se carga
+con ``Database.import_books`` (COPY + upsert en PostgreSQL). Las filas
+rechazadas se notifican con su número de línea. Si un libro se repite, gana la
+última fila; las anteriores se cuentan en ``duplicates``.
+La exportación usa ``Database.export_books`` (COPY ... TO STDOUT) y escribe los
+bytes tal cual, opcionalmente comprimidos con gzip.
+
+Uso::
+
+    python -m db.bulk import libros.csv --format csv --rejects rechazados.ndjson
+    python -m db.bulk export libros.ndjson.gz --format ndjson --status available
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Callable, Iterator, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from .db import Database
+from .schema import COLUMN_MAX_LENGTHS
+from models.book import Book
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '5000'))
+
+FORMATS = ('csv', 'ndjson')
+
+
+class InvalidImportFormatError(ValueError):
+    pass
+
+
+class _Unparseable:
+    """Línea NDJSON que no es JSON válido; se rechaza con el texto original."""
+
+    def __init__(self, raw: str, error: str):
+        self.raw = raw
+        self.error = error
+
+
+def _csv_rows(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Las celdas vacías cuentan como ausentes para que se apliquen los valores por defecto
+        row = {k: v for k, v in row.items() if k and v not in (None, '')}
+        tags = row.get('tags')
+        if tags is not None:
+            tags = tags.strip()
+            if tags.startswith('['):
+                try:
+                    row['tags'] = json.loads(tags)
+                except ValueError:
+                    pass
+            else:
+                row['tags'] = [t.strip() for t in tags.split(',') if t.strip()]
+        yield reader.line_num, row
+
+
+def _ndjson_rows(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, _Unparseable(line.rstrip('\n'), str(e))
+
+
+def column_errors(book: Book) -> list:
+    """Errores, con el formato de pydantic, de los campos que no caben en su columna."""
+    errors = []
+    for field, max_length in COLUMN_MAX_LENGTHS.items():
+        value = getattr(book, field)
+        if value is not None and len(value) > max_length:
+            errors.append({'type': 'string_too_long', 'loc': (field,),
+                           'msg': f'String should have at most {max_length} characters',
+                           'input': value})
+    return errors
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """Devuelve pares (número de línea, fila) del fichero en el formato indicado."""
+    if fmt == 'csv':
+        return _csv_rows(stream)
+    if fmt == 'ndjson':
+        return _ndjson_rows(stream)
+    raise InvalidImportFormatError(f"Formato no soportado: {fmt} (usa {' o '.join(FORMATS)})")
+
+
+def import_stream(db: Database, stream: TextIO, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE,
+                  on_progress: Optional[Callable[[dict], None]] = None,
+                  on_reject: Optional[Callable[[dict], None]] = None) -> dict:
+    """Valida e importa todas las filas de ``stream`` por bloques de ``chunk_size``.
+
+    Cada bloque se confirma por separado, así que un fallo a mitad deja
+    importados los bloques anteriores. Devuelve un resumen con los contadores;
+    ``duplicates`` son las filas sustituidas por otra posterior con el mismo
+    book_id dentro del bloque (entre bloques, la posterior actualiza el libro).
+    """
+    summary = {'read': 0, 'imported': 0, 'rejected': 0, 'duplicates': 0, 'chunks': 0, 'elapsed': 0.0}
+    started = time.monotonic()
+    chunk = []
+
+    def flush():
+        if chunk:
+            summary['duplicates'] += len(chunk) - len({book.book_id for book in chunk})
+            summary['imported'] += db.import_books(chunk)
+            summary['chunks'] += 1
+            chunk.clear()
+        summary['elapsed'] = round(time.monotonic() - started, 3)
+        if on_progress:
+            on_progress(dict(summary))
+
+    for line, row in read_rows(stream, fmt):
+        summary['read'] += 1
+        if isinstance(row, _Unparseable):
+            errors, row = [{'msg': row.error, 'type': 'json_invalid'}], row.raw
+        elif not isinstance(row, dict):
+            errors = [{'msg': 'Se esperaba un objeto JSON', 'type': 'dict_type'}]
+        else:
+            try:
+                book = Book(**row)
+            except ValidationError as e:
+                errors = e.errors(include_url=False, include_context=False)
+            else:
+                # Una fila demasiado larga haría fallar el COPY de todo el bloque
+                errors = column_errors(book) or None
+                if errors is None:
+                    chunk.append(book)
+        if errors is not None:
+            summary['rejected'] += 1
+            if on_reject:
+                on_reject({'line': line, 'row': row, 'errors': errors})
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    return summary
+
+
+def _import_command(args) -> int:
+    from .factory import DatabaseFactory
+
+    db = DatabaseFactory.create()
+    rejects = open(args.rejects, 'w', encoding='utf-8') if args.rejects else None
+
+    def on_reject(rejected):
+        if rejects:
+            rejects.write(json.dumps(rejected, default=str, ensure_ascii=False) + '\n')
+
+    def on_progress(summary):
+        rate = summary['read'] / summary['elapsed'] if summary['elapsed'] else 0
+        print(f"{summary['read']} leídas, {summary['imported']} importadas, "
+              f"{summary['rejected']} rechazadas, {summary['duplicates']} duplicadas "
+              f"({rate:.0f} filas/s)", file=sys.stderr)
+
+    try:
+        with open(args.file, newline='', encoding='utf-8') as stream:
+            summary = import_stream(db, stream, args.format, args.chunk_size, on_progress, on_reject)
+    finally:
+        if rejects:
+            rejects.close()
+    print(json.dumps(summary))
+    return 0 if summary['rejected'] == 0 else 2
+
+
+def _export_command(args) -> int:
+    from .factory import DatabaseFactory
+    from .copy_stream import gzip_chunks
+
+    db = DatabaseFactory.create()
+    compress = args.gzip or args.file.endswith('.gz')
+    chunks = db.export_books(args.format, args.status, args.genre)
+    written = 0
+    started = time.monotonic()
+    out = sys.stdout.buffer if args.file == '-' else open(args.file, 'wb')
+    try:
+        for data in (gzip_chunks(chunks) if compress else chunks):
+            out.write(data)
+            written += len(data)
+        out.flush()
+    finally:
+        chunks.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.monotonic() - started
+    print(f"{written} bytes escritos en {elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m db.bulk', description='Importación y exportación masiva de libros')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help='Importa libros desde un fichero CSV o NDJSON')
+    importer.add_argument('file')
+    importer.add_argument('--format', choices=FORMATS, default=None,
+                          help='Formato del fichero (por defecto, según la extensión)')
+    importer.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+    importer.add_argument('--rejects', help='Fichero NDJSON donde guardar las filas rechazadas')
+    importer.set_defaults(handler=_import_command)
+
+    exporter = commands.add_parser('export', help='Exporta libros a un fichero CSV o NDJSON')
+    exporter.add_argument('file', help="Fichero de salida, o '-' para la salida estándar")
+    exporter.add_argument('--format', choices=FORMATS, default=None,
+                          help='Formato de salida (por defecto, según la extensión)')
+    exporter.add_argument('--status')
+    exporter.add_argument('--genre')
+    exporter.add_argument('--gzip', action='store_true', help='Comprime la salida (implícito con .gz)')
+    exporter.set_defaults(handler=_export_command)
+
+    args = parser.parse_args(argv)
+    if args.format is None:
+        name = args.file.lower()
+        name = name[:-3] if name.endswith('.gz') else name
+        args.format = 'csv' if name.endswith('.csv') else 'ndjson'
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+from .db import Database
+from .wrapper import DatabaseWrapper
+from models.book import Book, BookUpdate, BatchResult
+
+
+class LRUCache:
+    """Caché LRU con caducidad (TTL) y segura entre hilos."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                self.expirations += 1
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class LocalCacheTier:
+    """Sustituto en proceso de un servidor Redis (get/mget/set con ex/delete/incr/expire).
+
+    Permite ejecutar el nivel compartido sin servidor externo, p. ej. en pruebas.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._items.pop(key, None) is not None)
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            value, expires_at = self._items.get(key, (0, None))
+            if expires_at is not None and expires_at < time.monotonic():
+                value, expires_at = 0, None
+            value = int(value) + 1
+            self._items[key] = (str(value), expires_at)
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return False
+            self._items[key] = (item[0], time.monotonic() + seconds)
+            return True
+
+
+def create_shared_tier(url: Optional[str]):
+    """Nivel compartido entre procesos: Redis si hay URL, o el sustituto local con 'local://'."""
+    if not url:
+        return None
+    if url.startswith('local://'):
+        return LocalCacheTier()
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("DB_CACHE_SHARED_URL requiere el paquete 'redis'") from e
+    return redis.Redis.from_url(url, socket_timeout=0.5)
+
+
+class CachedDatabase(DatabaseWrapper):
+    """Caché de lectura de libros por book_id delante de cualquier backend.
+
+    Primer nivel (``local``): LRU+TTL en el proceso. Solo lo invalidan las
+    escrituras del propio proceso, así que únicamente es correcto con un solo
+    proceso; con varios workers o contenedores hay que usar el segundo nivel.
+
+    Segundo nivel opcional: un almacén compartido (Redis o compatible). Cada
+    libro tiene una generación (``gen:<book_id>``) que las escrituras de
+    cualquier proceso incrementan; la entrada se guarda con la generación leída
+    antes de consultar la base de datos y solo se acepta si sigue siendo la
+    actual, de modo que una lectura que empezó antes de una escritura no puede
+    volver a publicar el libro antiguo.
+
+    get_book_version nunca responde desde el primer nivel: de ella dependen
+    los 304 de If-None-Match.
+    """
+
+    KEY_PREFIX = 'book:'
+    GEN_PREFIX = 'gen:'
+
+    def __init__(self, inner: Database, max_size: int = 1024, ttl: float = 60.0, shared=None, local: bool = True):
+        super().__init__(inner)
+        self.cache = LRUCache(max_size, ttl) if local else None
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        # Se incrementa en cada invalidación; una lectura que empezó antes no guarda su resultado
+        self._epoch = 0
+        self._stats = {'hits': 0, 'misses': 0, 'shared_hits': 0, 'shared_misses': 0, 'shared_stale': 0,
+                       'shared_errors': 0, 'version_hits': 0, 'version_misses': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _shared_get(self, book_id: str) -> Tuple[Optional[Book], Optional[int]]:
+        """Libro del nivel compartido (si su generación es la actual) y la generación actual."""
+        if self.shared is None:
+            return None, None
+        try:
+            raw, gen = self.shared.mget([self.KEY_PREFIX + book_id, self.GEN_PREFIX + book_id])
+        except Exception:
+            self._count('shared_errors')
+            return None, None
+        gen = int(gen or 0)
+        if raw is None:
+            self._count('shared_misses')
+            return None, gen
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        stored_gen, _, payload = raw.partition('|')
+        if stored_gen != str(gen):
+            # Guardada por una lectura anterior a la última escritura
+            self._count('shared_stale')
+            return None, gen
+        self._count('shared_hits')
+        return Book.model_validate_json(payload), gen
+
+    def _shared_set(self, book: Book, gen: int):
+        try:
+            self.shared.set(self.KEY_PREFIX + book.book_id, f"{gen}|{book.model_dump_json()}",
+                            ex=max(1, int(self.ttl)))
+        except Exception:
+            self._count('shared_errors')
+
+    def invalidate(self, book_id: str):
+        with self._lock:
+            self._epoch += 1
+        if self.cache is not None:
+            self.cache.delete(book_id)
+        if self.shared is not None:
+            gen_key = self.GEN_PREFIX + book_id
+            try:
+                self.shared.incr(gen_key)
+                # Dura más que cualquier entrada: si caducara antes, una entrada antigua volvería a ser válida
+                self.shared.expire(gen_key, max(1, int(self.ttl)) * 2)
+                self.shared.delete(self.KEY_PREFIX + book_id)
+            except Exception:
+                self._count('shared_errors')
+
+    def get_book(self, book_id: str) -> Optional[Book]:
+        if self.cache is not None:
+            book = self.cache.get(book_id)
+            if book is not None:
+                self._count('hits')
+                return book.model_copy(deep=True)
+        self._count('misses')
+
+        with self._lock:
+            epoch = self._epoch
+        book, gen = self._shared_get(book_id)
+        from_shared = book is not None
+        if book is None:
+            book = self.inner.get_book(book_id)
+            if book is None:
+                return None
+        with self._lock:
+            stale = epoch != self._epoch
+        if not stale:
+            if self.cache is not None:
+                self.cache.set(book_id, book.model_copy(deep=True))
+            if not from_shared and gen is not None:
+                self._shared_set(book, gen)
+        return book
+
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        book, _ = self._shared_get(book_id)
+        if book is not None:
+            self._count('version_hits')
+            return book.updated_at
+        self._count('version_misses')
+        return self.inner.get_book_version(book_id)
+
+    def update_book(self, book_id: str, book: Book) -> Optional[Book]:
+        try:
+            return self.inner.update_book(book_id, book)
+        finally:
+            self.invalidate(book_id)
+
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        try:
+            return self.inner.patch_book(book_id, changes)
+        finally:
+            self.invalidate(book_id)
+
+    def delete_book(self, book_id: str) -> bool:
+        try:
+            return self.inner.delete_book(book_id)
+        finally:
+            self.invalidate(book_id)
+
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        try:
+            return self.inner.apply_batch(creates, updates, deletes)
+        finally:
+            for book_id, _ in updates:
+                self.invalidate(book_id)
+            for book_id in deletes:
+                self.invalidate(book_id)
+
+    def import_books(self, books: List[Book]) -> int:
+        try:
+            return self.inner.import_books(books)
+        finally:
+            for book in books:
+                self.invalidate(book.book_id)
+
+    def get_cache_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'local': self.cache is not None,
+            'size': len(self.cache) if self.cache is not None else 0,
+            'max_size': self.cache.max_size if self.cache is not None else 0,
+            'ttl': self.ttl,
+            'evictions': self.cache.evictions if self.cache is not None else 0,
+            'expirations': self.cache.expirations if self.cache is not None else 0,
+            'shared': self.shared is not None
+        })
+        return stats
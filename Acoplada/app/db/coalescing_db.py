@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+import psycopg2
+from .db import Database
+from .wrapper import DatabaseWrapper
+from models.book import Book
+
+DB_GROUP_COMMIT_WINDOW_MS = float(os.getenv('DB_GROUP_COMMIT_WINDOW_MS', '2'))
+DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv('DB_GROUP_COMMIT_MAX_BATCH', '64'))
+
+# on_flush(rows, seconds): tamaño de cada lote confirmado y lo que tardó su escritura
+FlushObserver = Callable[[int, float], None]
+
+
+class _PendingCreate:
+    __slots__ = ('book', 'result', 'error', 'finished', 'wake')
+
+    def __init__(self, book: Book):
+        self.book = book
+        self.result: Optional[Book] = None
+        self.error: Optional[Exception] = None
+        self.finished = False
+        self.wake = threading.Event()
+
+
+class CoalescingDatabase(DatabaseWrapper):
+    """Agrupa las altas concurrentes (create_book) en un solo INSERT y un solo commit.
+
+    El primer hilo que encuentra la cola vacía hace de líder: espera hasta
+    ``window_ms`` o hasta reunir ``max_batch`` altas y las escribe todas con
+    ``apply_batch``. El resto espera su resultado. Si al terminar quedan altas
+    en cola, la primera pasa a ser la líder del siguiente lote, así que no hace
+    falta ningún hilo propio (y funciona igual en cada worker tras el fork).
+
+    Cada llamada recibe su propio resultado: un book_id repetido solo falla
+    para quien lo envió. Si el INSERT conjunto falla por una restricción, el
+    lote se repite fila a fila para dar a cada cliente su propio error.
+
+    La escritura la hace el hilo del líder, así que con réplicas de lectura
+    (ReplicaRoutingDatabase) cada cliente registra su propia escritura al
+    recibir el resultado: sus siguientes lecturas van al primario.
+    """
+
+    def __init__(self, inner: Database, window_ms: float = DB_GROUP_COMMIT_WINDOW_MS,
+                 max_batch: int = DB_GROUP_COMMIT_MAX_BATCH, on_flush: FlushObserver = None):
+        super().__init__(inner)
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.on_flush = on_flush
+        self._queue: List[_PendingCreate] = []
+        self._leading = False
+        self._cond = threading.Condition()
+        self._stats = {'batches': 0, 'rows': 0, 'max_batch_seen': 0, 'fallbacks': 0}
+        self._stats_lock = threading.Lock()
+        # record_write de ReplicaRoutingDatabase si está debajo (los wrappers delegan en él)
+        self._record_write = getattr(inner, 'record_write', None)
+
+    def create_book(self, book: Book) -> Book:
+        pending = _PendingCreate(book)
+        with self._cond:
+            self._queue.append(pending)
+            lead = not self._leading
+            self._leading = True
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        if not lead:
+            pending.wake.wait()
+        # Se despierta sin resultado cuando le pasan el turno de líder
+        if not pending.finished:
+            self._lead()
+        if self._record_write is not None:
+            # También si falla: el lote pudo confirmarse antes del error
+            self._record_write()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _lead(self):
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            if self._queue:
+                self._queue[0].wake.set()
+            else:
+                self._leading = False
+        self._flush(batch)
+
+    def _flush(self, batch: List[_PendingCreate]):
+        started = time.perf_counter()
+        try:
+            if len(batch) == 1:
+                self._create_each(batch)
+            else:
+                self._create_together(batch)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['rows'] += len(batch)
+                self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch))
+            if self.on_flush is not None:
+                self.on_flush(len(batch), elapsed)
+            for pending in batch:
+                pending.finished = True
+                pending.wake.set()
+
+    def _create_each(self, batch: List[_PendingCreate]):
+        for pending in batch:
+            try:
+                pending.result = self.inner.create_book(pending.book)
+            except Exception as e:
+                pending.error = e
+
+    def _create_together(self, batch: List[_PendingCreate]):
+        try:
+            result = self.inner.apply_batch([pending.book for pending in batch], [], [])
+        except (psycopg2.IntegrityError, psycopg2.DataError):
+            # Una fila inválida hace fallar el INSERT entero: se repite una a una
+            with self._stats_lock:
+                self._stats['fallbacks'] += 1
+            self._create_each(batch)
+            return
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+            return
+
+        # ON CONFLICT DO NOTHING: las que no vuelven en created ya existían (o se
+        # repetían dentro del lote, y entonces gana la primera)
+        created = set(result.created)
+        for pending in batch:
+            book_id = pending.book.book_id
+            if book_id in created:
+                created.discard(book_id)
+                pending.result = pending.book
+            else:
+                pending.error = psycopg2.IntegrityError(
+                    f'duplicate key value violates unique constraint "books_pkey"\n'
+                    f'DETAIL:  Key (book_id)=({book_id}) already exists.'
+                )
+
+    def get_group_commit_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['rows'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['window_ms'] = self.window * 1000
+        stats['max_batch'] = self.max_batch
+        with self._cond:
+            stats['queued'] = len(self._queue)
+        return stats
@@ -0,0 +1,108 @@
+"""Streaming de ``COPY ... TO STDOUT`` como un iterador de bloques de bytes.
+
+``copy_expert`` escribe de forma síncrona en un fichero; para poder entregar
+los datos a medida que llegan se ejecuta en un hilo que los deja en una cola
+acotada. La cola hace de contrapresión: si el cliente lee despacio, el COPY
+espera, y la memoria usada no depende del tamaño de la exportación.
+"""
+import queue
+import threading
+import zlib
+from typing import Callable, Iterator
+
+COPY_CHUNK_SIZE = 64 * 1024
+COPY_QUEUE_SIZE = 8
+
+_EOF = object()
+
+
+class _QueueWriter:
+    """Fichero de destino para copy_expert que agrupa las filas en bloques."""
+
+    def __init__(self, put: Callable[[object], None], chunk_size: int):
+        self._put = put
+        self._chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, data: bytes):
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self._put(b''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
+def stream_copy_out(connection_factory, sql: str, params=None,
+                    chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+    """Ejecuta ``sql`` (un COPY ... TO STDOUT) y devuelve su salida por bloques.
+
+    ``connection_factory`` es un context manager que presta una conexión
+    (p. ej. ``pool.connection``). Si el consumidor deja de leer, se cancela la
+    consulta en el servidor y la conexión vuelve al pool.
+    """
+    chunks = queue.Queue(maxsize=COPY_QUEUE_SIZE)
+    stop = threading.Event()
+    lock = threading.Lock()
+    active = {}
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            with connection_factory() as conn:
+                with lock:
+                    active['conn'] = conn
+                try:
+                    with conn.cursor() as cursor:
+                        query = cursor.mogrify(sql, params).decode('utf-8') if params else sql
+                        writer = _QueueWriter(put, chunk_size)
+                        cursor.copy_expert(query, writer)
+                        writer.flush()
+                finally:
+                    # A partir de aquí la conexión puede volver al pool y no debe cancelarse
+                    with lock:
+                        active.pop('conn', None)
+                conn.commit()
+        except Exception as e:
+            put(e)
+        finally:
+            put(_EOF)
+
+    thread = threading.Thread(target=produce, name='copy-out', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _EOF:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        with lock:
+            conn = active.get('conn')
+            if conn is not None:
+                conn.cancel()
+
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime al vuelo una secuencia de bloques en formato gzip."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from models.book import Book
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from models.book import Book, BookUpdate, BookFilter, BookPage, BookStats, BatchResult, TagCount
 
 
 class Database(ABC):
@@ -21,10 +22,59 @@ class Database(ABC):
     def get_all_books(self) -> List[Book]:
         pass
     
+    def get_books_page(self, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Página del listado completo: query_books sin filtros."""
+        return self.query_books(BookFilter(), limit, cursor)
+    
+    @abstractmethod
+    def query_books(self, filters: BookFilter, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    with_version: bool = False) -> BookPage:
+        pass
+    
+    @abstractmethod
+    def iter_books(self, batch_size: int = 1000) -> Iterator[Book]:
+        pass
+    
+    @abstractmethod
+    def export_books(self, fmt: str, status: Optional[str] = None, genre: Optional[str] = None) -> Iterator[bytes]:
+        pass
+    
+    @abstractmethod
+    def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        pass
+    
+    @abstractmethod
+    def get_stats(self) -> BookStats:
+        pass
+    
+    @abstractmethod
+    def get_tag_counts(self, limit: int) -> List[TagCount]:
+        pass
+    
+    @abstractmethod
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        pass
+    
+    @abstractmethod
+    def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        pass
+    
     @abstractmethod
     def update_book(self, book_id: str, book: Book) -> Optional[Book]:
         pass
     
+    @abstractmethod
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        pass
+    
     @abstractmethod
     def delete_book(self, book_id: str) -> bool:
+        pass
+    
+    @abstractmethod
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        pass
+    
+    @abstractmethod
+    def import_books(self, books: List[Book]) -> int:
         pass
\ No newline at end of file
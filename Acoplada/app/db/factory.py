@@ -1,16 +1,36 @@
+import functools
+import importlib
 import os
-from typing import Dict, Type
+from typing import Callable, Dict, Optional, Type
 from .db import Database
+from .async_db import AsyncDatabase
 from .postgres_db import PostgresDatabase
+from .sqlite_db import SQLiteDatabase
+from .cached_db import CachedDatabase, create_shared_tier
+from .instrumented_db import InstrumentedDatabase, Observer
+from .routing_db import ReplicaRoutingDatabase, RouteObserver
+from .coalescing_db import CoalescingDatabase, FlushObserver
 
 class DatabaseFactory:
     
     _databases: Dict[str, Type[Database]] = {
         'postgres': PostgresDatabase,
+        'sqlite': SQLiteDatabase,
+    }
+
+    # Backends asíncronos (variante ASGI); se importan al crearlos para que la
+    # aplicación Flask no dependa del driver asíncrono
+    _async_databases: Dict[str, str] = {
+        'postgres': 'db.asyncpg_db.AsyncPostgresDatabase',
     }
     
+    # Backends que admiten réplicas de lectura (DB_REPLICA_HOSTS)
+    _replicated = ('postgres',)
+
     @classmethod
-    def create(cls, db_type: str = None) -> Database:
+    def create(cls, db_type: str = None, observer: Observer = None,
+               session_key: Callable[[], Optional[str]] = None, on_route: RouteObserver = None,
+               on_flush: FlushObserver = None) -> Database:
         if db_type is None:
             db_type = os.getenv('DB_TYPE', 'postgres')
         
@@ -24,8 +44,69 @@ class DatabaseFactory:
                 f"DB_TYPE '{db_type}' no válido. "
                 f"Opciones disponibles: {available}"
             )
-        return database_class()
+        database = database_class()
+        cached = os.getenv('DB_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+        replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+        if replica_hosts:
+            if db_type not in cls._replicated:
+                raise ValueError(f"DB_REPLICA_HOSTS no está soportado con DB_TYPE '{db_type}'")
+            database = ReplicaRoutingDatabase(
+                database,
+                {host: functools.partial(database_class, host=host, replica=True) for host in replica_hosts},
+                # La caché es común a todos los clientes: tras una escritura, nadie lee de las réplicas
+                session_key=None if cached else session_key,
+                on_route=on_route
+            )
+
+        # Las métricas miden el backend real: los aciertos de caché no llegan aquí
+        if observer is not None:
+            database = InstrumentedDatabase(database, observer)
+
+        if cached:
+            shared = create_shared_tier(os.getenv('DB_CACHE_SHARED_URL'))
+            # El nivel en proceso no ve las escrituras de otros workers: por defecto solo
+            # se usa con un único worker y sin nivel compartido (DB_CACHE_LOCAL lo fuerza)
+            local = os.getenv('DB_CACHE_LOCAL')
+            if local is None:
+                local = shared is None and int(os.getenv('WEB_CONCURRENCY', '2')) <= 1
+            else:
+                local = local.lower() in ('1', 'true', 'yes')
+            database = CachedDatabase(
+                database,
+                max_size=int(os.getenv('DB_CACHE_SIZE', '1024')),
+                ttl=float(os.getenv('DB_CACHE_TTL', '60')),
+                shared=shared,
+                local=local
+            )
+
+        # Group commit de las altas; por fuera de la caché, que invalida al recibir el lote
+        if os.getenv('DB_GROUP_COMMIT', 'false').lower() in ('1', 'true', 'yes'):
+            # Ventana y tamaño máximo: DB_GROUP_COMMIT_WINDOW_MS y DB_GROUP_COMMIT_MAX_BATCH
+            database = CoalescingDatabase(database, on_flush=on_flush)
+        return database
     
+    @classmethod
+    async def create_async(cls, db_type: str = None) -> AsyncDatabase:
+        if db_type is None:
+            db_type = os.getenv('DB_TYPE', 'postgres')
+
+        db_type = db_type.lower()
+
+        path = cls._async_databases.get(db_type)
+
+        if path is None:
+            available = ', '.join(cls._async_databases.keys())
+            raise ValueError(
+                f"DB_TYPE '{db_type}' no válido para la variante asíncrona. "
+                f"Opciones disponibles: {available}"
+            )
+        module_name, class_name = path.rsplit('.', 1)
+        database_class = getattr(importlib.import_module(module_name), class_name)
+        database = database_class()
+        await database.connect()
+        return database
+
     @classmethod
     def get_available_databases(cls) -> list:
         return list(cls._databases.keys())
\ No newline at end of file
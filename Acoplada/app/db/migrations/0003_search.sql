@@ -0,0 +1,15 @@
+-- Búsqueda por texto completo (tsvector) y por subcadena (trigram).
+-- La expresión del índice trigram debe coincidir con schema.SEARCH_TEXT.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(genre, '')), 'C') ||
+        setweight(jsonb_to_tsvector('simple', coalesce(tags, '[]'::jsonb), '["string"]'), 'C')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_books_search_vector
+    ON books USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_books_search_trgm
+    ON books USING GIN ((lower(title || ' ' || author || ' ' || coalesce(genre, '') || ' ' || coalesce(tags::text, ''))) gin_trgm_ops);
@@ -0,0 +1,23 @@
+-- Índices para los filtros de GET /books (status, rating, genre, author, year_min/year_max).
+-- Los de igualdad terminan en (created_at DESC, book_id DESC): las filas del filtro
+-- salen ya en el orden de la paginación y LIMIT corta sin ordenar nada.
+
+CREATE INDEX IF NOT EXISTS idx_books_status_created_at
+    ON books (status, created_at DESC, book_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_books_genre_created_at
+    ON books (genre, created_at DESC, book_id DESC);
+
+-- Combinación más habitual: p. ej. libros disponibles de un género
+CREATE INDEX IF NOT EXISTS idx_books_status_genre_created_at
+    ON books (status, genre, created_at DESC, book_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_books_author_created_at
+    ON books (author, created_at DESC, book_id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_books_rating_created_at
+    ON books (rating, created_at DESC, book_id DESC);
+
+-- Rangos de año: el orden por created_at se resuelve después sobre las filas del rango
+CREATE INDEX IF NOT EXISTS idx_books_year
+    ON books (year);
@@ -0,0 +1,86 @@
+-- Etiquetas: índice GIN para los filtros ?tag= de GET /books y recuento de libros por
+-- etiqueta mantenido por triggers (book_tag_counts) para GET /tags.
+
+-- jsonb_ops (el operador por defecto) admite tanto tags @> '["a","b"]' (todas las
+-- etiquetas) como tags ?| '{a,b}' (alguna): ver schema.TAG_CONDITIONS
+CREATE INDEX IF NOT EXISTS idx_books_tags
+    ON books USING GIN (tags);
+
+CREATE TABLE IF NOT EXISTS book_tag_counts (
+    tag     TEXT PRIMARY KEY,
+    books   BIGINT NOT NULL
+);
+-- GET /tags lista primero las etiquetas con más libros
+CREATE INDEX IF NOT EXISTS idx_book_tag_counts_books
+    ON book_tag_counts (books DESC, tag);
+
+-- Etiquetas distintas y no vacías de un libro, ordenadas: una etiqueta repetida cuenta una vez
+CREATE OR REPLACE FUNCTION books_tag_set(p_tags JSONB) RETURNS TEXT[] AS $$
+    SELECT coalesce(array_agg(DISTINCT t ORDER BY t), '{}')
+    FROM jsonb_array_elements_text(CASE WHEN jsonb_typeof(p_tags) = 'array' THEN p_tags ELSE '[]' END) AS t
+    WHERE t <> ''
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION books_tags_apply(p_tags TEXT[], p_delta INTEGER)
+RETURNS void AS $$
+BEGIN
+    IF cardinality(p_tags) = 0 THEN
+        RETURN;
+    END IF;
+    -- Siempre en el mismo orden: dos escrituras concurrentes no se bloquean en cruz
+    INSERT INTO book_tag_counts AS c (tag, books)
+        SELECT t, p_delta FROM unnest(p_tags) AS t ORDER BY t
+    ON CONFLICT (tag) DO UPDATE SET books = c.books + p_delta;
+    IF p_delta < 0 THEN
+        DELETE FROM book_tag_counts WHERE tag = ANY (p_tags) AND books <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_tags_trigger() RETURNS trigger AS $$
+DECLARE
+    old_tags TEXT[] := '{}';
+    new_tags TEXT[] := '{}';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_tags := books_tag_set(OLD.tags);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_tags := books_tag_set(NEW.tags);
+    END IF;
+    -- En un UPDATE solo se tocan las etiquetas que se quitan o se añaden
+    PERFORM books_tags_apply(ARRAY(SELECT unnest(old_tags) EXCEPT SELECT unnest(new_tags)), -1);
+    PERFORM books_tags_apply(ARRAY(SELECT unnest(new_tags) EXCEPT SELECT unnest(old_tags)), 1);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_tags_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE book_tag_counts;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER books_tags_insert_delete
+    AFTER INSERT OR DELETE ON books
+    FOR EACH ROW EXECUTE FUNCTION books_tags_trigger();
+CREATE OR REPLACE TRIGGER books_tags_update
+    AFTER UPDATE OF tags ON books
+    FOR EACH ROW
+    WHEN (OLD.tags IS DISTINCT FROM NEW.tags)
+    EXECUTE FUNCTION books_tags_trigger();
+CREATE OR REPLACE TRIGGER books_tags_truncate
+    AFTER TRUNCATE ON books
+    FOR EACH STATEMENT EXECUTE FUNCTION books_tags_truncate();
+
+-- Carga inicial de los contadores a partir de los libros ya existentes
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM book_tag_counts) THEN
+        LOCK TABLE books IN SHARE MODE;
+        INSERT INTO book_tag_counts (tag, books)
+            SELECT t, count(*) FROM books, unnest(books_tag_set(tags)) AS t GROUP BY t;
+    END IF;
+END;
+$$;
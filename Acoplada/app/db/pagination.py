@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(*values) -> str:
+    """Codifica la posición de la última fila devuelta como un token opaco."""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursorError(f"Cursor no válido: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError(f"Cursor no válido: {cursor}")
+    return values
+
+
+def decode_book_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Posición (created_at, book_id) de un cursor del listado de libros."""
+    created_at, book_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), str(book_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Cursor no válido: {cursor}") from e
+
+
+def parse_limit(value) -> int:
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"limit debe ser un entero entre 1 y {MAX_PAGE_SIZE}")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit debe ser un entero entre 1 y {MAX_PAGE_SIZE}")
+    return limit
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera."""
+
+
+class ConnectionPool:
+    """Pool de conexiones psycopg2 acotado y seguro entre hilos.
+
+    - Mantiene entre ``minconn`` y ``maxconn`` conexiones abiertas.
+    - Cierra las conexiones ociosas que superan ``idle_timeout`` (por encima de ``minconn``).
+    - Recicla las conexiones que superan ``max_lifetime``.
+    - Verifica con ``SELECT 1`` las conexiones que llevan más de
+      ``health_check_after`` segundos sin usarse antes de entregarlas.
+    """
+
+    def __init__(self, db_config: dict, minconn: int = 1, maxconn: int = 10,
+                 idle_timeout: float = 300.0, max_lifetime: float = 3600.0,
+                 health_check_after: float = 5.0, checkout_timeout: float = 10.0):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Tamaño de pool no válido: min={minconn}, max={maxconn}")
+        self.db_config = db_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition(threading.Lock())
+        # Conexiones ociosas: (conn, creada_en, ultimo_uso); la más reciente al final
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+            'recycled': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        """Cierra una conexión y libera su hueco. Debe llamarse sin el lock."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._cond.notify()
+
+    def _is_usable(self, conn, created_at: float, last_used: float) -> bool:
+        now = time.monotonic()
+        if conn.closed:
+            return False
+        if now - created_at > self.max_lifetime:
+            with self._cond:
+                self._stats['recycled'] += 1
+            return False
+        if now - last_used > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                with self._cond:
+                    self._stats['health_check_failures'] += 1
+                return False
+        return True
+
+    def prefill(self):
+        """Abre conexiones hasta alcanzar ``minconn``."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            self.putconn(conn)
+
+    def getconn(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        started = time.monotonic()
+        while True:
+            candidate = None
+            must_connect = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise psycopg2.OperationalError("El pool de conexiones está cerrado")
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        must_connect = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"Pool agotado: {self.maxconn} conexiones en uso "
+                            f"tras esperar {self.checkout_timeout}s"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if must_connect:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                break
+
+            conn, created_at, last_used = candidate
+            if self._is_usable(conn, created_at, last_used):
+                break
+            self._discard(conn)
+
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+        if discard or conn.closed or self._closed:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            self._idle.append((conn, self._created_at.get(id(conn), now), now))
+            # Las conexiones más antiguas están al principio de la cola
+            while self._idle and self._size - len(expired) > self.minconn:
+                oldest, _, last_used = self._idle[0]
+                if now - last_used <= self.idle_timeout:
+                    break
+                self._idle.popleft()
+                expired.append(oldest)
+            self._cond.notify()
+        for old in expired:
+            self._discard(old)
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        except BaseException:
+            # BaseException incluye GeneratorExit: un generador que se cierra a medias
+            # (p. ej. un cliente que corta un streaming) también devuelve la conexión
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+            self.putconn(conn, discard=conn.closed != 0)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            idle = len(self._idle)
+            stats = dict(self._stats)
+            stats.update({
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'waiting': self._waiting,
+            })
+        return stats
@@ -1,17 +1,57 @@
 import psycopg2
 import psycopg2.extras
-from typing import List, Optional
+from psycopg2.extras import execute_values
+from typing import Iterator, List, Optional, Tuple
 from .db import Database
-from models.book import Book
+from .pool import ConnectionPool
+from .copy_stream import stream_copy_out
+from .pagination import encode_cursor, decode_cursor, decode_book_cursor, InvalidCursorError
+from .schema import (BOOK_COLUMNS, COLLECTION_VERSION, QUALIFIED_BOOK_COLUMNS, SEARCH_TEXT, filter_conditions,
+                     like_pattern, split_collection_version, with_collection_version)
+from .migrate import DB_AUTO_MIGRATE, check_version, migrate
+from models.book import Book, BookUpdate, BookFilter, book_from_row, BookPage, BookStats, BatchResult, TagCount
+import io
 import os
 import json
+import uuid
 from datetime import datetime
 
+
+# Segundos que una réplica va por detrás del primario (0 en el primario). Si ya
+# ha aplicado todo lo recibido no hay retraso aunque el primario lleve tiempo
+# sin escribir (pg_last_xact_replay_timestamp no avanza sin transacciones)
+REPLICATION_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _copy_value(value) -> str:
+    """Codifica un valor para COPY en formato text (NULL como \\N y escapes con barra)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _patch_assignments(changes: BookUpdate) -> Tuple[str, list]:
+    """SET de un PATCH: solo las columnas enviadas, más updated_at."""
+    values = changes.model_dump(exclude_unset=True)
+    if 'tags' in values:
+        values['tags'] = json.dumps(values['tags']) if values['tags'] else None
+    values['updated_at'] = datetime.utcnow()
+    return ", ".join(f"{column} = %s" for column in values), list(values.values())
+
+
 class PostgresDatabase(Database):
     
-    def __init__(self):
+    def __init__(self, host: str = None, replica: bool = False, auto_migrate: bool = DB_AUTO_MIGRATE):
         self.db_config = {
-            'host': os.getenv('DB_HOST'),
+            'host': host or os.getenv('DB_HOST'),
             'user': os.getenv('DB_USER'),
             'password': os.getenv('DB_PASS'),
             'database': os.getenv('DB_NAME'),
@@ -21,36 +61,68 @@ class PostgresDatabase(Database):
             'keepalives_interval': 5,
             'keepalives_count': 5
         }
-        self.initialize()
+        self.pool_config = {
+            'minconn': int(os.getenv('DB_POOL_MIN', '1')),
+            'maxconn': int(os.getenv('DB_POOL_MAX', '10')),
+            'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+            'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '5')),
+            'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10'))
+        }
+        self.pool = ConnectionPool(self.db_config, **self.pool_config)
+        # Al arrancar solo se compara la versión del esquema y, si está atrasada,
+        # falla: las migraciones se aplican en el despliegue con `python -m db.migrate`
+        # (o aquí con auto_migrate). Una réplica es de solo lectura: nunca migra
+        try:
+            with self._get_connection() as conn:
+                check_version(conn, auto_migrate=auto_migrate and not replica)
+        except Exception:
+            self.pool.closeall()
+            raise
+        self.pool.prefill()
 
     def _get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return self.pool.connection()
 
-    def initialize(self):
-        conn = self._get_connection()
-        try:
+    def get_pool_stats(self) -> dict:
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.closeall()
+
+    def ping(self):
+        """Ida y vuelta mínima con una conexión del pool (la usa el prober de salud)."""
+        with self._get_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS books (
-                        book_id        VARCHAR(36) PRIMARY KEY,
-                        title          VARCHAR(255) NOT NULL,
-                        author         VARCHAR(255) NOT NULL,
-                        genre          VARCHAR(100),
-                        year           INTEGER CHECK (year >= 0),
-                        status         VARCHAR(20) DEFAULT 'available' CHECK (status IN ('available', 'borrowed', 'reserved', 'lost')),
-                        rating         VARCHAR(10) DEFAULT 'medium' CHECK (rating IN ('low', 'medium', 'high', 'excellent')),
-                        created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        tags           JSONB
-                    );
-                """)
-                conn.commit()
-        finally:
-            conn.close()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+
+    def replication_lag(self) -> float:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(REPLICATION_LAG_SQL)
+                return float(cursor.fetchone()[0])
+
+    def _row_to_book(self, row) -> Book:
+        # Las filas vienen de la propia tabla, cuyas restricciones ya garantizan
+        # lo que validaría Pydantic: se construye el modelo sin revalidar (book_from_row)
+        row = dict(row)
+        tags = row['tags']
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except json.JSONDecodeError:
+                tags = []
+        row['tags'] = tags if isinstance(tags, list) else []
+        return book_from_row(row)
+
+    def initialize(self):
+        """Aplica las migraciones pendientes del esquema."""
+        with self._get_connection() as conn:
+            migrate(conn)
 
     def create_book(self, book: Book) -> Book:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor() as cursor:
                 sql = """
                     INSERT INTO books 
@@ -71,83 +143,172 @@ class PostgresDatabase(Database):
                 ))
                 conn.commit()
             return book
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
     
     def get_book(self, book_id: str) -> Optional[Book]:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-                sql = "SELECT * FROM books WHERE book_id = %s"
+                sql = f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = %s"
                 cursor.execute(sql, (book_id,))
                 result = cursor.fetchone()
                 if result:
-                    result = dict(result)
-                    result['created_at'] = result['created_at'].isoformat() if result['created_at'] else None
-                    result['updated_at'] = result['updated_at'].isoformat() if result['updated_at'] else None
-                    
-                    if result['tags'] is not None:
-                        try:
-                            if isinstance(result['tags'], str):
-                                result['tags'] = json.loads(result['tags'])
-                            elif isinstance(result['tags'], list):
-                                result['tags'] = result['tags']
-                            else:
-                                result['tags'] = []
-                        except (json.JSONDecodeError, TypeError):
-                            result['tags'] = []
-                    else:
-                        result['tags'] = []
-                        
-                    return Book(**result)
+                    return self._row_to_book(result)
             return None
-        finally:
-            conn.close()
     
     def get_all_books(self) -> List[Book]:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-                sql = "SELECT * FROM books ORDER BY created_at DESC"
+                sql = f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC"
                 cursor.execute(sql)
                 results = cursor.fetchall()
-                books = []
-                for row in results:
-                    row = dict(row)
-                    row['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
-                    row['updated_at'] = row['updated_at'].isoformat() if row['updated_at'] else None
-                    
-                    if row['tags'] is not None:
-                        try:
-                            if isinstance(row['tags'], str):
-                                row['tags'] = json.loads(row['tags'])
-                            elif isinstance(row['tags'], list):
-                                row['tags'] = row['tags']
-                            else:
-                                row['tags'] = []
-                        except (json.JSONDecodeError, TypeError):
-                            row['tags'] = []
-                    else:
-                        row['tags'] = []
-                        
-                    books.append(Book(**row))
-                return books
-        finally:
-            conn.close()
+                return [self._row_to_book(row) for row in results]
+
+    def query_books(self, filters: BookFilter, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    with_version: bool = False) -> BookPage:
+        """Libros que cumplen los filtros, de más reciente a más antiguo; sin limit, todos.
+
+        Con ``with_version`` la página trae también la versión de la colección
+        (``page.version``), leída en la misma sentencia que las filas.
+        """
+        conditions, params = filter_conditions(filters)
+        if cursor:
+            params.extend(decode_book_cursor(cursor))
+            conditions.append("(created_at, book_id) < (%s, %s)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit + 1)
+        if with_version:
+            sql = with_collection_version(sql)
+
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as db_cursor:
+                db_cursor.execute(sql, params)
+                results = db_cursor.fetchall()
+
+        version = None
+        if with_version:
+            results, version = split_collection_version(results)
+        next_cursor = None
+        if limit is not None and len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor(last['created_at'].isoformat(), last['book_id'])
+        return BookPage(items=[self._row_to_book(row) for row in results], next_cursor=next_cursor, version=version)
+
+    def iter_books(self, batch_size: int = 1000) -> Iterator[Book]:
+        # Cursor con nombre (server-side): Postgres envía las filas en lotes de
+        # itersize y el proceso nunca tiene más de un lote en memoria
+        with self._get_connection() as conn:
+            with conn.cursor(name=f"books_stream_{uuid.uuid4().hex}",
+                             cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC")
+                for row in cursor:
+                    yield self._row_to_book(row)
+            conn.commit()
+    
+    def export_books(self, fmt: str, status: Optional[str] = None, genre: Optional[str] = None) -> Iterator[bytes]:
+        """Exporta el catálogo con COPY ... TO STDOUT, sin pasar por Book, en bloques de bytes."""
+        conditions, params = [], {}
+        if status:
+            conditions.append("status = %(status)s")
+            params['status'] = status
+        if genre:
+            conditions.append("genre = %(genre)s")
+            params['genre'] = genre
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC"
+
+        if fmt == 'csv':
+            sql = f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        elif fmt == 'ndjson':
+            # En formato text COPY escaparía las barras del JSON; en csv con comilla y
+            # separador que nunca aparecen sin escapar en un JSON, la línea sale tal cual
+            sql = (f"COPY (SELECT row_to_json(b) FROM ({select}) b) TO STDOUT "
+                   f"WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')")
+        else:
+            raise ValueError(f"Formato de exportación no soportado: {fmt}")
+        return stream_copy_out(self.pool.connection, sql, params)
+
+    def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Búsqueda por texto completo (tsvector) y por subcadena (trigram), ordenada por relevancia."""
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError(f"Cursor no válido: {cursor}")
+
+        sql = f"""
+            SELECT {BOOK_COLUMNS},
+                   ts_rank(search_vector, q) + similarity({SEARCH_TEXT}, %(text)s) AS rank
+            FROM books, websearch_to_tsquery('simple', %(text)s) AS q
+            WHERE search_vector @@ q OR {SEARCH_TEXT} LIKE %(like)s
+            ORDER BY rank DESC, created_at DESC, book_id DESC
+            LIMIT %(limit)s OFFSET %(offset)s
+        """
+        params = {
+            'text': query.lower(),
+            'like': like_pattern(query),
+            'limit': limit + 1,
+            'offset': offset
+        }
+
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as db_cursor:
+                db_cursor.execute(sql, params)
+                results = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(offset + limit)
+        return BookPage(items=[self._row_to_book(row) for row in results], next_cursor=next_cursor)
+    
+    def get_stats(self) -> BookStats:
+        # Contadores mantenidos por triggers (ver migrations/0005_stats.sql y 0008_stats_shards.sql): coste constante
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT s.total_books, s.total_authors, s.total_genres,
+                           (SELECT min(year) FROM book_year_counts) AS oldest_year
+                    FROM book_stats s
+                """)
+                result = cursor.fetchone()
+        return BookStats(**result) if result else BookStats()
+
+    def get_tag_counts(self, limit: int) -> List[TagCount]:
+        # Contadores mantenidos por triggers (ver migrations/0007_tags.sql)
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute("SELECT tag, books FROM book_tag_counts ORDER BY books DESC, tag LIMIT %s", (limit,))
+                return [TagCount(**row) for row in cursor.fetchall()]
+    
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT updated_at FROM books WHERE book_id = %s", (book_id,))
+                result = cursor.fetchone()
+        return result[0] if result else None
+
+    def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        # max(updated_at) por índice y el total desde book_stats: no se lee ninguna fila de books
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(COLLECTION_VERSION)
+                max_updated_at, count = cursor.fetchone()
+        return max_updated_at, count
     
     def update_book(self, book_id: str, book: Book) -> Optional[Book]:
         book.updated_at = datetime.utcnow()
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                sql = """
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                sql = f"""
                     UPDATE books 
                     SET title=%s, author=%s, genre=%s, year=%s, status=%s,
                         rating=%s, updated_at=%s, tags=%s
                     WHERE book_id=%s
+                    RETURNING {BOOK_COLUMNS}
                 """
                 cursor.execute(sql, (
                     book.title, book.author, book.genre, book.year,
@@ -155,26 +316,121 @@ class PostgresDatabase(Database):
                     json.dumps(book.tags) if book.tags else None,
                     book_id
                 ))
+                result = cursor.fetchone()
                 conn.commit()
-                if cursor.rowcount > 0:
-                    return self.get_book(book_id)
-            return None
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+                return self._row_to_book(result) if result else None
+
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        """Actualiza solo los campos enviados y devuelve la fila en la misma sentencia."""
+        assignments, params = _patch_assignments(changes)
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                sql = f"UPDATE books SET {assignments} WHERE book_id = %s RETURNING {BOOK_COLUMNS}"
+                cursor.execute(sql, params + [book_id])
+                result = cursor.fetchone()
+                conn.commit()
+                return self._row_to_book(result) if result else None
     
     def delete_book(self, book_id: str) -> bool:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor() as cursor:
                 sql = "DELETE FROM books WHERE book_id = %s"
                 cursor.execute(sql, (book_id,))
                 conn.commit()
                 return cursor.rowcount > 0
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
\ No newline at end of file
+
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        """Aplica el lote con una sentencia multi-fila por tipo de operación y un único commit."""
+        result = BatchResult()
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                self._apply_batch(cursor, creates, updates, deletes, result)
+            conn.commit()
+        return result
+
+    def _apply_batch(self, cursor, creates, updates, deletes, result: BatchResult):
+        if creates:
+            rows = execute_values(cursor, f"""
+                INSERT INTO books ({BOOK_COLUMNS})
+                VALUES %s
+                ON CONFLICT (book_id) DO NOTHING
+                RETURNING book_id
+            """, [
+                (b.book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                 b.created_at, b.updated_at, json.dumps(b.tags) if b.tags else None)
+                for b in creates
+            ], page_size=len(creates), fetch=True)
+            result.created = [row['book_id'] for row in rows]
+
+        if updates:
+            rows = execute_values(cursor, f"""
+                UPDATE books AS b
+                SET title = v.title, author = v.author, genre = v.genre, year = v.year,
+                    status = v.status, rating = v.rating, updated_at = v.updated_at, tags = v.tags
+                FROM (VALUES %s) AS v (book_id, title, author, genre, year, status, rating, updated_at, tags)
+                WHERE b.book_id = v.book_id
+                RETURNING {QUALIFIED_BOOK_COLUMNS}
+            """, [
+                (book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                 b.updated_at, json.dumps(b.tags) if b.tags else None)
+                for book_id, b in updates
+            ], template="(%s, %s, %s, %s, %s::integer, %s, %s, %s::timestamp, %s::jsonb)",
+               page_size=len(updates), fetch=True)
+            result.updated = [self._row_to_book(row) for row in rows]
+
+        if deletes:
+            cursor.execute("DELETE FROM books WHERE book_id = ANY(%s) RETURNING book_id", (deletes,))
+            result.deleted = [row['book_id'] for row in cursor.fetchall()]
+
+    def import_books(self, books: List[Book]) -> int:
+        """Carga un bloque de libros con COPY a una tabla temporal y un upsert en books.
+
+        Si un book_id se repite gana la última fila. Los libros que ya existían
+        reciben un updated_at no anterior al momento de la carga, para que cambie
+        la versión de la colección. Devuelve el número de libros distintos.
+        """
+        if not books:
+            return 0
+        buffer = io.StringIO()
+        for seq, b in enumerate(books):
+            buffer.write('\t'.join(_copy_value(v) for v in (
+                seq, b.book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                b.created_at, b.updated_at, json.dumps(b.tags) if b.tags else None
+            )))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                # La tabla temporal vive lo que la conexión del pool y se vacía en cada commit
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS books_staging (
+                        seq         INTEGER,
+                        book_id     VARCHAR(36),
+                        title       VARCHAR(255),
+                        author      VARCHAR(255),
+                        genre       VARCHAR(100),
+                        year        INTEGER,
+                        status      VARCHAR(20),
+                        rating      VARCHAR(10),
+                        created_at  TIMESTAMP,
+                        updated_at  TIMESTAMP,
+                        tags        JSONB
+                    ) ON COMMIT DELETE ROWS
+                """)
+                cursor.copy_expert(f"COPY books_staging (seq, {BOOK_COLUMNS}) FROM STDIN", buffer)
+                # DISTINCT ON: un upsert no puede tocar dos veces la misma fila; con
+                # seq descendente se queda la última aparición de cada book_id
+                cursor.execute(f"""
+                    INSERT INTO books ({BOOK_COLUMNS})
+                    SELECT DISTINCT ON (book_id) {BOOK_COLUMNS}
+                    FROM books_staging
+                    ORDER BY book_id, seq DESC
+                    ON CONFLICT (book_id) DO UPDATE SET
+                        title = EXCLUDED.title, author = EXCLUDED.author, genre = EXCLUDED.genre,
+                        year = EXCLUDED.year, status = EXCLUDED.status, rating = EXCLUDED.rating,
+                        updated_at = GREATEST(EXCLUDED.updated_at, %s), tags = EXCLUDED.tags
+                """, (datetime.utcnow(),))
+                imported = cursor.rowcount
+            conn.commit()
+        return imported
@@ -0,0 +1,83 @@
+import json
+
+BOOK_COLUMNS = "book_id, title, author, genre, year, status, rating, created_at, updated_at, tags"
+
+# Columnas de books con el alias "b", para sentencias con FROM/JOIN
+QUALIFIED_BOOK_COLUMNS = ", ".join("b." + column.strip() for column in BOOK_COLUMNS.split(","))
+
+# Longitud máxima de las columnas VARCHAR de books (migrations/0001_initial.sql)
+# que el modelo no limita; status y rating ya los restringe su patrón
+COLUMN_MAX_LENGTHS = {'book_id': 36, 'title': 255, 'author': 255, 'genre': 100}
+
+# Versión de la colección para los ETag de GET /books: max(updated_at) sale del
+# índice y el total de book_stats (en PostgreSQL, la suma de sus shards), sin leer
+# ninguna fila de books
+COLLECTION_VERSION = (
+    "SELECT (SELECT max(updated_at) FROM books) AS collection_updated_at, "
+    "coalesce((SELECT total_books FROM book_stats), 0) AS collection_count"
+)
+
+# Texto sobre el que se buscan subcadenas; debe coincidir con la expresión del
+# índice trigram de migrations/0003_search.sql
+SEARCH_TEXT = "lower(title || ' ' || author || ' ' || coalesce(genre, '') || ' ' || coalesce(tags::text, ''))"
+
+# Condición SQL de cada campo de BookFilter ('{}' es el marcador del parámetro).
+# Los índices de migrations/0006_filters.sql están pensados para estas columnas
+FILTER_CONDITIONS = {
+    'status': "status = {}",
+    'rating': "rating = {}",
+    'genre': "genre = {}",
+    'author': "author = {}",
+    'year_min': "year >= {}",
+    'year_max': "year <= {}",
+}
+
+
+def _json_list(values) -> str:
+    return json.dumps(values, ensure_ascii=False)
+
+
+# Condición de cada tag_mode sobre la lista de etiquetas pedida y cómo se pasa esa
+# lista como parámetro. Las dos las resuelve el índice GIN de migrations/0007_tags.sql
+TAG_CONDITIONS = {
+    'all': ("tags @> {}::text::jsonb", _json_list),
+    'any': ("tags ?| {}::text[]", list),
+}
+
+
+def like_pattern(text: str) -> str:
+    """Patrón LIKE que busca ``text`` (en minúsculas) como subcadena, con %, _ y \\ escapados."""
+    escaped = text.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def filter_conditions(filters, placeholder=lambda n: '%s', tag_conditions=TAG_CONDITIONS):
+    """Condiciones y parámetros de los filtros indicados; ``placeholder(n)`` da el marcador del n-ésimo."""
+    conditions, params = [], []
+    for name, condition in FILTER_CONDITIONS.items():
+        value = getattr(filters, name)
+        if value is not None:
+            params.append(value)
+            conditions.append(condition.format(placeholder(len(params))))
+    if filters.tags:
+        condition, encode = tag_conditions[filters.tag_mode]
+        params.append(encode(filters.tags))
+        conditions.append(condition.format(placeholder(len(params))))
+    return conditions, params
+
+
+def with_collection_version(sql: str) -> str:
+    """Listado de libros ``sql`` con la versión de la colección en cada fila, en una sola sentencia.
+
+    Siempre devuelve al menos una fila: si el listado está vacío, la de la
+    versión con las columnas del libro a NULL (ver split_collection_version).
+    """
+    return (f"SELECT page.*, version.collection_updated_at, version.collection_count "
+            f"FROM ({COLLECTION_VERSION}) AS version LEFT JOIN ({sql}) AS page ON true "
+            f"ORDER BY page.created_at DESC, page.book_id DESC")
+
+
+def split_collection_version(rows) -> tuple:
+    """Filas de libros y versión (max_updated_at, total) de un listado with_collection_version()."""
+    version = (rows[0]['collection_updated_at'], rows[0]['collection_count'])
+    return [row for row in rows if row['book_id'] is not None], version
@@ -0,0 +1,622 @@
+"""Backend SQLite embebido para despliegues de un solo nodo (DB_TYPE=sqlite).
+
+La base de datos es un fichero local (SQLITE_PATH) en modo WAL: las lecturas no
+bloquean a las escrituras y cada consulta es una llamada en proceso, sin red.
+Mismo esquema y restricciones que postgres.sql (tags como texto JSON), mismo
+orden de los listados y estadísticas mantenidas por triggers como en
+migrations/0005_stats.sql. Aquí book_stats sigue siendo una sola fila (sin los
+shards de 0008_stats_shards.sql): SQLite admite un único escritor a la vez, así
+que repartirla no evitaría ninguna espera.
+
+Los errores de sqlite3 se traducen a las excepciones de psycopg2 que ya
+distingue la API (IntegrityError → 409, OperationalError → 503...), igual que
+hace PoolTimeoutError en el pool.
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+import psycopg2
+from .db import Database
+from .migrate import DB_AUTO_MIGRATE, outdated_schema
+from .pagination import encode_cursor, decode_cursor, decode_book_cursor, InvalidCursorError
+from .schema import (BOOK_COLUMNS, COLLECTION_VERSION, filter_conditions, like_pattern, split_collection_version,
+                     with_collection_version)
+from models.book import Book, BookUpdate, BookFilter, book_from_row, BookPage, BookStats, BatchResult, TagCount
+
+
+def _search_text(row: str = '') -> str:
+    """Texto de búsqueda, como SEARCH_TEXT en schema.py, de la fila ``row`` (NEW en los triggers).
+
+    unicode_lower porque lower() de SQLite solo cubre ASCII. Se indexa en
+    books_search (FTS5 con trigramas, el equivalente del índice pg_trgm).
+    """
+    prefix = f"{row}." if row else ''
+    return (f"unicode_lower({prefix}title || ' ' || {prefix}author || ' ' || coalesce({prefix}genre, '') "
+            f"|| ' ' || coalesce({prefix}tags, ''))")
+
+
+# Palabras más cortas que un trigrama no pueden usar MATCH y se buscan con LIKE
+MIN_MATCH_LENGTH = 3
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+_BOOK_COLUMN_LIST = tuple(column.strip() for column in BOOK_COLUMNS.split(','))
+
+
+def _stats_remove(row: str) -> str:
+    """Sentencias de trigger que descuentan el autor, género y año de ``row`` (OLD)."""
+    return f"""
+        UPDATE book_author_counts SET books = books - 1 WHERE author = {row}.author;
+        UPDATE book_genre_counts SET books = books - 1 WHERE genre = {row}.genre;
+        UPDATE book_year_counts SET books = books - 1 WHERE year = {row}.year;
+        UPDATE book_stats SET
+            total_authors = total_authors - (SELECT count(*) FROM book_author_counts
+                                             WHERE author = {row}.author AND books <= 0),
+            total_genres = total_genres - (SELECT count(*) FROM book_genre_counts
+                                           WHERE genre = {row}.genre AND books <= 0);
+        DELETE FROM book_author_counts WHERE author = {row}.author AND books <= 0;
+        DELETE FROM book_genre_counts WHERE genre = {row}.genre AND books <= 0;
+        DELETE FROM book_year_counts WHERE year = {row}.year AND books <= 0;
+    """
+
+
+def _tags_remove(row: str) -> str:
+    """Sentencias de trigger que descuentan las etiquetas de ``row`` (OLD); cada una cuenta una vez."""
+    return f"""
+        UPDATE book_tag_counts SET books = books - 1 WHERE tag IN (SELECT value FROM json_each({row}.tags));
+        DELETE FROM book_tag_counts WHERE tag IN (SELECT value FROM json_each({row}.tags)) AND books <= 0;
+    """
+
+
+def _tags_add(row: str) -> str:
+    """Sentencias de trigger que suman las etiquetas de ``row`` (NEW); cada una cuenta una vez."""
+    return f"""
+        INSERT INTO book_tag_counts (tag, books) SELECT DISTINCT value, 1 FROM json_each({row}.tags) WHERE value <> ''
+            ON CONFLICT (tag) DO UPDATE SET books = books + 1;
+    """
+
+
+def _stats_add(row: str) -> str:
+    """Sentencias de trigger que suman el autor, género y año de ``row`` (NEW)."""
+    return f"""
+        UPDATE book_stats SET
+            total_authors = total_authors + ({row}.author <> '' AND NOT EXISTS (
+                SELECT 1 FROM book_author_counts WHERE author = {row}.author)),
+            total_genres = total_genres + (coalesce({row}.genre, '') <> '' AND NOT EXISTS (
+                SELECT 1 FROM book_genre_counts WHERE genre = {row}.genre));
+        INSERT INTO book_author_counts (author, books) SELECT {row}.author, 1 WHERE {row}.author <> ''
+            ON CONFLICT (author) DO UPDATE SET books = books + 1;
+        INSERT INTO book_genre_counts (genre, books) SELECT {row}.genre, 1 WHERE coalesce({row}.genre, '') <> ''
+            ON CONFLICT (genre) DO UPDATE SET books = books + 1;
+        INSERT INTO book_year_counts (year, books) SELECT {row}.year, 1 WHERE {row}.year IS NOT NULL
+            ON CONFLICT (year) DO UPDATE SET books = books + 1;
+    """
+
+
+# Versiones del esquema, aplicadas en orden y registradas en PRAGMA user_version.
+# Equivalen a las migraciones de PostgreSQL que tienen sentido en SQLite
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS books (
+        book_id        VARCHAR(36) PRIMARY KEY,
+        title          VARCHAR(255) NOT NULL,
+        author         VARCHAR(255) NOT NULL,
+        genre          VARCHAR(100),
+        year           INTEGER CHECK (year >= 0),
+        status         VARCHAR(20) DEFAULT 'available' CHECK (status IN ('available', 'borrowed', 'reserved', 'lost')),
+        rating         VARCHAR(10) DEFAULT 'medium' CHECK (rating IN ('low', 'medium', 'high', 'excellent')),
+        created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        tags           TEXT CHECK (tags IS NULL OR json_valid(tags))
+    );
+    CREATE INDEX IF NOT EXISTS idx_books_created_at_book_id ON books (created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_updated_at ON books (updated_at);
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS book_stats (
+        id             INTEGER PRIMARY KEY CHECK (id = 1),
+        total_books    INTEGER NOT NULL DEFAULT 0,
+        total_authors  INTEGER NOT NULL DEFAULT 0,
+        total_genres   INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS book_author_counts (author TEXT PRIMARY KEY, books INTEGER NOT NULL) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS book_genre_counts (genre TEXT PRIMARY KEY, books INTEGER NOT NULL) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS book_year_counts (year INTEGER PRIMARY KEY, books INTEGER NOT NULL);
+
+    INSERT INTO book_author_counts (author, books)
+        SELECT author, count(*) FROM books WHERE author <> '' GROUP BY author;
+    INSERT INTO book_genre_counts (genre, books)
+        SELECT genre, count(*) FROM books WHERE genre <> '' GROUP BY genre;
+    INSERT INTO book_year_counts (year, books)
+        SELECT year, count(*) FROM books WHERE year IS NOT NULL GROUP BY year;
+    INSERT INTO book_stats (id, total_books, total_authors, total_genres)
+        SELECT 1, (SELECT count(*) FROM books),
+               (SELECT count(*) FROM book_author_counts),
+               (SELECT count(*) FROM book_genre_counts);
+
+    CREATE TRIGGER IF NOT EXISTS books_stats_insert AFTER INSERT ON books BEGIN
+        UPDATE book_stats SET total_books = total_books + 1;
+        {_stats_add('NEW')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_stats_delete AFTER DELETE ON books BEGIN
+        UPDATE book_stats SET total_books = total_books - 1;
+        {_stats_remove('OLD')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_stats_update AFTER UPDATE OF author, genre, year ON books
+    WHEN OLD.author IS NOT NEW.author OR OLD.genre IS NOT NEW.genre OR OLD.year IS NOT NEW.year BEGIN
+        {_stats_remove('OLD')}
+        {_stats_add('NEW')}
+    END;
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_search USING fts5(text, tokenize = 'trigram');
+    INSERT INTO books_search (rowid, text) SELECT rowid, {_search_text()} FROM books;
+
+    CREATE TRIGGER IF NOT EXISTS books_search_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_search (rowid, text) VALUES (NEW.rowid, {_search_text('NEW')});
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_search_delete AFTER DELETE ON books BEGIN
+        DELETE FROM books_search WHERE rowid = OLD.rowid;
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_search_update AFTER UPDATE OF title, author, genre, tags ON books BEGIN
+        UPDATE books_search SET text = {_search_text('NEW')} WHERE rowid = NEW.rowid;
+    END;
+    """,
+    # Filtros de GET /books, como migrations/0006_filters.sql
+    """
+    CREATE INDEX IF NOT EXISTS idx_books_status_created_at ON books (status, created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_genre_created_at ON books (genre, created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_status_genre_created_at
+        ON books (status, genre, created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_author_created_at ON books (author, created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_rating_created_at ON books (rating, created_at DESC, book_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_books_year ON books (year);
+    """,
+    # Recuento por etiqueta para GET /tags, como migrations/0007_tags.sql
+    f"""
+    CREATE TABLE IF NOT EXISTS book_tag_counts (tag TEXT PRIMARY KEY, books INTEGER NOT NULL) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_book_tag_counts_books ON book_tag_counts (books DESC, tag);
+    INSERT INTO book_tag_counts (tag, books)
+        SELECT t.value, count(DISTINCT books.rowid) FROM books, json_each(books.tags) AS t
+        WHERE t.value <> '' GROUP BY t.value;
+
+    CREATE TRIGGER IF NOT EXISTS books_tags_insert AFTER INSERT ON books BEGIN
+        {_tags_add('NEW')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_tags_delete AFTER DELETE ON books BEGIN
+        {_tags_remove('OLD')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_tags_update AFTER UPDATE OF tags ON books
+    WHEN OLD.tags IS NOT NEW.tags BEGIN
+        {_tags_remove('OLD')}
+        {_tags_add('NEW')}
+    END;
+    """,
+]
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    # Formato fijo con microsegundos: el orden de los textos coincide con el de las fechas
+    return value.isoformat(sep=' ', timespec='microseconds') if value else None
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _tags_json(tags) -> Optional[str]:
+    return json.dumps(tags, ensure_ascii=False) if tags else None
+
+
+# Filtros ?tag= sin índice GIN: se comprueban con json_each sobre las etiquetas de cada libro
+TAG_CONDITIONS = {
+    'all': ("NOT EXISTS (SELECT 1 FROM json_each({}) AS wanted "
+            "WHERE wanted.value NOT IN (SELECT value FROM json_each(books.tags)))", _tags_json),
+    'any': ("EXISTS (SELECT 1 FROM json_each(books.tags) WHERE value IN (SELECT value FROM json_each({})))",
+            _tags_json),
+}
+
+
+def _book_params(b: Book) -> tuple:
+    return (b.book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+            _timestamp(b.created_at), _timestamp(b.updated_at), _tags_json(b.tags))
+
+
+def _unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+class SQLiteDatabase(Database):
+
+    def __init__(self, path: str = None, auto_migrate: bool = DB_AUTO_MIGRATE):
+        self.path = path or os.getenv('SQLITE_PATH', 'books.db')
+        self.busy_timeout_ms = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+        self.cache_size_kb = int(os.getenv('SQLITE_CACHE_KB', '65536'))
+        self.mmap_size = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+        # Una conexión por hilo: sqlite3 no permite compartirlas entre hilos sin bloqueo propio
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        with self._connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(MIGRATIONS):
+            if not auto_migrate:
+                self.close()
+                raise outdated_schema(version, len(MIGRATIONS))
+            self.initialize()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: autocommit; las escrituras de varias sentencias abren BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                               isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kb}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.create_function('unicode_lower', 1, _unicode_lower, deterministic=True)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        try:
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            yield conn
+        except sqlite3.IntegrityError as e:
+            raise psycopg2.IntegrityError(str(e)) from e
+        except sqlite3.OperationalError as e:
+            raise psycopg2.OperationalError(str(e)) from e
+        except sqlite3.Error as e:
+            raise psycopg2.DatabaseError(str(e)) from e
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción de escritura: BEGIN IMMEDIATE toma el lock de escritura al empezar."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def ping(self):
+        with self._connection() as conn:
+            conn.execute("SELECT 1").fetchone()
+
+    def _row_to_book(self, row) -> Book:
+        row = dict(row)
+        tags = row['tags']
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except json.JSONDecodeError:
+                tags = []
+        row['tags'] = tags if isinstance(tags, list) else []
+        row['created_at'] = _parse_timestamp(row['created_at'])
+        row['updated_at'] = _parse_timestamp(row['updated_at'])
+        return book_from_row(row)
+
+    def initialize(self):
+        """Aplica las versiones pendientes del esquema (PRAGMA user_version)."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Se relee con el lock tomado: otro proceso puede haber migrado mientras tanto
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                    for statement in _split_script(script):
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {number}")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def create_book(self, book: Book) -> Book:
+        with self._connection() as conn:
+            conn.execute(f"INSERT INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         _book_params(book))
+        return book
+
+    def get_book(self, book_id: str) -> Optional[Book]:
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = ?", (book_id,)).fetchone()
+        return self._row_to_book(row) if row else None
+
+    def get_all_books(self) -> List[Book]:
+        with self._connection() as conn:
+            rows = conn.execute(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC").fetchall()
+        return [self._row_to_book(row) for row in rows]
+
+    def query_books(self, filters: BookFilter, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    with_version: bool = False) -> BookPage:
+        """Libros que cumplen los filtros, de más reciente a más antiguo; sin limit, todos.
+
+        Con ``with_version`` la página trae también la versión de la colección
+        (``page.version``), leída en la misma sentencia que las filas.
+        """
+        conditions, params = filter_conditions(filters, lambda n: '?', TAG_CONDITIONS)
+        if cursor:
+            created_at, book_id = decode_book_cursor(cursor)
+            params.extend([_timestamp(created_at), book_id])
+            conditions.append("(created_at, book_id) < (?, ?)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        if with_version:
+            sql = with_collection_version(sql)
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        version = None
+        if with_version:
+            rows, (max_updated_at, count) = split_collection_version(rows)
+            version = (_parse_timestamp(max_updated_at), count)
+        if limit is None:
+            return BookPage(items=[self._row_to_book(row) for row in rows], version=version)
+        items = [self._row_to_book(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last.created_at.isoformat(), last.book_id)
+        return BookPage(items=items, next_cursor=next_cursor, version=version)
+
+    def iter_books(self, batch_size: int = 1000) -> Iterator[Book]:
+        # En WAL la lectura ve una instantánea y no bloquea a los escritores mientras dura
+        with self._connection() as conn:
+            cursor = conn.execute(f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC")
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield self._row_to_book(row)
+            finally:
+                cursor.close()
+
+    def export_books(self, fmt: str, status: Optional[str] = None, genre: Optional[str] = None) -> Iterator[bytes]:
+        """Exporta el catálogo en bloques de bytes con el mismo formato que COPY en PostgreSQL."""
+        if fmt not in ('csv', 'ndjson'):
+            raise ValueError(f"Formato de exportación no soportado: {fmt}")
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if genre:
+            conditions.append("genre = ?")
+            params.append(genre)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._export(fmt, f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC",
+                            params)
+
+    def _export(self, fmt: str, sql: str, params: list) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if fmt == 'csv':
+            writer.writerow(_BOOK_COLUMN_LIST)
+        with self._connection() as conn:
+            cursor = conn.execute(sql, params)
+            try:
+                for row in cursor:
+                    if fmt == 'csv':
+                        writer.writerow(['' if value is None else value for value in row])
+                    else:
+                        record = dict(row)
+                        # Como row_to_json: tags como JSON y fechas con T
+                        record['tags'] = json.loads(record['tags']) if record['tags'] else None
+                        for column in ('created_at', 'updated_at'):
+                            if record[column]:
+                                record[column] = record[column].replace(' ', 'T')
+                        buffer.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                        buffer.write('\n')
+                    if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                        yield buffer.getvalue().encode('utf-8')
+                        buffer.seek(0)
+                        buffer.truncate()
+            finally:
+                cursor.close()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Búsqueda por subcadena de todas las palabras; primero las coincidencias en el título.
+
+        Como websearch_to_tsquery en PostgreSQL, ``a or b`` busca libros con
+        cualquiera de las dos alternativas. Diferencias con PostgreSQL: aquí cada
+        palabra basta con que aparezca como subcadena (allí, como palabra completa,
+        salvo que la consulta entera sea una subcadena), no hay frases entre
+        comillas ni exclusión con ``-`` y la relevancia solo cuenta las palabras
+        que aparecen en el título y el autor (allí, ts_rank más similitud).
+        """
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError(f"Cursor no válido: {cursor}")
+
+        words = query.lower().split() or [query.lower()]
+        alternatives, current = [], []
+        for word in words:
+            if word == 'or':
+                if current:
+                    alternatives.append(current)
+                current = []
+            else:
+                current.append(word)
+        if current:
+            alternatives.append(current)
+        if not alternatives:
+            alternatives = [words]
+
+        selects, params = [], []
+        for alternative in alternatives:
+            # Las palabras de tres o más caracteres usan el índice de trigramas; las cortas, LIKE sobre él
+            phrases = [word for word in alternative if len(word) >= MIN_MATCH_LENGTH]
+            conditions = [f"text LIKE ? ESCAPE '\\'" for word in alternative if len(word) < MIN_MATCH_LENGTH]
+            alternative_params = [like_pattern(word) for word in alternative if len(word) < MIN_MATCH_LENGTH]
+            if phrases:
+                conditions.insert(0, "text MATCH ?")
+                alternative_params.insert(0, " AND ".join('"' + word.replace('"', '""') + '"' for word in phrases))
+            selects.append(f"SELECT rowid FROM books_search WHERE {' AND '.join(conditions)}")
+            params.extend(alternative_params)
+        # Relevancia: cada palabra pesa más si aparece en el título que en el autor
+        ranked = list(dict.fromkeys(word for alternative in alternatives for word in alternative))
+        rank = " + ".join("(instr(unicode_lower(title), ?) > 0) * 2 + (instr(unicode_lower(author), ?) > 0)"
+                          for _ in ranked)
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {BOOK_COLUMNS}, {rank} AS rank
+                FROM books
+                WHERE rowid IN ({' UNION '.join(selects)})
+                ORDER BY rank DESC, created_at DESC, book_id DESC
+                LIMIT ? OFFSET ?
+            """, [*[word for word in ranked for _ in range(2)], *params, limit + 1, offset]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(offset + limit)
+        return BookPage(items=[self._row_to_book(row) for row in rows], next_cursor=next_cursor)
+
+    def get_stats(self) -> BookStats:
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT s.total_books, s.total_authors, s.total_genres,
+                       (SELECT min(year) FROM book_year_counts) AS oldest_year
+                FROM book_stats s
+            """).fetchone()
+        return BookStats(**dict(row)) if row else BookStats()
+
+    def get_tag_counts(self, limit: int) -> List[TagCount]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT tag, books FROM book_tag_counts ORDER BY books DESC, tag LIMIT ?",
+                                (limit,)).fetchall()
+        return [TagCount(tag=row['tag'], books=row['books']) for row in rows]
+
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT updated_at FROM books WHERE book_id = ?", (book_id,)).fetchone()
+        return _parse_timestamp(row[0]) if row else None
+
+    def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        with self._connection() as conn:
+            max_updated_at, count = conn.execute(COLLECTION_VERSION).fetchone()
+        return _parse_timestamp(max_updated_at), count
+
+    def update_book(self, book_id: str, book: Book) -> Optional[Book]:
+        book.updated_at = datetime.utcnow()
+        with self._connection() as conn:
+            row = conn.execute(f"""
+                UPDATE books
+                SET title=?, author=?, genre=?, year=?, status=?,
+                    rating=?, updated_at=?, tags=?
+                WHERE book_id=?
+                RETURNING {BOOK_COLUMNS}
+            """, (book.title, book.author, book.genre, book.year, book.status, book.rating,
+                  _timestamp(book.updated_at), _tags_json(book.tags), book_id)).fetchone()
+        return self._row_to_book(row) if row else None
+
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        """Actualiza solo los campos enviados y devuelve la fila en la misma sentencia."""
+        values = changes.model_dump(exclude_unset=True)
+        if 'tags' in values:
+            values['tags'] = _tags_json(values['tags'])
+        values['updated_at'] = _timestamp(datetime.utcnow())
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._connection() as conn:
+            row = conn.execute(f"UPDATE books SET {assignments} WHERE book_id = ? RETURNING {BOOK_COLUMNS}",
+                               [*values.values(), book_id]).fetchone()
+        return self._row_to_book(row) if row else None
+
+    def delete_book(self, book_id: str) -> bool:
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM books WHERE book_id = ?", (book_id,)).rowcount > 0
+
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        """Aplica el lote en una sola transacción; en SQLite cada sentencia es una llamada en proceso."""
+        result = BatchResult()
+        with self._transaction() as conn:
+            for b in creates:
+                row = conn.execute(f"""
+                    INSERT INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (book_id) DO NOTHING
+                    RETURNING book_id
+                """, _book_params(b)).fetchone()
+                if row:
+                    result.created.append(row['book_id'])
+            for book_id, b in updates:
+                row = conn.execute(f"""
+                    UPDATE books
+                    SET title=?, author=?, genre=?, year=?, status=?, rating=?, updated_at=?, tags=?
+                    WHERE book_id=?
+                    RETURNING {BOOK_COLUMNS}
+                """, (b.title, b.author, b.genre, b.year, b.status, b.rating,
+                      _timestamp(b.updated_at), _tags_json(b.tags), book_id)).fetchone()
+                if row:
+                    result.updated.append(self._row_to_book(row))
+            for book_id in deletes:
+                if conn.execute("DELETE FROM books WHERE book_id = ?", (book_id,)).rowcount > 0:
+                    result.deleted.append(book_id)
+        return result
+
+    def import_books(self, books: List[Book]) -> int:
+        """Carga un bloque de libros con un upsert por fila dentro de una transacción.
+
+        Las filas se aplican en orden, así que si un book_id se repite gana la
+        última. Los libros que ya existían reciben un updated_at no anterior al
+        momento de la carga, como en PostgreSQL.
+        """
+        if not books:
+            return 0
+        now = _timestamp(datetime.utcnow())
+        with self._transaction() as conn:
+            conn.executemany(f"""
+                INSERT INTO books ({BOOK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (book_id) DO UPDATE SET
+                    title = excluded.title, author = excluded.author, genre = excluded.genre,
+                    year = excluded.year, status = excluded.status, rating = excluded.rating,
+                    updated_at = max(excluded.updated_at, ?), tags = excluded.tags
+            """, [_book_params(b) + (now,) for b in books])
+        return len({b.book_id for b in books})
+
+
+def _split_script(script: str) -> List[str]:
+    """Divide un script en sentencias completas (los triggers contienen ';' internos)."""
+    statements, current = [], ''
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ''
+    if current.strip():
+        statements.append(current.strip())
+    return statements
@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from .db import Database
+from models.book import Book, BookUpdate, BookFilter, BookPage, BookStats, BatchResult, TagCount
+
+
+class DatabaseWrapper(Database):
+    """Database que delega todas las operaciones en otro backend.
+
+    Base para los decoradores (caché, métricas...): cada subclase sobrescribe
+    solo los métodos que le interesan. Los atributos que no forman parte de la
+    interfaz (p. ej. ``get_pool_stats``) se buscan en el backend envuelto.
+    """
+
+    def __init__(self, inner: Database):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        if name == 'inner':
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def initialize(self):
+        return self.inner.initialize()
+
+    def create_book(self, book: Book) -> Book:
+        return self.inner.create_book(book)
+
+    def get_book(self, book_id: str) -> Optional[Book]:
+        return self.inner.get_book(book_id)
+
+    def get_all_books(self) -> List[Book]:
+        return self.inner.get_all_books()
+
+    def get_books_page(self, limit: int, cursor: Optional[str] = None) -> BookPage:
+        return self.inner.get_books_page(limit, cursor)
+
+    def query_books(self, filters: BookFilter, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    with_version: bool = False) -> BookPage:
+        return self.inner.query_books(filters, limit, cursor, with_version)
+
+    def iter_books(self, batch_size: int = 1000) -> Iterator[Book]:
+        return self.inner.iter_books(batch_size)
+
+    def export_books(self, fmt: str, status: Optional[str] = None, genre: Optional[str] = None) -> Iterator[bytes]:
+        return self.inner.export_books(fmt, status, genre)
+
+    def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        return self.inner.search_books(query, limit, cursor)
+
+    def get_stats(self) -> BookStats:
+        return self.inner.get_stats()
+
+    def get_tag_counts(self, limit: int) -> List[TagCount]:
+        return self.inner.get_tag_counts(limit)
+
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        return self.inner.get_book_version(book_id)
+
+    def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        return self.inner.get_collection_version()
+
+    def update_book(self, book_id: str, book: Book) -> Optional[Book]:
+        return self.inner.update_book(book_id, book)
+
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        return self.inner.patch_book(book_id, changes)
+
+    def delete_book(self, book_id: str) -> bool:
+        return self.inner.delete_book(book_id)
+
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        return self.inner.apply_batch(creates, updates, deletes)
+
+    def import_books(self, books: List[Book]) -> int:
+        return self.inner.import_books(books)
@@ -0,0 +1,33 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def book_etag(book_id: str, updated_at: Optional[datetime]) -> str:
+    """ETag fuerte de un libro: cambia cada vez que cambia su updated_at."""
+    return _etag('book', book_id, updated_at.isoformat() if updated_at else '')
+
+
+def collection_etag(max_updated_at: Optional[datetime], count: int, variant: str = '') -> str:
+    """ETag fuerte de un listado: versión de la colección más los parámetros de la petición."""
+    return _etag('books', max_updated_at.isoformat() if max_updated_at else '', count, variant)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
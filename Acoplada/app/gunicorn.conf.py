@@ -0,0 +1,69 @@
+"""Configuración de gunicorn para servir main:app en producción.
+
+Workers pre-forked (gthread) con varios hilos cada uno. Cada worker crea su
+propio pool de conexiones después del fork y lo calienta antes de aceptar
+tráfico; al terminar lo cierra. El pool de cada worker debería admitir al menos
+tantas conexiones como hilos (DB_POOL_MAX >= GUNICORN_THREADS)::
+
+    gunicorn -c gunicorn.conf.py main:app
+"""
+import os
+import shutil
+import sys
+
+# Las métricas de Prometheus de todos los workers se agregan a través de este directorio;
+# se fija aquí, en el master, antes de que ningún worker importe prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Por encima del idle timeout del ALB (60 s) para que no cierre conexiones reutilizables
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+# Reinicia cada worker tras N peticiones (0 = nunca), con jitter para no reiniciarlos a la vez
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max(max_requests // 10, 0)
+# Con preload la aplicación se importa en el master; el pool se crea igualmente en cada worker
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Los ficheros de una ejecución anterior sumarían contadores de procesos que ya no existen
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Un pool heredado del master compartiría sockets entre procesos: se descarta sin cerrarlo
+    main = sys.modules.get('main')
+    if main is not None:
+        main.reset_db()
+
+
+def post_worker_init(worker):
+    # Se ejecuta en el worker con la aplicación cargada y antes de aceptar conexiones
+    import main
+    try:
+        main.warm_up()
+    except Exception as e:
+        # El worker arranca igualmente: get_db() lo reintentará en la primera petición
+        worker.log.error(f"Calentamiento fallido en el worker {worker.pid}: {e}")
+
+
+def worker_exit(server, worker):
+    main = sys.modules.get('main')
+    if main is not None:
+        main.close_db()
+
+
+def child_exit(server, worker):
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,125 @@
+"""Estado de salud de la base de datos, refrescado en segundo plano.
+
+Un hilo por proceso hace ``ping()`` con una conexión del pool cada
+HEALTH_INTERVAL segundos y guarda el resultado. /health y /ready responden
+leyendo ese estado, sin tocar la base de datos, así que los health checks del
+balanceador no abren conexiones ni bloquean hilos aunque PostgreSQL vaya lento.
+
+El hilo se arranca en cada worker (después del fork) y se vuelve a arrancar
+si el proceso cambia de pid. La aplicación ASGI (asgi.py), cuyo backend es
+asíncrono, usa en su lugar una tarea en el bucle de eventos (``start_async``).
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Callable
+
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', '5'))
+# Latencia de ping a partir de la cual la base de datos se considera degradada (sigue lista)
+HEALTH_SLOW_MS = float(os.getenv('HEALTH_SLOW_MS', '500'))
+# Sin una comprobación correcta en este tiempo el proceso deja de estar listo
+HEALTH_STALE_AFTER = float(os.getenv('HEALTH_STALE_AFTER', str(HEALTH_INTERVAL * 3)))
+
+
+class HealthProber:
+
+    def __init__(self, get_db: Callable, interval: float = HEALTH_INTERVAL,
+                 slow_ms: float = HEALTH_SLOW_MS, stale_after: float = HEALTH_STALE_AFTER):
+        self.get_db = get_db
+        self.interval = interval
+        self.slow_ms = slow_ms
+        self.stale_after = stale_after
+        self.started_at = time.time()
+        # Se sustituye entero en cada comprobación: los lectores nunca ven un estado a medias
+        self.state = {'status': 'unknown', 'checked_at': None, 'latency_ms': None, 'error': None,
+                      'consecutive_failures': 0}
+        self._last_ok = None
+        self._thread = None
+        self._task = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Arranca el hilo si no está en marcha en este proceso (coste: una comparación)."""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._thread.start()
+
+    def start_async(self) -> asyncio.Task:
+        """Arranca el prober como tarea del bucle de eventos actual, para backends con ping() asíncrono."""
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run_async(), name='health-prober')
+        return self._task
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
+
+    async def _run_async(self):
+        while not self._stop.is_set():
+            await self.check_async()
+            await asyncio.sleep(self.interval)
+
+    def check(self) -> dict:
+        started = time.perf_counter()
+        try:
+            self.get_db().ping()
+        except Exception as e:
+            return self._failed(e)
+        return self._succeeded(started)
+
+    async def check_async(self) -> dict:
+        started = time.perf_counter()
+        try:
+            await self.get_db().ping()
+        except Exception as e:
+            return self._failed(e)
+        return self._succeeded(started)
+
+    def _failed(self, error: Exception) -> dict:
+        failures = self.state['consecutive_failures'] + 1
+        if failures == 1:
+            print(f"Health: la base de datos no responde: {error}", file=sys.stderr)
+        self.state = {'status': 'down', 'checked_at': time.time(), 'latency_ms': None, 'error': str(error),
+                      'consecutive_failures': failures}
+        return self.state
+
+    def _succeeded(self, started: float) -> dict:
+        previous = self.state
+        latency_ms = (time.perf_counter() - started) * 1000
+        if previous['status'] == 'down':
+            print("Health: la base de datos vuelve a responder", file=sys.stderr)
+        self._last_ok = time.monotonic()
+        self.state = {'status': 'degraded' if latency_ms > self.slow_ms else 'up', 'checked_at': time.time(),
+                      'latency_ms': round(latency_ms, 2), 'error': None, 'consecutive_failures': 0}
+        return self.state
+
+    def prober_alive(self) -> bool:
+        running = ((self._thread is not None and self._thread.is_alive())
+                   or (self._task is not None and not self._task.done()))
+        return running and self._pid == os.getpid()
+
+    def is_ready(self) -> bool:
+        return (self.state['status'] in ('up', 'degraded') and self._last_ok is not None
+                and time.monotonic() - self._last_ok <= self.stale_after)
+
+    def database(self) -> dict:
+        state = dict(self.state)
+        state['age_s'] = round(time.time() - state['checked_at'], 3) if state['checked_at'] else None
+        return state
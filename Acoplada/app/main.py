@@ -1,38 +1,141 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
 from pydantic import ValidationError
 import psycopg2
 from botocore.exceptions import ClientError
-from models.book import Book
+from models.book import Book, BookFilter, BookUpdate
 from db.factory import DatabaseFactory
+from db.pagination import parse_limit, decode_book_cursor, InvalidCursorError
+from db.batch import execute_batch, BatchTooLargeError
+from db.bulk import import_stream, InvalidImportFormatError, FORMATS as BULK_FORMATS
+from db.copy_stream import gzip_chunks
+from etag import book_etag, collection_etag, etag_matches
+from serialization import dumps
+from health import HealthProber
+import metrics
+import contextlib
+import io
+import itertools
+import json
 import os
+import threading
 import time 
 import sys  
 
+class FastJSONProvider(JSONProvider):
+    """jsonify con el codificador compartido (serialization.dumps): acepta modelos directamente."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return json.loads(s)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# Proxies de confianza delante de la aplicación que añaden su salto a X-Forwarded-For
+# (API Gateway en main.yml; el NLB es TCP y no añade nada). Con 0 la cabecera se
+# ignora y remote_addr es la dirección del socket: un cliente no puede fijarla
+PROXY_TRUSTED_HOPS = int(os.getenv('PROXY_TRUSTED_HOPS', '0'))
+if PROXY_TRUSTED_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_TRUSTED_HOPS, x_proto=0, x_host=0, x_port=0, x_prefix=0)
 
 _db_instance = None
+_db_lock = threading.Lock()
+
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '1000'))
+IMPORT_MAX_REJECTS_REPORTED = int(os.getenv('IMPORT_MAX_REJECTS_REPORTED', '100'))
+
+def _client_key():
+    """Cliente de la petición en curso, para que lea sus propias escrituras aunque haya réplicas."""
+    if not has_request_context():
+        return None
+    # remote_addr ya descuenta los proxies de confianza (ProxyFix): nunca X-Forwarded-For tal cual
+    return request.headers.get('x-api-key') or request.remote_addr
 
 def get_db():
     global _db_instance
-    if _db_instance is None:
-        print("Inicializando base de datos...", file=sys.stderr)
-        try:
-            _db_instance = DatabaseFactory.create()
-            print("Base de datos inicializada exitosamente", file=sys.stderr)
-        except Exception as e:
-            print(f"Error inicializando DB: {e}", file=sys.stderr)
-            raise
+    if _db_instance is not None:
+        return _db_instance
+    # El hilo del prober y la primera petición llegan a la vez: solo uno crea el backend
+    with _db_lock:
+        if _db_instance is None:
+            print("Inicializando base de datos...", file=sys.stderr)
+            try:
+                _db_instance = DatabaseFactory.create(
+                    observer=metrics.observe_db if metrics.METRICS_ENABLED else None,
+                    session_key=_client_key,
+                    on_route=metrics.observe_route if metrics.METRICS_ENABLED else None,
+                    on_flush=metrics.observe_group_commit if metrics.METRICS_ENABLED else None
+                )
+                print("Base de datos inicializada exitosamente", file=sys.stderr)
+            except Exception as e:
+                print(f"Error inicializando DB: {e}", file=sys.stderr)
+                raise
     return _db_instance
 
+prober = HealthProber(get_db)
+
+def reset_db():
+    """Olvida la instancia sin cerrarla: tras un fork, sus conexiones pertenecen al proceso padre."""
+    global _db_instance, _db_lock
+    _db_instance = None
+    # Un lock heredado del padre podría quedar tomado en el hijo
+    _db_lock = threading.Lock()
+
+def warm_up():
+    """Crea el pool del proceso y comprueba la base de datos antes de recibir tráfico."""
+    started = time.perf_counter()
+    get_db()
+    # La primera comprobación es síncrona: el worker empieza ya con estado de salud
+    prober.check()
+    prober.ensure_started()
+    print(f"Worker {os.getpid()} listo en {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+
+def close_db():
+    global _db_instance
+    prober.stop()
+    if _db_instance is not None:
+        print(f"Cerrando el pool del worker {os.getpid()}", file=sys.stderr)
+        _db_instance.close()
+        _db_instance = None
+
 @app.before_request
 def before_request():
-    print(f"[{time.time()}] {request.method} {request.path}", file=sys.stderr)
+    g.request_started = time.perf_counter()
+    prober.ensure_started()
+
+@app.after_request
+def record_metrics(response):
+    if metrics.METRICS_ENABLED and 'request_started' in g:
+        # Se etiqueta con la plantilla de la ruta (/books/<book_id>) para acotar la cardinalidad
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe_request(request.method, route, response.status_code, time.perf_counter() - g.request_started)
+        metrics.update_pool_gauges(_db_instance)
+    return response
 
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,x-api-key'
-    response.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,DELETE,OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,x-api-key,If-None-Match'
+    response.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,PATCH,DELETE,OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag'
+    return response
+
+def _consistent_reads():
+    """Bloque cuyas lecturas van todas a la misma réplica (o al primario), si hay réplicas."""
+    db = get_db()
+    return db.consistent_reads() if hasattr(db, 'consistent_reads') else contextlib.nullcontext()
+
+def _not_modified(etag):
+    response = app.response_class(status=304)
+    response.headers['ETag'] = etag
+    return response
+
+def _with_etag(response, etag):
+    response.headers['ETag'] = etag
     return response
 
 @app.route('/books', methods=['OPTIONS'])
@@ -43,6 +146,10 @@ def options_books():
 def options_book(book_id):
     return jsonify({'status': 'ok'}), 200
 
+@app.route('/tags', methods=['OPTIONS'])
+def options_tags():
+    return jsonify({'status': 'ok'}), 200
+
 @app.route('/books', methods=['POST'])
 def create_book():
     try:
@@ -52,7 +159,7 @@ def create_book():
             
         book = Book(**data)
         created = get_db().create_book(book)
-        return jsonify(created.model_dump()), 201
+        return jsonify(created), 201
     except ValidationError as e:
         return jsonify({'error': 'Validation error', 'details': e.errors()}), 400
     except psycopg2.IntegrityError as e:
@@ -64,11 +171,219 @@ def create_book():
     except Exception as e:
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
+@app.route('/books/batch', methods=['POST'])
+def batch_books():
+    try:
+        data = request.get_json()
+        operations = data.get('operations') if isinstance(data, dict) else data
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'Se esperaba una lista de operaciones en "operations"'}), 400
+
+        results = execute_batch(get_db(), operations)
+        return jsonify({'results': results}), 200
+    except BatchTooLargeError as e:
+        return jsonify({'error': 'Batch too large', 'details': str(e)}), 413
+    except psycopg2.IntegrityError as e:
+        return jsonify({'error': 'Database integrity error', 'details': str(e)}), 409
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@app.route('/books/import', methods=['POST'])
+def import_books():
+    try:
+        # El cuerpo se lee en streaming: admite un fichero multipart ('file') o el contenido directo
+        upload = request.files.get('file')
+        if upload is not None:
+            stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+            default_format = 'csv' if (upload.filename or '').lower().endswith('.csv') else 'ndjson'
+        else:
+            stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+            default_format = 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+        fmt = request.args.get('format', default_format)
+
+        rejects = []
+        def on_reject(rejected):
+            if len(rejects) < IMPORT_MAX_REJECTS_REPORTED:
+                rejects.append(rejected)
+        def on_progress(summary):
+            print(f"Importación: {summary['read']} leídas, {summary['imported']} importadas, "
+                  f"{summary['rejected']} rechazadas, {summary['duplicates']} duplicadas", file=sys.stderr)
+
+        summary = import_stream(get_db(), stream, fmt, on_progress=on_progress, on_reject=on_reject)
+        summary['rejects'] = rejects
+        return jsonify(summary), 200
+    except InvalidImportFormatError as e:
+        return jsonify({'error': 'Invalid import format', 'details': str(e)}), 400
+    except UnicodeDecodeError as e:
+        return jsonify({'error': 'Invalid file encoding', 'details': str(e)}), 400
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
 @app.route('/books', methods=['GET'])
 def get_all_books():
     try:
-        books = get_db().get_all_books()
-        return jsonify([b.model_dump() for b in books]), 200
+        # Los parámetros se validan antes de consultar nada: un error responde 400 sin tocar la base de datos.
+        # Filtros (status, rating, genre, author, year_min, year_max, tag) resueltos en la base de datos
+        filters = BookFilter.from_query(request.args) or BookFilter()
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        limit = parse_limit(request.args.get('limit')) if paginated else None
+        cursor = request.args.get('cursor') or None
+        if cursor:
+            decode_book_cursor(cursor)
+        variant = request.query_string.decode('utf-8')
+
+        # Versión y listado salen del mismo destino: si vinieran de réplicas con
+        # distinto retraso, el ETag no correspondería al cuerpo
+        with _consistent_reads():
+            # Solo si el cliente trae un ETag se consulta antes la versión (sin leer
+            # filas) para responder 304; si no, basta la consulta del listado
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match:
+                etag = collection_etag(*get_db().get_collection_version(), variant)
+                if etag_matches(if_none_match, etag):
+                    return _not_modified(etag)
+
+            # El ETag sale de la versión leída en la misma sentencia que las filas
+            page = get_db().query_books(filters, limit, cursor, with_version=True)
+            etag = collection_etag(*page.version, variant)
+        if paginated:
+            return _with_etag(jsonify({
+                'items': page.items,
+                'next_cursor': page.next_cursor
+            }), etag), 200
+        return _with_etag(jsonify(page.items), etag), 200
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid filter parameters',
+                        'details': e.errors(include_url=False, include_context=False)}), 400
+    except InvalidCursorError as e:
+        return jsonify({'error': 'Invalid cursor', 'details': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'error': 'Invalid pagination parameters', 'details': str(e)}), 400
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+def _stream_json(first, books, fmt):
+    # Se agrupan las filas para no emitir un chunk HTTP por libro
+    chunk = []
+    try:
+        if fmt == 'json':
+            chunk.append('[')
+        if first is not None:
+            chunk.append(first.model_dump_json())
+        for book in books:
+            chunk.append(book.model_dump_json() if fmt == 'ndjson' else ',' + book.model_dump_json())
+            if len(chunk) >= STREAM_BATCH_SIZE:
+                yield ('\n'.join(chunk) + '\n') if fmt == 'ndjson' else ''.join(chunk)
+                chunk = []
+        if fmt == 'json':
+            chunk.append(']')
+        if chunk:
+            yield ('\n'.join(chunk) + '\n') if fmt == 'ndjson' else ''.join(chunk)
+    finally:
+        books.close()
+
+@app.route('/books/stream', methods=['GET'])
+def stream_books():
+    fmt = request.args.get('format', 'json').lower()
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'error': 'Invalid format', 'details': "format debe ser 'json' o 'ndjson'"}), 400
+    try:
+        books = get_db().iter_books(STREAM_BATCH_SIZE)
+        # Se lee la primera fila antes de responder para que los errores de
+        # conexión todavía puedan devolverse con su código de estado
+        first = next(books, None)
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(_stream_json(first, books, fmt)), mimetype=mimetype)
+
+def _export_body(first, chunks, compress):
+    try:
+        body = itertools.chain([first], chunks)
+        yield from gzip_chunks(body) if compress else body
+    finally:
+        chunks.close()
+
+@app.route('/books/export', methods=['GET'])
+def export_books():
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in BULK_FORMATS:
+        return jsonify({'error': 'Invalid format', 'details': "format debe ser 'csv' o 'ndjson'"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        chunks = get_db().export_books(fmt, request.args.get('status') or None, request.args.get('genre') or None)
+        # Como en /books/stream, el primer bloque se lee antes de responder
+        first = next(chunks, b'')
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+    filename = f"books.{fmt}" + ('.gz' if compress else '')
+    if compress:
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(_export_body(first, chunks, compress)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/books/search', methods=['GET'])
+def search_books():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        limit = parse_limit(request.args.get('limit'))
+        page = get_db().search_books(query, limit, request.args.get('cursor') or None)
+        return jsonify({
+            'items': page.items,
+            'next_cursor': page.next_cursor
+        }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': 'Invalid cursor', 'details': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'error': 'Invalid pagination parameters', 'details': str(e)}), 400
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@app.route('/books/stats', methods=['GET'])
+def get_stats():
+    try:
+        stats = get_db().get_stats()
+        return jsonify(stats), 200
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@app.route('/tags', methods=['GET'])
+def get_tags():
+    try:
+        # Etiquetas con su número de libros, de los contadores que mantienen los triggers
+        tags = get_db().get_tag_counts(parse_limit(request.args.get('limit')))
+        return jsonify(tags), 200
+    except ValueError as e:
+        return jsonify({'error': 'Invalid pagination parameters', 'details': str(e)}), 400
     except psycopg2.Error as e:
         return jsonify({'error': 'Database error', 'details': str(e)}), 500
     except Exception as e:
@@ -77,9 +392,20 @@ def get_all_books():
 @app.route('/books/<book_id>', methods=['GET'])
 def get_book(book_id):
     try:
-        book = get_db().get_book(book_id)
+        # Versión y libro salen del mismo destino (réplica o primario)
+        with _consistent_reads():
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match:
+                version = get_db().get_book_version(book_id)
+                if version is None:
+                    return jsonify({'error': 'Book not found'}), 404
+                etag = book_etag(book_id, version)
+                if etag_matches(if_none_match, etag):
+                    return _not_modified(etag)
+
+            book = get_db().get_book(book_id)
         if book:
-            return jsonify(book.model_dump()), 200
+            return _with_etag(jsonify(book), book_etag(book.book_id, book.updated_at)), 200
         return jsonify({'error': 'Book not found'}), 404
     except psycopg2.Error as e:
         return jsonify({'error': 'Database error', 'details': str(e)}), 500
@@ -99,7 +425,7 @@ def update_book(book_id):
         book = Book(**data)
         updated = get_db().update_book(book_id, book)
         if updated:
-            return jsonify(updated.model_dump()), 200
+            return jsonify(updated), 200
         return jsonify({'error': 'Book not found'}), 404
     except ValidationError as e:
         return jsonify({'error': 'Validation error', 'details': e.errors()}), 400
@@ -108,6 +434,31 @@ def update_book(book_id):
     except Exception as e:
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
+@app.route('/books/<book_id>', methods=['PATCH'])
+def patch_book(book_id):
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'No se proporcionaron datos JSON'}), 400
+
+        changes = BookUpdate(**data)
+        if not changes.model_fields_set:
+            return jsonify({'error': 'No fields to update'}), 400
+        patched = get_db().patch_book(book_id, changes)
+        if patched:
+            return jsonify(patched), 200
+        return jsonify({'error': 'Book not found'}), 404
+    except ValidationError as e:
+        return jsonify({'error': 'Validation error', 'details': e.errors(include_url=False, include_context=False)}), 400
+    except psycopg2.IntegrityError as e:
+        return jsonify({'error': 'Database integrity error', 'details': str(e)}), 409
+    except psycopg2.OperationalError as e:
+        return jsonify({'error': 'Database connection error', 'details': str(e)}), 503
+    except psycopg2.Error as e:
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
 @app.route('/books/<book_id>', methods=['DELETE'])
 def delete_book(book_id):
     try:
@@ -119,51 +470,50 @@ def delete_book(book_id):
     except Exception as e:
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if not metrics.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics disabled'}), 404
+    metrics.update_pool_gauges(_db_instance, force=True)
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/health', methods=['GET'])
 def health():
-    try:
-        print("Health check iniciado", file=sys.stderr)
-        
-        response_data = {
-            'status': 'healthy',
-            'timestamp': time.time(),
-            'app': 'running'
-        }
-        
-        try:
-            import psycopg2
-            conn = psycopg2.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASS'),
-                database=os.getenv('DB_NAME'),
-                connect_timeout=2
-            )
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                cursor.fetchone()
-            conn.close()
-            response_data['database'] = 'connected'
-            print("Health check: DB conectada", file=sys.stderr)
-            
-        except Exception as db_error:
-            response_data['database'] = 'disconnected'
-            response_data['db_error'] = str(db_error)
-            print(f"Health check: DB error - {db_error}", file=sys.stderr)
-        
-        return jsonify(response_data), 200
-        
-    except Exception as e:
-        print(f"Health check ERROR: {e}", file=sys.stderr)
-        return jsonify({
-            'status': 'unhealthy',
-            'timestamp': time.time(),
-            'error': str(e)
-        }), 503
+    # Liveness: el proceso responde. La base de datos se informa desde la caché del prober
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': time.time(),
+        'app': 'running',
+        'uptime_s': round(time.time() - prober.started_at, 1),
+        'database': prober.state['status'],
+        'prober': 'running' if prober.prober_alive() else 'stopped'
+    }), 200
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness: solo lectura del último estado; nunca abre conexiones
+    ready = prober.is_ready()
+    response_data = {
+        'status': 'ready' if ready else 'not_ready',
+        'timestamp': time.time(),
+        'database': prober.database()
+    }
+    if _db_instance is not None and hasattr(_db_instance, 'get_pool_stats'):
+        response_data['pool'] = _db_instance.get_pool_stats()
+    if _db_instance is not None and hasattr(_db_instance, 'get_cache_stats'):
+        response_data['cache'] = _db_instance.get_cache_stats()
+    if _db_instance is not None and hasattr(_db_instance, 'get_routing_stats'):
+        response_data['routing'] = _db_instance.get_routing_stats()
+    if _db_instance is not None and hasattr(_db_instance, 'get_group_commit_stats'):
+        response_data['group_commit'] = _db_instance.get_group_commit_stats()
+    return jsonify(response_data), 200 if ready else 503
 
 if __name__ == '__main__':
     print("Iniciando aplicación Flask Book Manager...", file=sys.stderr)
     print(f"DB_HOST: {os.getenv('DB_HOST')}", file=sys.stderr)
     print(f"DB_NAME: {os.getenv('DB_NAME')}", file=sys.stderr)
     print(f"DB_USER: {os.getenv('DB_USER')}", file=sys.stderr)
-    app.run(host='0.0.0.0', port=8080, debug=True)
\ No newline at end of file
+    # Servidor de desarrollo; en producción se usa gunicorn (ver gunicorn.conf.py)
+    debug = os.getenv('FLASK_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '8080')), debug=debug)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Métricas de Prometheus de la API Flask, expuestas en /metrics.
+
+- Latencia por ruta (histograma) y peticiones por ruta y código de estado.
+- Duración, filas y errores de cada operación del backend (InstrumentedDatabase).
+- Consultas atendidas por el primario y por cada réplica (ReplicaRoutingDatabase).
+- Tamaño y duración de los lotes del group commit de altas (CoalescingDatabase).
+- Ocupación del pool de conexiones.
+
+Con varios workers de gunicorn, cada proceso escribe sus valores en
+PROMETHEUS_MULTIPROC_DIR (lo configura gunicorn.conf.py) y /metrics los agrega.
+Se desactivan con METRICS_ENABLED=false.
+"""
+import os
+import time
+from typing import Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Cada proceso actualiza los indicadores del pool como mucho una vez por intervalo
+POOL_GAUGE_INTERVAL = float(os.getenv('METRICS_POOL_INTERVAL', '1'))
+
+_MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+DB_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP', ['method', 'route']
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Peticiones HTTP atendidas', ['method', 'route', 'status']
+)
+DB_LATENCY = Histogram(
+    'db_operation_duration_seconds', 'Duración de las operaciones del backend', ['operation'], buckets=DB_BUCKETS
+)
+DB_ROWS = Counter(
+    'db_operation_rows_total', 'Filas devueltas o afectadas por las operaciones del backend', ['operation']
+)
+DB_ERRORS = Counter(
+    'db_operation_errors_total', 'Operaciones del backend que terminaron con error', ['operation']
+)
+DB_ROUTED = Counter(
+    'db_routed_queries_total', 'Operaciones del backend por destino (primario o réplica)', ['target']
+)
+GROUP_COMMIT_BATCH = Histogram(
+    'db_group_commit_batch_size', 'Altas confirmadas juntas en cada lote del group commit',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+GROUP_COMMIT_FLUSH = Histogram(
+    'db_group_commit_flush_seconds', 'Duración de la escritura de cada lote del group commit', buckets=DB_BUCKETS
+)
+POOL = Gauge(
+    'db_pool_connections', 'Conexiones del pool por estado', ['state'], multiprocess_mode='livesum'
+)
+POOL_WAITING = Gauge(
+    'db_pool_waiting_threads', 'Hilos esperando una conexión del pool', multiprocess_mode='livesum'
+)
+POOL_MAX = Gauge(
+    'db_pool_max_connections', 'Tamaño máximo del pool', multiprocess_mode='livesum'
+)
+POOL_TIMEOUTS = Gauge(
+    'db_pool_checkout_timeouts', 'Esperas de conexión que agotaron el tiempo desde el arranque',
+    multiprocess_mode='livesum'
+)
+
+_pool_updated_at = 0.0
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    REQUEST_LATENCY.labels(method, route).observe(seconds)
+    REQUESTS.labels(method, route, str(status)).inc()
+
+
+def observe_db(operation: str, seconds: float, rows: Optional[int], error: bool):
+    """Observer de InstrumentedDatabase."""
+    DB_LATENCY.labels(operation).observe(seconds)
+    if rows:
+        DB_ROWS.labels(operation).inc(rows)
+    if error:
+        DB_ERRORS.labels(operation).inc()
+
+
+def observe_route(target: str):
+    """on_route de ReplicaRoutingDatabase."""
+    DB_ROUTED.labels(target).inc()
+
+
+def observe_group_commit(rows: int, seconds: float):
+    """on_flush de CoalescingDatabase."""
+    GROUP_COMMIT_BATCH.observe(rows)
+    GROUP_COMMIT_FLUSH.observe(seconds)
+
+
+def update_pool_gauges(db, force: bool = False):
+    global _pool_updated_at
+    now = time.monotonic()
+    if db is None or not hasattr(db, 'get_pool_stats') or (not force and now - _pool_updated_at < POOL_GAUGE_INTERVAL):
+        return
+    _pool_updated_at = now
+    stats = db.get_pool_stats()
+    POOL.labels('in_use').set(stats.get('in_use', 0))
+    POOL.labels('idle').set(stats.get('idle', 0))
+    POOL_WAITING.set(stats.get('waiting', 0))
+    POOL_MAX.set(stats.get('max_size', 0))
+    POOL_TIMEOUTS.set(stats.get('timeouts', 0))
+
+
+def render() -> tuple:
+    """Cuerpo y content type de /metrics."""
+    if _MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Descarta los indicadores de un worker que ha terminado (hook child_exit de gunicorn)."""
+    if _MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Any, Dict, Literal, Optional, List, Tuple
 from datetime import datetime
 import uuid
 
@@ -27,10 +27,94 @@ class BookUpdate(BookBase):
     title: Optional[str] = None
     author: Optional[str] = None
 
+    @field_validator('title', 'author')
+    @classmethod
+    def _not_null(cls, value):
+        # Se pueden omitir en un PATCH, pero no anular: son columnas NOT NULL
+        if value is None:
+            raise ValueError('no puede ser null')
+        return value
+
 class Book(BookBase):
     book_id: str = Field(default_factory=lambda: str(uuid.uuid4()), example="550e8400-e29b-41d4-a716-446655440000")
     created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+BOOK_FIELDS = tuple(Book.model_fields)
+
+def book_from_row(row) -> Book:
+    """Book a partir de una fila de la tabla books, sin validar.
+
+    Equivale a ``Book.model_construct`` con todos los campos, sin su coste por
+    campo. Solo para datos de confianza: la fila debe traer todas las columnas
+    de BOOK_FIELDS (las demás se ignoran) y tags ya normalizado a lista.
+    """
+    book = Book.__new__(Book)
+    object.__setattr__(book, '__dict__', {name: row[name] for name in BOOK_FIELDS})
+    object.__setattr__(book, '__pydantic_fields_set__', set(BOOK_FIELDS))
+    object.__setattr__(book, '__pydantic_extra__', None)
+    object.__setattr__(book, '__pydantic_private__', None)
+    return book
+
+class BookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+    # (max(updated_at), total) de la colección, leída en la misma sentencia que la
+    # página cuando se pide con query_books(..., with_version=True); no se serializa
+    version: Optional[Tuple[Optional[datetime], int]] = Field(None, exclude=True)
+
+class BookFilter(BaseModel):
+    """Filtros de GET /books; los indicados se combinan con AND."""
+    status: Optional[str] = Field(None, pattern="^(available|borrowed|reserved|lost)$")
+    rating: Optional[str] = Field(None, pattern="^(low|medium|high|excellent)$")
+    genre: Optional[str] = None
+    author: Optional[str] = None
+    year_min: Optional[int] = Field(None, ge=0)
+    year_max: Optional[int] = Field(None, ge=0)
+    # ?tag=a&tag=b: libros con todas las etiquetas (all) o con alguna de ellas (any)
+    tags: Optional[List[str]] = None
+    tag_mode: Literal["all", "any"] = "all"
+
+    @model_validator(mode='after')
+    def _year_range(self):
+        if self.year_min is not None and self.year_max is not None and self.year_min > self.year_max:
+            raise ValueError('year_min no puede ser mayor que year_max')
+        return self
+
+    @classmethod
+    def from_query(cls, params, tags: Optional[List[str]] = None) -> Optional["BookFilter"]:
+        """Filtros presentes en los parámetros de la petición, o None si no hay ninguno.
+
+        ``tags`` son los valores repetidos de ``tag``; si no se indican se leen con
+        ``params.getlist('tag')`` (MultiDict de Flask, QueryParams de Starlette).
+        """
+        values = {name: params.get(name) for name in cls.model_fields if name != 'tags' and params.get(name)}
+        if tags is None and hasattr(params, 'getlist'):
+            tags = params.getlist('tag')
+        tags = [tag for tag in tags or [] if tag]
+        if tags:
+            values['tags'] = tags
+        return cls(**values) if values else None
+
+class BookStats(BaseModel):
+    total_books: int = 0
+    total_authors: int = 0
+    total_genres: int = 0
+    oldest_year: Optional[int] = None
+
+class TagCount(BaseModel):
+    tag: str
+    books: int
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    book_id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+class BatchResult(BaseModel):
+    created: List[str] = Field(default_factory=list)
+    updated: List[Book] = Field(default_factory=list)
+    deleted: List[str] = Field(default_factory=list)
@@ -0,0 +1,74 @@
+"""Codificación JSON de las respuestas, compartida por la API Flask y las Lambdas.
+
+El codificador se elige con JSON_ENCODER: ``orjson`` (mucho más rápido con
+listados grandes), ``json`` (biblioteca estándar) o ``auto`` (orjson si está
+instalado). Ambos producen la misma salida: fechas en ISO 8601, modelos de
+Pydantic como objetos y cualquier otro tipo desconocido como texto.
+"""
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable
+from pydantic import BaseModel
+
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto').lower()
+
+# Campos con Field(exclude=True) de cada modelo, calculados una vez por clase
+_excluded_fields = {}
+
+
+def _model_fields(obj: BaseModel) -> dict:
+    cls = type(obj)
+    excluded = _excluded_fields.get(cls)
+    if excluded is None:
+        excluded = _excluded_fields[cls] = frozenset(
+            name for name, field in cls.model_fields.items() if field.exclude
+        )
+    if not excluded:
+        return obj.__dict__
+    return {name: value for name, value in obj.__dict__.items() if name not in excluded}
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        # __dict__ contiene los campos tal cual, sin la conversión recursiva de
+        # model_dump: los valores anidados vuelven a pasar por aquí. Como
+        # model_dump, se omiten los campos excluidos (Field(exclude=True))
+        return _model_fields(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def _json_encoder() -> Callable[[object], str]:
+    return json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _orjson_encoder() -> Callable[[object], str]:
+    import orjson
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return dumps
+
+
+def load_encoder(name: str = 'auto') -> Callable[[object], str]:
+    """Devuelve la función ``dumps`` del codificador indicado."""
+    if name == 'json':
+        return _json_encoder()
+    if name == 'orjson':
+        return _orjson_encoder()
+    if name != 'auto':
+        raise ValueError(f"JSON_ENCODER '{name}' no válido. Opciones disponibles: auto, json, orjson")
+    try:
+        return _orjson_encoder()
+    except ImportError:
+        return _json_encoder()
+
+
+dumps = load_encoder(JSON_ENCODER)
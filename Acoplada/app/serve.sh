@@ -0,0 +1,28 @@
+#!/bin/sh
+# Punto de entrada del contenedor. SERVER_MODE elige cómo se sirve la API:
+#   gunicorn  workers pre-forked con hilos (gunicorn.conf.py), por defecto
+#   asgi      variante asíncrona (asgi.py) con uvicorn
+#   dev       servidor de desarrollo de Flask (FLASK_DEBUG activa el depurador)
+set -e
+
+PORT="${PORT:-8080}"
+
+case "${SERVER_MODE:-gunicorn}" in
+  gunicorn)
+    exec gunicorn -c gunicorn.conf.py main:app
+    ;;
+  asgi)
+    exec uvicorn asgi:app --host 0.0.0.0 --port "$PORT" \
+      --workers "${WEB_CONCURRENCY:-2}" \
+      --timeout-keep-alive "${GUNICORN_KEEPALIVE:-75}" \
+      --timeout-graceful-shutdown "${GUNICORN_GRACEFUL_TIMEOUT:-30}" \
+      --no-server-header
+    ;;
+  dev)
+    exec python main.py
+    ;;
+  *)
+    echo "SERVER_MODE '${SERVER_MODE}' no válido. Opciones disponibles: gunicorn, asgi, dev" >&2
+    exit 2
+    ;;
+esac
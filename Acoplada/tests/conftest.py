@@ -0,0 +1,38 @@
+"""Fixtures comunes: cada test se ejecuta contra cada backend con la base de datos vacía.
+
+SQLite usa un fichero temporal por test. PostgreSQL solo se prueba si se indica
+un servidor de pruebas con TEST_DB_HOST (credenciales en DB_USER, DB_PASS y
+DB_NAME, como la aplicación); la tabla books se vacía antes de cada test.
+
+    TEST_DB_HOST=localhost DB_USER=... DB_PASS=... DB_NAME=books_test python -m pytest
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+
+@pytest.fixture(params=['sqlite', 'postgres'])
+def backend(request) -> str:
+    return request.param
+
+
+@pytest.fixture
+def database(backend, tmp_path):
+    if backend == 'sqlite':
+        from db.sqlite_db import SQLiteDatabase
+        instance = SQLiteDatabase(str(tmp_path / 'books.db'), auto_migrate=True)
+    else:
+        host = os.getenv('TEST_DB_HOST')
+        if not host:
+            pytest.skip('PostgreSQL de pruebas no configurado (TEST_DB_HOST)')
+        from db.postgres_db import PostgresDatabase
+        instance = PostgresDatabase(host, auto_migrate=True)
+        # TRUNCATE también reinicia los contadores (triggers de 0005_stats y 0007_tags)
+        with instance._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute('TRUNCATE books')
+            conn.commit()
+    yield instance
+    instance.close()
@@ -0,0 +1,89 @@
+"""Rutas GET de la API con If-None-Match: 304 mientras no cambie nada y ETag nuevo tras escribir."""
+import pytest
+import main
+from db.cached_db import CachedDatabase
+from db.sqlite_db import SQLiteDatabase
+
+
+@pytest.fixture(params=['sqlite', 'cached'])
+def client(request, tmp_path):
+    database = SQLiteDatabase(str(tmp_path / 'books.db'), auto_migrate=True)
+    main._db_instance = CachedDatabase(database) if request.param == 'cached' else database
+    try:
+        yield main.app.test_client()
+    finally:
+        main.close_db()
+
+
+@pytest.fixture
+def book_id(client):
+    response = client.post('/books', json={'title': 'Dune', 'author': 'Frank Herbert'})
+    assert response.status_code == 201
+    return response.get_json()['book_id']
+
+
+def test_book_not_modified(client, book_id):
+    first = client.get(f'/books/{book_id}')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    response = client.get(f'/books/{book_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    # Comparación débil y listas de candidatos (RFC 9110)
+    assert client.get(f'/books/{book_id}', headers={'If-None-Match': f'"otro", W/{etag}'}).status_code == 304
+    assert client.get(f'/books/{book_id}', headers={'If-None-Match': '*'}).status_code == 304
+
+
+def test_book_changes_etag_after_update(client, book_id):
+    etag = client.get(f'/books/{book_id}').headers['ETag']
+    assert client.patch(f'/books/{book_id}', json={'title': 'Dune Mesías'}).status_code == 200
+
+    response = client.get(f'/books/{book_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['title'] == 'Dune Mesías'
+    assert response.headers['ETag'] != etag
+
+
+def test_book_if_none_match_on_missing_book(client):
+    response = client.get('/books/no-existe', headers={'If-None-Match': '"abc"'})
+    assert response.status_code == 404
+
+
+def test_collection_not_modified(client, book_id):
+    first = client.get('/books')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and len(first.get_json()) == 1
+
+    response = client.get('/books', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_collection_etag_depends_on_query(client, book_id):
+    etag = client.get('/books').headers['ETag']
+    response = client.get('/books?limit=10', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('write', [
+    lambda client, book_id: client.post('/books', json={'title': 'Hyperion', 'author': 'Dan Simmons'}),
+    lambda client, book_id: client.put(f'/books/{book_id}', json={'title': 'Dune', 'author': 'F. Herbert'}),
+    lambda client, book_id: client.delete(f'/books/{book_id}'),
+])
+def test_collection_changes_etag_after_write(client, book_id, write):
+    etag = client.get('/books').headers['ETag']
+    assert write(client, book_id).status_code < 300
+
+    response = client.get('/books', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.headers['ETag'] == client.get('/books').headers['ETag']
+
+
+def test_etag_is_exposed_to_browsers(client, book_id):
+    response = client.get(f'/books/{book_id}')
+    assert 'ETag' in response.headers['Access-Control-Expose-Headers']
+    assert 'If-None-Match' in response.headers['Access-Control-Allow-Headers']
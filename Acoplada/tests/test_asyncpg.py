@@ -0,0 +1,126 @@
+"""Backend asíncrono (asyncpg) contra el PostgreSQL de pruebas (TEST_DB_HOST, como conftest)."""
+import asyncio
+import os
+import pytest
+from db import asyncpg_db
+from db.asyncpg_db import AsyncPostgresDatabase
+from db.migrate import SchemaVersionError, connect, migrate
+from models.book import Book, BookFilter, BookUpdate
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    host = os.getenv('TEST_DB_HOST')
+    if not host:
+        pytest.skip('PostgreSQL de pruebas no configurado (TEST_DB_HOST)')
+    monkeypatch.setenv('DB_HOST', host)
+    conn = connect()
+    try:
+        migrate(conn)
+        with conn.cursor() as cursor:
+            cursor.execute('TRUNCATE books')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(scenario):
+    """Ejecuta ``scenario(db)`` con un backend conectado, todo en un mismo bucle de eventos."""
+    async def main():
+        db = AsyncPostgresDatabase()
+        await db.connect()
+        try:
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def make_book(title: str, **fields) -> Book:
+    return Book(title=title, author=fields.pop('author', 'Autora'), **fields)
+
+
+def test_crud(postgres):
+    async def scenario(db):
+        book = await db.create_book(make_book('Dune', tags=['ciencia ficción']))
+        stored = await db.get_book(book.book_id)
+        assert stored.title == 'Dune' and stored.tags == ['ciencia ficción']
+        assert await db.get_book_version(book.book_id) == stored.updated_at
+
+        updated = await db.update_book(book.book_id, make_book('Dune Mesías'))
+        assert updated.title == 'Dune Mesías' and updated.tags == []
+        patched = await db.patch_book(book.book_id, BookUpdate(rating='high'))
+        assert (patched.title, patched.rating) == ('Dune Mesías', 'high')
+
+        assert await db.delete_book(book.book_id) is True
+        assert await db.delete_book(book.book_id) is False
+        assert await db.get_book(book.book_id) is None
+        assert await db.update_book('no-existe', make_book('X')) is None
+    run(scenario)
+
+
+def test_query_and_pages(postgres):
+    async def scenario(db):
+        for i in range(5):
+            await db.create_book(make_book(f'Libro {i}', status='borrowed' if i % 2 else 'available'))
+        newest_first = [book.title for book in await db.get_all_books()]
+        assert newest_first == [f'Libro {i}' for i in reversed(range(5))]
+
+        seen, cursor = [], None
+        while True:
+            page = await db.get_books_page(2, cursor)
+            seen.extend(book.title for book in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert seen == newest_first
+
+        page = await db.query_books(BookFilter(status='borrowed'), with_version=True)
+        assert [book.title for book in page.items] == ['Libro 3', 'Libro 1']
+        assert page.version == await db.get_collection_version()
+        assert page.version[1] == 5
+    run(scenario)
+
+
+def test_search(postgres):
+    async def scenario(db):
+        await db.create_book(make_book('El nombre del viento', author='Patrick Rothfuss'))
+        await db.create_book(make_book('Dune', author='Frank Herbert'))
+        page = await db.search_books('rothfuss', 10)
+        assert [book.title for book in page.items] == ['El nombre del viento']
+        # Subcadena (trigram) además de palabras completas
+        page = await db.search_books('herb', 10)
+        assert [book.title for book in page.items] == ['Dune']
+    run(scenario)
+
+
+def test_stats_and_tags(postgres):
+    async def scenario(db):
+        await db.create_book(make_book('A', author='Uno', genre='Ensayo', year=1950, tags=['x', 'y']))
+        await db.create_book(make_book('B', author='Dos', genre='Ensayo', year=1900, tags=['x']))
+        stats = await db.get_stats()
+        assert (stats.total_books, stats.total_authors, stats.total_genres, stats.oldest_year) == (2, 2, 1, 1900)
+        tags = await db.get_tag_counts(10)
+        assert [(tag.tag, tag.books) for tag in tags] == [('x', 2), ('y', 1)]
+    run(scenario)
+
+
+def test_batch(postgres):
+    async def scenario(db):
+        existing = await db.create_book(make_book('Existente'))
+        new = make_book('Nuevo')
+        result = await db.apply_batch([new, make_book('Repetido', book_id=existing.book_id)],
+                                      [(existing.book_id, make_book('Existente 2'))], [])
+        assert result.created == [new.book_id]
+        assert [book.title for book in result.updated] == ['Existente 2']
+        result = await db.apply_batch([], [], [new.book_id, 'no-existe'])
+        assert result.deleted == [new.book_id]
+    run(scenario)
+
+
+def test_connect_fails_on_outdated_schema(postgres, monkeypatch):
+    # Sin DB_AUTO_MIGRATE, un esquema por detrás de la aplicación impide arrancar
+    monkeypatch.setattr(asyncpg_db, 'DB_AUTO_MIGRATE', False)
+    monkeypatch.setattr(asyncpg_db, 'latest_version', lambda: 10 ** 6)
+    with pytest.raises(SchemaVersionError):
+        run(lambda db: asyncio.sleep(0))
@@ -0,0 +1,332 @@
+"""Contrato común de los backends (Database): mismas respuestas en SQLite y PostgreSQL.
+
+Las diferencias conocidas entre backends están en las pruebas de búsqueda, que
+las comprueban explícitamente (ver SQLiteDatabase.search_books).
+"""
+import io
+import json
+from datetime import datetime, timedelta
+import psycopg2
+import pytest
+from db.batch import execute_batch
+from db.bulk import import_stream
+from db.pagination import InvalidCursorError
+from models.book import Book, BookFilter, BookUpdate
+
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_book(title: str, minute: int = 0, **fields) -> Book:
+    """Libro con created_at fijo: el orden de los listados no depende del reloj."""
+    fields.setdefault('author', 'Ursula K. Le Guin')
+    created = BASE + timedelta(minutes=minute)
+    return Book(title=title, created_at=created, updated_at=created, **fields)
+
+
+def seed(database, books):
+    for book in books:
+        database.create_book(book)
+    return books
+
+
+def titles(books):
+    return [book.title for book in books]
+
+
+# --- CRUD -----------------------------------------------------------------------
+
+def test_create_and_get(database):
+    book = database.create_book(make_book('La mano izquierda de la oscuridad', genre='Ciencia ficción',
+                                          year=1969, tags=['clásico']))
+    stored = database.get_book(book.book_id)
+    assert stored.title == 'La mano izquierda de la oscuridad'
+    assert stored.genre == 'Ciencia ficción'
+    assert stored.year == 1969
+    assert stored.tags == ['clásico']
+    assert stored.created_at == book.created_at
+
+
+def test_get_missing_book(database):
+    assert database.get_book('no-existe') is None
+    assert database.get_book_version('no-existe') is None
+
+
+def test_create_duplicate_raises_integrity_error(database):
+    book = database.create_book(make_book('Los desposeídos'))
+    with pytest.raises(psycopg2.IntegrityError):
+        database.create_book(make_book('Otro', book_id=book.book_id))
+
+
+def test_update_replaces_fields_and_bumps_version(database):
+    book = database.create_book(make_book('Terramar', genre='Fantasía'))
+    updated = database.update_book(book.book_id, make_book('Un mago de Terramar', status='borrowed'))
+    assert updated.title == 'Un mago de Terramar'
+    assert updated.status == 'borrowed'
+    assert updated.genre is None
+    assert database.get_book_version(book.book_id) > book.updated_at
+    assert database.update_book('no-existe', make_book('x')) is None
+
+
+def test_patch_changes_only_sent_fields(database):
+    book = database.create_book(make_book('El nombre del mundo es bosque', genre='Ciencia ficción', year=1972))
+    patched = database.patch_book(book.book_id, BookUpdate(rating='excellent'))
+    assert patched.rating == 'excellent'
+    assert patched.title == book.title
+    assert patched.year == 1972
+    assert database.patch_book('no-existe', BookUpdate(rating='low')) is None
+
+
+def test_delete(database):
+    book = database.create_book(make_book('Lavinia'))
+    assert database.delete_book(book.book_id) is True
+    assert database.get_book(book.book_id) is None
+    assert database.delete_book(book.book_id) is False
+
+
+# --- Listados y cursores ---------------------------------------------------------
+
+def test_get_all_books_newest_first(database):
+    seed(database, [make_book(f'Libro {i}', minute=i) for i in range(3)])
+    assert titles(database.get_all_books()) == ['Libro 2', 'Libro 1', 'Libro 0']
+
+
+def test_pagination_cursor_walks_every_book_once(database):
+    seed(database, [make_book(f'Libro {i}', minute=i) for i in range(5)])
+    seen, cursor = [], None
+    while True:
+        page = database.get_books_page(2, cursor)
+        seen.extend(titles(page.items))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [f'Libro {i}' for i in (4, 3, 2, 1, 0)]
+
+
+def test_pagination_same_created_at_uses_book_id(database):
+    books = seed(database, [make_book(f'Libro {i}', book_id=f'id-{i}') for i in range(3)])
+    first = database.get_books_page(2)
+    second = database.get_books_page(2, first.next_cursor)
+    assert [book.book_id for book in first.items + second.items] == sorted((b.book_id for b in books), reverse=True)
+    assert second.next_cursor is None
+
+
+@pytest.mark.parametrize('cursor', ['no-es-base64!', 'WyJ4Il0', 'WyJubyBlcyB1bmEgZmVjaGEiLCAiaWQiXQ'])
+def test_invalid_cursor(database, cursor):
+    with pytest.raises(InvalidCursorError):
+        database.get_books_page(2, cursor)
+    with pytest.raises(InvalidCursorError):
+        database.query_books(BookFilter(), 2, cursor)
+
+
+# --- Filtros y etiquetas ---------------------------------------------------------
+
+@pytest.fixture
+def catalog(database):
+    return seed(database, [
+        make_book('Dune', minute=0, author='Frank Herbert', genre='Ciencia ficción', year=1965,
+                  status='borrowed', tags=['clásico', 'desierto']),
+        make_book('Hyperion', minute=1, author='Dan Simmons', genre='Ciencia ficción', year=1989,
+                  rating='excellent', tags=['clásico']),
+        make_book('Terramar', minute=2, genre='Fantasía', year=1968, tags=['magia']),
+        make_book('El nombre del viento', minute=3, author='Patrick Rothfuss', genre='Fantasía', year=2007,
+                  tags=['magia', 'saga']),
+    ])
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'status': 'borrowed'}, ['Dune']),
+    ({'rating': 'excellent'}, ['Hyperion']),
+    ({'genre': 'Fantasía'}, ['El nombre del viento', 'Terramar']),
+    ({'author': 'Dan Simmons'}, ['Hyperion']),
+    ({'year_min': 1966, 'year_max': 1990}, ['Terramar', 'Hyperion']),
+    ({'genre': 'Ciencia ficción', 'year_min': 1980}, ['Hyperion']),
+    ({'tags': ['clásico']}, ['Hyperion', 'Dune']),
+    ({'tags': ['magia', 'saga']}, ['El nombre del viento']),
+    ({'tags': ['saga', 'desierto'], 'tag_mode': 'any'}, ['El nombre del viento', 'Dune']),
+    ({'tags': ['inexistente']}, []),
+])
+def test_query_books_filters(database, catalog, filters, expected):
+    assert titles(database.query_books(BookFilter(**filters)).items) == expected
+
+
+def test_query_books_paginates_filtered_rows(database, catalog):
+    first = database.query_books(BookFilter(genre='Fantasía'), 1)
+    second = database.query_books(BookFilter(genre='Fantasía'), 1, first.next_cursor)
+    assert titles(first.items + second.items) == ['El nombre del viento', 'Terramar']
+    assert second.next_cursor is None
+
+
+def test_query_books_with_version_matches_collection_version(database, catalog):
+    page = database.query_books(BookFilter(genre='Fantasía'), 1, with_version=True)
+    assert page.version == database.get_collection_version()
+    assert page.version[1] == 4
+    empty = database.query_books(BookFilter(genre='Poesía'), with_version=True)
+    assert empty.items == []
+    assert empty.version == page.version
+    assert database.query_books(BookFilter()).version is None
+
+
+def test_tag_counts(database, catalog):
+    counts = {count.tag: count.books for count in database.get_tag_counts(10)}
+    assert counts == {'clásico': 2, 'magia': 2, 'desierto': 1, 'saga': 1}
+    database.delete_book(catalog[0].book_id)
+    counts = {count.tag: count.books for count in database.get_tag_counts(10)}
+    assert counts == {'clásico': 1, 'magia': 2, 'saga': 1}
+    assert [count.tag for count in database.get_tag_counts(1)] in (['clásico'], ['magia'])
+
+
+# --- Búsqueda --------------------------------------------------------------------
+
+def test_search_whole_word(database, catalog):
+    assert titles(database.search_books('viento', 10).items) == ['El nombre del viento']
+    assert titles(database.search_books('Herbert', 10).items) == ['Dune']
+
+
+def test_search_requires_every_word(database, catalog):
+    assert titles(database.search_books('nombre viento', 10).items) == ['El nombre del viento']
+    assert database.search_books('nombre hyperion', 10).items == []
+
+
+def test_search_or(database, catalog):
+    assert sorted(titles(database.search_books('dune or terramar', 10).items)) == ['Dune', 'Terramar']
+
+
+def test_search_single_substring(database, catalog):
+    # Una sola palabra a medias coincide en los dos backends (trigramas / LIKE)
+    assert titles(database.search_books('rothf', 10).items) == ['El nombre del viento']
+
+
+def test_search_partial_words(backend, database, catalog):
+    # Diferencia conocida: SQLite acepta cada palabra como subcadena; PostgreSQL
+    # exige palabras completas salvo que la consulta entera sea una subcadena
+    found = titles(database.search_books('rothf nomb', 10).items)
+    assert found == (['El nombre del viento'] if backend == 'sqlite' else [])
+
+
+def test_search_pagination(database):
+    seed(database, [make_book(f'Saga de Terramar {i}', minute=i) for i in range(3)])
+    first = database.search_books('terramar', 2)
+    second = database.search_books('terramar', 2, first.next_cursor)
+    assert len(first.items) == 2 and len(second.items) == 1
+    assert second.next_cursor is None
+    assert {b.book_id for b in first.items}.isdisjoint(b.book_id for b in second.items)
+
+
+# --- Estadísticas ----------------------------------------------------------------
+
+def test_stats_follow_writes(database, catalog):
+    stats = database.get_stats()
+    assert (stats.total_books, stats.total_authors, stats.total_genres, stats.oldest_year) == (4, 4, 2, 1965)
+
+    database.delete_book(catalog[0].book_id)
+    stats = database.get_stats()
+    assert (stats.total_books, stats.total_authors, stats.total_genres, stats.oldest_year) == (3, 3, 2, 1968)
+
+    database.patch_book(catalog[1].book_id, BookUpdate(genre='Fantasía', author='Patrick Rothfuss'))
+    stats = database.get_stats()
+    assert (stats.total_books, stats.total_authors, stats.total_genres) == (3, 2, 1)
+
+
+def test_stats_empty(database):
+    stats = database.get_stats()
+    assert (stats.total_books, stats.total_authors, stats.total_genres, stats.oldest_year) == (0, 0, 0, None)
+    assert database.get_collection_version() == (None, 0)
+
+
+def test_stats_oldest_year_includes_year_zero(database):
+    book = database.create_book(make_book('Gilgamesh', year=0))
+    database.create_book(make_book('Beowulf', year=1000))
+    assert database.get_stats().oldest_year == 0
+    database.delete_book(book.book_id)
+    assert database.get_stats().oldest_year == 1000
+
+
+# --- Lotes -----------------------------------------------------------------------
+
+def test_execute_batch(database):
+    existing = database.create_book(make_book('Lavinia'))
+    doomed = database.create_book(make_book('Los desposeídos'))
+    taken = database.create_book(make_book('Tehanu'))
+    results = execute_batch(database, [
+        {'op': 'create', 'data': {'title': 'Nuevo', 'author': 'Autora', 'book_id': 'nuevo'}},
+        {'op': 'update', 'book_id': existing.book_id, 'data': {'title': 'Lavinia (2008)', 'author': 'Le Guin'}},
+        {'op': 'delete', 'book_id': doomed.book_id},
+        {'op': 'delete', 'book_id': 'no-existe'},
+        {'op': 'create', 'data': {'title': 'Repetido', 'author': 'Autora', 'book_id': taken.book_id}},
+        {'op': 'delete', 'book_id': existing.book_id},
+        {'op': 'create', 'data': {'author': 'Sin título'}},
+    ])
+    assert [result['status'] for result in results] == [201, 200, 204, 404, 409, 400, 400]
+    assert results[5]['error'] == 'Duplicate book_id in batch'
+    assert database.get_book('nuevo').title == 'Nuevo'
+    assert database.get_book(existing.book_id).title == 'Lavinia (2008)'
+    assert database.get_book(doomed.book_id) is None
+    assert database.get_book(taken.book_id).title == 'Tehanu'
+    assert database.get_stats().total_books == 3
+
+
+# --- Importación y exportación ---------------------------------------------------
+
+def ndjson(rows) -> io.StringIO:
+    return io.StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+def test_import_last_duplicate_wins_and_rejects_invalid_rows(database):
+    rejected = []
+    summary = import_stream(database, ndjson([
+        {'book_id': 'a', 'title': 'Primera versión', 'author': 'Autora'},
+        {'book_id': 'b', 'title': 'Otro', 'author': 'Autora', 'tags': ['x']},
+        {'book_id': 'a', 'title': 'Última versión', 'author': 'Autora'},
+        {'book_id': 'c', 'title': 'x' * 256, 'author': 'Autora'},
+        {'book_id': 'd', 'author': 'Sin título'},
+    ]), 'ndjson', on_reject=rejected.append)
+    assert summary['read'] == 5
+    assert summary['imported'] == 2
+    assert summary['duplicates'] == 1
+    assert summary['rejected'] == 2
+    assert [reject['line'] for reject in rejected] == [4, 5]
+    assert database.get_book('a').title == 'Última versión'
+    assert database.get_stats().total_books == 2
+
+
+def test_import_csv(database):
+    summary = import_stream(database, io.StringIO(
+        'book_id,title,author,year,tags\n'
+        'csv-1,Dune,Frank Herbert,1965,"clásico, desierto"\n'
+        'csv-2,Hyperion,Dan Simmons,,\n'
+    ), 'csv')
+    assert (summary['imported'], summary['rejected']) == (2, 0)
+    assert database.get_book('csv-1').tags == ['clásico', 'desierto']
+    assert database.get_book('csv-2').year is None
+
+
+def test_reimport_changes_collection_version(database):
+    import_stream(database, ndjson([{'book_id': 'a', 'title': 'Original', 'author': 'Autora'}]), 'ndjson')
+    before = database.get_collection_version()
+    # Un updated_at antiguo en el fichero no puede hacer retroceder la versión
+    import_stream(database, ndjson([{'book_id': 'a', 'title': 'Cambiado', 'author': 'Autora',
+                                     'updated_at': '2000-01-01T00:00:00'}]), 'ndjson')
+    after = database.get_collection_version()
+    assert after[1] == before[1] == 1
+    assert after[0] > before[0]
+
+
+def test_export_ndjson_round_trip(database, catalog):
+    exported = b''.join(database.export_books('ndjson')).decode('utf-8')
+    records = [json.loads(line) for line in exported.splitlines()]
+    assert [record['title'] for record in records] == ['El nombre del viento', 'Terramar', 'Hyperion', 'Dune']
+    assert records[0]['tags'] == ['magia', 'saga']
+
+    database.delete_book(catalog[0].book_id)
+    summary = import_stream(database, io.StringIO(exported), 'ndjson')
+    assert (summary['imported'], summary['rejected']) == (4, 0)
+    assert database.get_book(catalog[0].book_id).title == 'Dune'
+
+
+def test_export_csv_with_filters(database, catalog):
+    exported = b''.join(database.export_books('csv', genre='Fantasía')).decode('utf-8')
+    lines = exported.splitlines()
+    assert lines[0].split(',')[:3] == ['book_id', 'title', 'author']
+    assert len(lines) == 3
+    exported = b''.join(database.export_books('csv', status='borrowed')).decode('utf-8')
+    assert len(exported.splitlines()) == 2
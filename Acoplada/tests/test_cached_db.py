@@ -0,0 +1,127 @@
+"""CachedDatabase sobre SQLite: aciertos, invalidación en cada escritura y nivel compartido."""
+import pytest
+from db.cached_db import CachedDatabase, LocalCacheTier
+from db.sqlite_db import SQLiteDatabase
+from db.wrapper import DatabaseWrapper
+from models.book import Book, BookUpdate
+
+
+class CountingDatabase(DatabaseWrapper):
+    """Cuenta las lecturas que llegan al backend (las que no resuelve la caché)."""
+
+    def __init__(self, inner):
+        super().__init__(inner)
+        self.reads = 0
+        self.on_read = None
+
+    def get_book(self, book_id):
+        self.reads += 1
+        book = self.inner.get_book(book_id)
+        if self.on_read is not None:
+            self.on_read()
+        return book
+
+
+@pytest.fixture
+def backend(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / 'books.db'), auto_migrate=True)
+    yield CountingDatabase(database)
+    database.close()
+
+
+@pytest.fixture
+def cached(backend):
+    return CachedDatabase(backend, max_size=10, ttl=60)
+
+
+@pytest.fixture
+def book(cached):
+    return cached.create_book(Book(title='Dune', author='Frank Herbert'))
+
+
+def test_second_read_is_a_hit(cached, backend, book):
+    assert cached.get_book(book.book_id).title == 'Dune'
+    assert cached.get_book(book.book_id).title == 'Dune'
+    assert backend.reads == 1
+    stats = cached.get_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_hits_are_copies(cached, book):
+    cached.get_book(book.book_id).title = 'Modificado por el llamante'
+    assert cached.get_book(book.book_id).title == 'Dune'
+
+
+def test_missing_book_is_not_cached(cached, backend):
+    assert cached.get_book('no-existe') is None
+    assert cached.get_book('no-existe') is None
+    assert backend.reads == 2
+
+
+@pytest.mark.parametrize('write', [
+    lambda db, book_id: db.update_book(book_id, Book(title='Dune Mesías', author='Frank Herbert')),
+    lambda db, book_id: db.patch_book(book_id, BookUpdate(title='Dune Mesías')),
+    lambda db, book_id: db.apply_batch([], [(book_id, Book(title='Dune Mesías', author='Frank Herbert'))], []),
+    lambda db, book_id: db.import_books([Book(book_id=book_id, title='Dune Mesías', author='Frank Herbert')]),
+])
+def test_writes_invalidate(cached, backend, book, write):
+    cached.get_book(book.book_id)
+    write(cached, book.book_id)
+    assert cached.get_book(book.book_id).title == 'Dune Mesías'
+    assert backend.reads == 2
+
+
+def test_delete_invalidates(cached, book):
+    cached.get_book(book.book_id)
+    assert cached.delete_book(book.book_id) is True
+    assert cached.get_book(book.book_id) is None
+
+
+def test_read_racing_a_write_is_not_stored(cached, backend, book):
+    # Una escritura termina mientras la lectura está en curso: su resultado ya es viejo
+    backend.on_read = lambda: cached.invalidate(book.book_id)
+    cached.get_book(book.book_id)
+    backend.on_read = None
+    cached.get_book(book.book_id)
+    assert backend.reads == 2
+
+
+def test_version_never_comes_from_local_tier(cached, backend, book):
+    cached.get_book(book.book_id)
+    # Escritura que no pasa por la caché (otro proceso): la versión la ve igual
+    backend.inner.patch_book(book.book_id, BookUpdate(title='Otro'))
+    assert cached.get_book_version(book.book_id) == backend.inner.get_book_version(book.book_id)
+
+
+def test_shared_tier_invalidated_by_other_process(backend, book):
+    shared = LocalCacheTier()
+    first = CachedDatabase(backend, shared=shared, local=False)
+    second = CachedDatabase(backend, shared=shared, local=False)
+    assert first.get_book(book.book_id).title == 'Dune'
+    assert second.get_book(book.book_id).title == 'Dune'
+    assert backend.reads == 1
+
+    second.patch_book(book.book_id, BookUpdate(title='Dune Mesías'))
+    assert first.get_book(book.book_id).title == 'Dune Mesías'
+    assert backend.reads == 2
+
+
+def test_shared_entry_from_older_generation_is_ignored(backend, book):
+    shared = LocalCacheTier()
+    cached = CachedDatabase(backend, shared=shared, local=False)
+    cached.get_book(book.book_id)
+    # Entrada escrita con una generación anterior a la actual
+    shared.incr(CachedDatabase.GEN_PREFIX + book.book_id)
+    assert cached.get_book(book.book_id).title == 'Dune'
+    assert cached.get_cache_stats()['shared_stale'] == 1
+    assert backend.reads == 2
+
+
+def test_lru_eviction(backend):
+    cached = CachedDatabase(backend, max_size=2, ttl=60)
+    books = [cached.create_book(Book(title=f'Libro {i}', author='Autora')) for i in range(3)]
+    for book in books:
+        cached.get_book(book.book_id)
+    cached.get_book(books[0].book_id)
+    assert backend.reads == 4
+    assert cached.get_cache_stats()['evictions'] == 2
@@ -0,0 +1,127 @@
+"""CoalescingDatabase con un backend falso: agrupación y reparto de errores entre clientes."""
+import threading
+import psycopg2
+import pytest
+from db.coalescing_db import CoalescingDatabase
+from models.book import BatchResult, Book
+
+
+class FakeDatabase:
+    """apply_batch configurable; create_book falla para los book_id de ``existing``."""
+
+    def __init__(self):
+        self.batches = []
+        self.singles = []
+        self.batch_error = None
+        self.skip = set()
+        self.existing = set()
+        self.writes = 0
+
+    def apply_batch(self, creates, updates, deletes):
+        self.batches.append([book.book_id for book in creates])
+        if self.batch_error is not None:
+            raise self.batch_error
+        return BatchResult(created=[book.book_id for book in creates if book.book_id not in self.skip])
+
+    def create_book(self, book):
+        self.singles.append(book.book_id)
+        if book.book_id in self.existing:
+            raise psycopg2.IntegrityError(f'Key (book_id)=({book.book_id}) already exists.')
+        return book
+
+    def record_write(self):
+        self.writes += 1
+
+
+def make_book(book_id: str) -> Book:
+    return Book(book_id=book_id, title=f'Libro {book_id}', author='Autora')
+
+
+def create_concurrently(db: CoalescingDatabase, book_ids) -> dict:
+    """Lanza un create_book por hilo y devuelve {book_id: libro creado o excepción}."""
+    outcomes = {}
+
+    def create(book_id):
+        try:
+            outcomes[book_id] = db.create_book(make_book(book_id))
+        except Exception as e:
+            outcomes[book_id] = e
+    threads = [threading.Thread(target=create, args=(book_id,)) for book_id in book_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(outcomes) == len(book_ids)
+    return outcomes
+
+
+@pytest.fixture
+def inner():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def db(inner):
+    # Ventana larga: el lote se cierra al llegar a max_batch, no por tiempo
+    return CoalescingDatabase(inner, window_ms=5000, max_batch=3)
+
+
+def test_concurrent_creates_share_one_batch(db, inner):
+    outcomes = create_concurrently(db, ['a', 'b', 'c'])
+    assert {book_id: book.book_id for book_id, book in outcomes.items()} == {'a': 'a', 'b': 'b', 'c': 'c'}
+    assert [sorted(batch) for batch in inner.batches] == [['a', 'b', 'c']]
+    stats = db.get_group_commit_stats()
+    assert (stats['batches'], stats['rows'], stats['max_batch_seen']) == (1, 3, 3)
+    # Cada cliente registra su propia escritura para leer después del primario
+    assert inner.writes == 3
+
+
+def test_single_create_skips_batch(inner):
+    db = CoalescingDatabase(inner, window_ms=1, max_batch=3)
+    assert db.create_book(make_book('a')).book_id == 'a'
+    assert inner.singles == ['a'] and inner.batches == []
+
+
+def test_constraint_error_retries_row_by_row(db, inner):
+    inner.batch_error = psycopg2.IntegrityError('duplicate key value violates unique constraint "books_pkey"')
+    inner.existing = {'b'}
+    outcomes = create_concurrently(db, ['a', 'b', 'c'])
+    assert outcomes['a'].book_id == 'a' and outcomes['c'].book_id == 'c'
+    assert isinstance(outcomes['b'], psycopg2.IntegrityError)
+    assert sorted(inner.singles) == ['a', 'b', 'c']
+    assert db.get_group_commit_stats()['fallbacks'] == 1
+
+
+def test_other_errors_reach_every_caller(db, inner):
+    error = psycopg2.OperationalError('server closed the connection unexpectedly')
+    inner.batch_error = error
+    outcomes = create_concurrently(db, ['a', 'b', 'c'])
+    assert all(outcome is error for outcome in outcomes.values())
+    assert inner.singles == []
+    assert db.get_group_commit_stats()['fallbacks'] == 0
+
+
+def test_rows_missing_from_created_get_duplicate_error(db, inner):
+    # ON CONFLICT DO NOTHING: 'b' ya existía y no vuelve en created
+    inner.skip = {'b'}
+    outcomes = create_concurrently(db, ['a', 'b', 'c'])
+    assert outcomes['a'].book_id == 'a' and outcomes['c'].book_id == 'c'
+    assert isinstance(outcomes['b'], psycopg2.IntegrityError)
+    assert '(book_id)=(b)' in str(outcomes['b'])
+
+
+def test_duplicate_within_batch_first_wins(db, inner):
+    outcomes = []
+
+    def create():
+        try:
+            outcomes.append(db.create_book(make_book('a')))
+        except Exception as e:
+            outcomes.append(e)
+    threads = [threading.Thread(target=create) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert sum(isinstance(outcome, Book) for outcome in outcomes) == 1
+    assert sum(isinstance(outcome, psycopg2.IntegrityError) for outcome in outcomes) == 2
@@ -0,0 +1,175 @@
+"""ConnectionPool con conexiones falsas: tamaño, caducidad por inactividad y por edad, y espera."""
+import threading
+import psycopg2
+import psycopg2.extensions
+import pytest
+from db import pool as pool_module
+from db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.healthy = True
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if not conn.healthy:
+                    raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        return Cursor()
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def connect(**config):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+    monkeypatch.setattr(pool_module.psycopg2, 'connect', connect)
+    return created
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(pool_module, 'time', clock)
+    return clock
+
+
+def make_pool(**options) -> ConnectionPool:
+    options.setdefault('checkout_timeout', 0.05)
+    return ConnectionPool({}, **options)
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        make_pool(minconn=3, maxconn=2)
+
+
+def test_reuses_idle_connection_and_prefills(connections):
+    pool = make_pool(minconn=2, maxconn=4)
+    pool.prefill()
+    assert len(connections) == 2
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert len(connections) == 2
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_checkout_timeout_when_exhausted(connections):
+    pool = make_pool(maxconn=1)
+    held = pool.getconn()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    assert pool.stats()['timeouts'] == 1
+    # Un PoolTimeoutError también es un OperationalError (503 en la API)
+    assert issubclass(PoolTimeoutError, psycopg2.OperationalError)
+    pool.putconn(held)
+    assert pool.getconn() is held
+
+
+def test_waiter_gets_returned_connection(connections):
+    pool = make_pool(maxconn=1, checkout_timeout=5)
+    held = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    pool.putconn(held)
+    waiter.join(5)
+    assert got == [held]
+
+
+def test_idle_connections_above_minconn_are_closed(connections, clock):
+    pool = make_pool(minconn=1, maxconn=3, idle_timeout=60, health_check_after=1e9)
+    a, b = pool.getconn(), pool.getconn()
+    pool.putconn(a)
+    clock.now += 61
+    # Al devolver b, a lleva 61 s ociosa y sobra por encima de minconn
+    pool.putconn(b)
+    assert a.closed and not b.closed
+    assert pool.stats()['size'] == 1
+    clock.now += 61
+    pool.putconn(pool.getconn())
+    # minconn se conserva aunque también esté ociosa
+    assert pool.stats()['size'] == 1 and not b.closed
+
+
+def test_connections_past_max_lifetime_are_recycled(connections, clock):
+    pool = make_pool(maxconn=2, max_lifetime=100, health_check_after=1e9)
+    old = pool.getconn()
+    pool.putconn(old)
+    clock.now += 101
+    fresh = pool.getconn()
+    assert fresh is not old and old.closed
+    assert pool.stats()['recycled'] == 1
+
+
+def test_health_check_discards_dead_idle_connection(connections, clock):
+    pool = make_pool(maxconn=2, health_check_after=5)
+    dead = pool.getconn()
+    pool.putconn(dead)
+    dead.healthy = False
+    clock.now += 6
+    conn = pool.getconn()
+    assert conn is not dead and dead.closed
+    assert pool.stats()['health_check_failures'] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return(connections):
+    pool = make_pool(maxconn=1)
+    conn = pool.getconn()
+    conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1 and not conn.closed
+
+
+def test_error_inside_block_returns_connection(connections):
+    pool = make_pool(maxconn=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError('boom')
+    assert pool.stats()['in_use'] == 0
+
+
+def test_closeall(connections):
+    pool = make_pool(maxconn=2)
+    pool.putconn(pool.getconn())
+    pool.closeall()
+    assert all(conn.closed for conn in connections)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
@@ -0,0 +1,199 @@
+"""ReplicaRoutingDatabase con backends falsos: reparto, retraso, fijado tras escribir y caídas."""
+import psycopg2
+import pytest
+from db import routing_db
+from db.pool import PoolTimeoutError
+from db.routing_db import ReplicaRoutingDatabase
+
+
+class FakeDatabase:
+    """Responde con su propio nombre; ``error`` hace fallar la siguiente lectura."""
+
+    def __init__(self, name, lag=0.0):
+        self.name = name
+        self.lag = lag
+        self.error = None
+        self.writes = 0
+        self.closed = False
+
+    def replication_lag(self):
+        return self.lag
+
+    def get_book(self, book_id):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return self.name
+
+    def get_collection_version(self):
+        return self.get_book(None)
+
+    def create_book(self, book):
+        self.writes += 1
+        return book
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(routing_db, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def session(monkeypatch):
+    # Sin hilo de comprobación: cada prueba llama a _check() cuando la necesita
+    monkeypatch.setattr(ReplicaRoutingDatabase, '_ensure_checker', lambda self: None)
+    return {'key': 'cliente-a'}
+
+
+@pytest.fixture
+def primary():
+    return FakeDatabase('primary')
+
+
+@pytest.fixture
+def replicas():
+    return {name: FakeDatabase(name) for name in ('replica-1', 'replica-2')}
+
+
+def make_router(primary, replicas, session, **options) -> ReplicaRoutingDatabase:
+    router = ReplicaRoutingDatabase(primary, {name: (lambda db=db: db) for name, db in replicas.items()},
+                                    session_key=lambda: session['key'], **options)
+    for replica in router.replicas:
+        router._check(replica)
+    return router
+
+
+def test_reads_alternate_between_replicas(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    assert {router.get_book('x') for _ in range(4)} == {'replica-1', 'replica-2'}
+    stats = router.get_routing_stats()
+    assert stats['primary']['queries'] == 0
+    assert [replica['queries'] for replica in stats['replicas']] == [2, 2]
+
+
+def test_writes_go_to_primary(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    router.create_book('libro')
+    assert primary.writes == 1
+    assert all(replica.writes == 0 for replica in replicas.values())
+
+
+def test_lagging_replica_gets_no_reads(primary, replicas, session, clock):
+    replicas['replica-1'].lag = 30
+    router = make_router(primary, replicas, session, max_lag=5)
+    assert {router.get_book('x') for _ in range(4)} == {'replica-2'}
+    replicas['replica-2'].lag = 30
+    router._check(router.replicas[1])
+    assert router.get_book('x') == 'primary'
+    assert [replica['status'] for replica in router.get_routing_stats()['replicas']] == ['lagging', 'lagging']
+
+
+def test_reads_pinned_to_primary_after_own_write(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session, pin_window=2)
+    router.create_book('libro')
+    assert router.get_book('x') == 'primary'
+
+    # Otro cliente no queda fijado
+    session['key'] = 'cliente-b'
+    assert router.get_book('x') != 'primary'
+
+    session['key'] = 'cliente-a'
+    clock.now += 2.5
+    assert router.get_book('x') != 'primary'
+    assert router.get_routing_stats()['pinned_reads'] == 1
+
+
+def test_failed_write_still_pins(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+
+    def fail(book):
+        raise psycopg2.OperationalError('conexión perdida tras el COMMIT')
+    primary.create_book = fail
+    with pytest.raises(psycopg2.OperationalError):
+        router.create_book('libro')
+    assert router.get_book('x') == 'primary'
+
+
+def test_replica_error_fails_over_and_marks_down(primary, replicas, session, clock):
+    router = make_router(primary, replicas, {'key': None})
+    router.replicas[1].status = 'down'
+    replicas['replica-1'].error = psycopg2.OperationalError('could not connect')
+    assert router.get_book('x') == 'primary'
+    stats = router.get_routing_stats()
+    assert stats['failovers'] == 1
+    assert stats['replicas'][0]['status'] == 'down'
+    assert router.get_book('x') == 'primary'
+
+    # La siguiente comprobación correcta la devuelve al reparto
+    router._check(router.replicas[0])
+    assert router.get_book('x') == 'replica-1'
+
+
+def test_pool_timeout_falls_back_without_marking_down(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    router.replicas[1].status = 'down'
+    replicas['replica-1'].error = PoolTimeoutError('pool agotado')
+    assert router.get_book('x') == 'primary'
+    stats = router.get_routing_stats()
+    assert (stats['pool_timeouts'], stats['failovers']) == (1, 0)
+    assert stats['replicas'][0]['status'] == 'up'
+    assert router.get_book('x') == 'replica-1'
+
+
+def test_other_errors_are_not_retried(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    replicas['replica-1'].error = replicas['replica-2'].error = ValueError('fallo de la aplicación')
+    with pytest.raises(ValueError):
+        router.get_book('x')
+    assert router.get_routing_stats()['primary']['queries'] == 0
+
+
+def test_consistent_reads_use_one_target(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    with router.consistent_reads():
+        first = router.get_collection_version()
+        assert {router.get_book('x') for _ in range(3)} == {first}
+        with router.consistent_reads():
+            assert router.get_book('x') == first
+    # Fuera del bloque se vuelve a repartir
+    assert {router.get_book('x') for _ in range(2)} == {'replica-1', 'replica-2'}
+
+
+def test_consistent_reads_stay_on_primary_after_failover(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    router.replicas[1].status = 'down'
+    with router.consistent_reads():
+        replicas['replica-1'].error = psycopg2.InterfaceError('connection already closed')
+        assert router.get_collection_version() == 'primary'
+        # La réplica vuelve, pero el resto del bloque sigue en el primario
+        router._check(router.replicas[0])
+        assert router.get_book('x') == 'primary'
+
+
+def test_replica_down_at_startup_does_not_block_primary(primary, session, clock):
+    def connect():
+        raise psycopg2.OperationalError('could not connect')
+    router = ReplicaRoutingDatabase(primary, {'replica-1': connect})
+    router._check(router.replicas[0])
+    assert router.get_book('x') == 'primary'
+    assert router.get_routing_stats()['replicas'][0]['status'] == 'down'
+
+
+def test_close_closes_replicas(primary, replicas, session, clock):
+    router = make_router(primary, replicas, session)
+    router.close()
+    assert primary.closed and all(replica.closed for replica in replicas.values())
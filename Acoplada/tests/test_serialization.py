@@ -0,0 +1,24 @@
+"""Codificación de las respuestas (serialization): misma salida con orjson y con json."""
+import json
+from datetime import datetime
+import pytest
+from models.book import Book, BookPage
+from serialization import load_encoder
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def dumps(request):
+    return load_encoder(request.param)
+
+
+def test_book_matches_model_dump(dumps):
+    book = Book(title='Dune', author='Frank Herbert', year=1965, tags=['clásico'])
+    assert json.loads(dumps(book)) == book.model_dump(mode='json')
+
+
+def test_excluded_fields_are_omitted(dumps):
+    book = Book(title='Dune', author='Frank Herbert')
+    page = BookPage(items=[book], next_cursor='abc', version=(datetime(2024, 1, 1), 1))
+    encoded = json.loads(dumps(page))
+    assert 'version' not in encoded
+    assert encoded == page.model_dump(mode='json')
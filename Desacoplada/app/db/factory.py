@@ -1,7 +1,10 @@
+import functools
 import os
 from typing import Dict, Type
 from .db import Database
 from .postgres_db import PostgresDatabase
+from .instrumented_db import InstrumentedDatabase, Observer
+from .routing_db import ReplicaRoutingDatabase, RouteObserver
 
 class DatabaseFactory:
     
@@ -9,8 +12,12 @@ class DatabaseFactory:
         'postgres': PostgresDatabase,
     }
     
+    # Backends que admiten réplicas de lectura (DB_REPLICA_HOSTS)
+    _replicated = ('postgres',)
+
     @classmethod
-    def create(cls, db_type: str = None) -> Database:
+    def create(cls, db_type: str = None, observer: Observer = None, on_route: RouteObserver = None,
+               **options) -> Database:
         if db_type is None:
             db_type = os.getenv('DB_TYPE', 'postgres')
         
@@ -24,7 +31,22 @@ class DatabaseFactory:
                 f"DB_TYPE '{db_type}' no válido. "
                 f"Opciones disponibles: {available}"
             )
-        return database_class()
+        database = database_class(**options)
+
+        replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+        if replica_hosts:
+            if db_type not in cls._replicated:
+                raise ValueError(f"DB_REPLICA_HOSTS no está soportado con DB_TYPE '{db_type}'")
+            # Un contenedor atiende una invocación cada vez: la ventana de leer lo
+            # escrito se aplica a todo el contenedor
+            database = ReplicaRoutingDatabase(
+                database,
+                {host: functools.partial(database_class, host=host, replica=True) for host in replica_hosts},
+                on_route=on_route
+            )
+        if observer is not None:
+            database = InstrumentedDatabase(database, observer)
+        return database
     
     @classmethod
     def get_available_databases(cls) -> list:
@@ -0,0 +1,65 @@
+import time
+from typing import Callable, Optional
+from .db import Database
+from .wrapper import DatabaseWrapper
+from app.models.book import Book, BookPage, BatchResult
+
+# observer(operation, seconds, rows, error): rows es None si la operación no devuelve filas
+Observer = Callable[[str, float, Optional[int], bool], None]
+
+OPERATIONS = (
+    'create_book', 'get_book', 'get_all_books', 'get_books_page', 'query_books', 'search_books',
+    'get_stats', 'get_tag_counts', 'get_book_version', 'get_collection_version', 'update_book',
+    'patch_book', 'delete_book', 'apply_batch',
+)
+
+
+def _row_count(result) -> Optional[int]:
+    if result is None:
+        return 0
+    if isinstance(result, Book):
+        return 1
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, BookPage):
+        return len(result.items)
+    if isinstance(result, BatchResult):
+        return len(result.created) + len(result.updated) + len(result.deleted)
+    return None
+
+
+class InstrumentedDatabase(DatabaseWrapper):
+    """Mide la duración, las filas y los errores de cada operación del backend envuelto.
+
+    Las mediciones se entregan a ``observer``, que decide dónde acaban
+    (métricas de Prometheus en Flask, línea de log en las Lambdas).
+    """
+
+    def __init__(self, inner: Database, observer: Observer):
+        super().__init__(inner)
+        self.observer = observer
+
+    def _call(self, operation: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = getattr(self.inner, operation)(*args, **kwargs)
+        except Exception:
+            self.observer(operation, time.perf_counter() - started, None, True)
+            raise
+        self.observer(operation, time.perf_counter() - started, _row_count(result), False)
+        return result
+
+
+def _instrumented(operation: str):
+    def method(self, *args, **kwargs):
+        return self._call(operation, *args, **kwargs)
+    method.__name__ = operation
+    return method
+
+
+for _operation in OPERATIONS:
+    setattr(InstrumentedDatabase, _operation, _instrumented(_operation))
@@ -0,0 +1,179 @@
+"""Migraciones versionadas del esquema de PostgreSQL.
+
+Cada fichero ``migrations/NNNN_descripcion.sql`` es una migración; se aplican
+en orden de versión, cada una en su propia transacción, y quedan registradas
+en la tabla ``schema_migrations``. Un advisory lock impide que dos procesos
+migren a la vez.
+
+Al arrancar, el backend solo compara la versión registrada con la última
+disponible (una consulta) y, si falta alguna, falla con SchemaVersionError
+(DB_AUTO_MIGRATE=true le deja migrar, para desarrollo). Las migraciones se
+aplican una vez, como paso del despliegue (ver el recurso SchemaMigrations de lambdas.yml)::
+
+    python -m app.db.migrate            # aplica las pendientes
+    python -m app.db.migrate status     # muestra la versión actual y las pendientes
+"""
+import argparse
+import os
+import re
+import sys
+from typing import List, NamedTuple, Optional
+import psycopg2
+import psycopg2.errors
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Si el esquema está desactualizado al arrancar: fallar (false, por defecto) o
+# migrar (true). Solo para desarrollo: en producción migra el despliegue
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'false').lower() in ('1', 'true', 'yes')
+
+# Clave del advisory lock que serializa las migraciones entre procesos
+MIGRATION_LOCK_KEY = 727274
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    def read(self) -> str:
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise SchemaVersionError(f"Hay versiones de migración repetidas en {directory}")
+    return migrations
+
+
+def latest_version(directory: str = MIGRATIONS_DIR) -> int:
+    migrations = load_migrations(directory)
+    return migrations[-1].version if migrations else 0
+
+
+def current_version(conn) -> int:
+    """Versión aplicada en la base de datos (0 si nunca se ha migrado)."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT coalesce(max(version), 0) FROM schema_migrations")
+            version = cursor.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        version = 0
+    if not conn.autocommit:
+        conn.rollback()
+    return version
+
+
+def check_version(conn, auto_migrate: bool = DB_AUTO_MIGRATE) -> int:
+    """Comprobación de arranque: compara versiones y solo migra si se permite."""
+    latest = latest_version()
+    version = current_version(conn)
+    if version >= latest:
+        return version
+    if not auto_migrate:
+        raise outdated_schema(version, latest)
+    migrate(conn)
+    return latest
+
+
+def outdated_schema(version: int, latest: int) -> SchemaVersionError:
+    return SchemaVersionError(
+        f"El esquema está en la versión {version} y la aplicación necesita la {latest}; "
+        f"ejecuta las migraciones (python -m app.db.migrate) o activa DB_AUTO_MIGRATE"
+    )
+
+
+def migrate(conn, target: Optional[int] = None, log=None) -> List[Migration]:
+    """Aplica las migraciones pendientes hasta ``target`` (o la última) y devuelve las aplicadas."""
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    applied = []
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version     INTEGER PRIMARY KEY,
+                        name        VARCHAR(255) NOT NULL,
+                        applied_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                # Se relee tras obtener el lock: otro proceso puede haber migrado mientras tanto
+                cursor.execute("SELECT version FROM schema_migrations")
+                done = {row[0] for row in cursor.fetchall()}
+
+                conn.autocommit = False
+                for migration in load_migrations():
+                    if migration.version in done or (target is not None and migration.version > target):
+                        continue
+                    if log:
+                        log(f"Aplicando {migration.version:04d}_{migration.name}")
+                    try:
+                        cursor.execute(migration.read())
+                        cursor.execute(
+                            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                            (migration.version, migration.name)
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    applied.append(migration)
+            finally:
+                conn.autocommit = True
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+    finally:
+        conn.autocommit = autocommit
+    return applied
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASS'),
+        database=os.getenv('DB_NAME'),
+        connect_timeout=10
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m app.db.migrate', description='Migraciones del esquema')
+    parser.add_argument('command', nargs='?', choices=('up', 'status'), default='up')
+    parser.add_argument('--target', type=int, help='Versión hasta la que migrar (por defecto, la última)')
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        version = current_version(conn)
+        pending = [m for m in load_migrations() if m.version > version]
+        if args.command == 'status':
+            print(f"Versión actual: {version}")
+            for migration in pending:
+                print(f"Pendiente: {migration.version:04d}_{migration.name}")
+            return 1 if pending else 0
+
+        applied = migrate(conn, args.target, log=lambda message: print(message, file=sys.stderr))
+        print(f"{len(applied)} migraciones aplicadas; versión actual: {current_version(conn)}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
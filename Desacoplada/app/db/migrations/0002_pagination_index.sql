@@ -0,0 +1,4 @@
+-- Índice para la paginación por cursor (created_at DESC, book_id DESC)
+
+CREATE INDEX IF NOT EXISTS idx_books_created_at_book_id
+    ON books (created_at DESC, book_id DESC);
@@ -0,0 +1,4 @@
+-- Versión de la colección para los ETag de GET /books: max(updated_at) sale del índice
+
+CREATE INDEX IF NOT EXISTS idx_books_updated_at
+    ON books (updated_at);
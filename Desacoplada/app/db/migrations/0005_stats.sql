@@ -0,0 +1,120 @@
+-- Estadísticas del catálogo mantenidas por triggers: book_stats guarda los totales
+-- en una sola fila y las tablas *_counts cuántos libros tiene cada autor, género y año,
+-- de modo que /books/stats no necesita recorrer books.
+
+CREATE TABLE IF NOT EXISTS book_stats (
+    id             BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    total_books    BIGINT NOT NULL DEFAULT 0,
+    total_authors  BIGINT NOT NULL DEFAULT 0,
+    total_genres   BIGINT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS book_author_counts (
+    author  VARCHAR(255) PRIMARY KEY,
+    books   BIGINT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS book_genre_counts (
+    genre   VARCHAR(100) PRIMARY KEY,
+    books   BIGINT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS book_year_counts (
+    year    INTEGER PRIMARY KEY,
+    books   BIGINT NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION books_stats_apply(p_author TEXT, p_genre TEXT, p_year INTEGER, p_delta INTEGER)
+RETURNS void AS $$
+DECLARE
+    remaining BIGINT;
+BEGIN
+    IF coalesce(p_author, '') <> '' THEN
+        INSERT INTO book_author_counts AS c (author, books) VALUES (p_author, p_delta)
+        ON CONFLICT (author) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF p_delta > 0 AND remaining = p_delta THEN
+            UPDATE book_stats SET total_authors = total_authors + 1;
+        ELSIF remaining <= 0 THEN
+            DELETE FROM book_author_counts WHERE author = p_author;
+            UPDATE book_stats SET total_authors = total_authors - 1;
+        END IF;
+    END IF;
+
+    IF coalesce(p_genre, '') <> '' THEN
+        INSERT INTO book_genre_counts AS c (genre, books) VALUES (p_genre, p_delta)
+        ON CONFLICT (genre) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF p_delta > 0 AND remaining = p_delta THEN
+            UPDATE book_stats SET total_genres = total_genres + 1;
+        ELSIF remaining <= 0 THEN
+            DELETE FROM book_genre_counts WHERE genre = p_genre;
+            UPDATE book_stats SET total_genres = total_genres - 1;
+        END IF;
+    END IF;
+
+    IF p_year IS NOT NULL THEN
+        INSERT INTO book_year_counts AS c (year, books) VALUES (p_year, p_delta)
+        ON CONFLICT (year) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF remaining <= 0 THEN
+            DELETE FROM book_year_counts WHERE year = p_year;
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE book_stats SET total_books = total_books + 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE book_stats SET total_books = total_books - 1;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM books_stats_apply(OLD.author, OLD.genre, OLD.year, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM books_stats_apply(NEW.author, NEW.genre, NEW.year, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_stats_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE book_author_counts, book_genre_counts, book_year_counts;
+    UPDATE book_stats SET total_books = 0, total_authors = 0, total_genres = 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER books_stats_insert_delete
+    AFTER INSERT OR DELETE ON books
+    FOR EACH ROW EXECUTE FUNCTION books_stats_trigger();
+CREATE OR REPLACE TRIGGER books_stats_update
+    AFTER UPDATE OF author, genre, year ON books
+    FOR EACH ROW
+    WHEN (OLD.author IS DISTINCT FROM NEW.author
+          OR OLD.genre IS DISTINCT FROM NEW.genre
+          OR OLD.year IS DISTINCT FROM NEW.year)
+    EXECUTE FUNCTION books_stats_trigger();
+CREATE OR REPLACE TRIGGER books_stats_truncate
+    AFTER TRUNCATE ON books
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_truncate();
+
+-- Carga inicial de los contadores a partir de los libros ya existentes
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM book_stats) THEN
+        LOCK TABLE books IN SHARE MODE;
+        INSERT INTO book_author_counts (author, books)
+            SELECT author, count(*) FROM books WHERE author <> '' GROUP BY author;
+        INSERT INTO book_genre_counts (genre, books)
+            SELECT genre, count(*) FROM books WHERE genre <> '' GROUP BY genre;
+        INSERT INTO book_year_counts (year, books)
+            SELECT year, count(*) FROM books WHERE year IS NOT NULL GROUP BY year;
+        INSERT INTO book_stats (total_books, total_authors, total_genres)
+            SELECT (SELECT count(*) FROM books),
+                   (SELECT count(*) FROM book_author_counts),
+                   (SELECT count(*) FROM book_genre_counts);
+    END IF;
+END;
+$$;
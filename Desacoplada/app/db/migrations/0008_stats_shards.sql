@@ -0,0 +1,99 @@
+-- Totales de book_stats repartidos en filas: con una sola fila, cada alta o baja
+-- la bloqueaba hasta su commit y todas las escrituras concurrentes se ponían en cola
+-- detrás. Ahora hay 16 filas en book_stats_shards, cada conexión suma en la suya
+-- (según su pid) y book_stats pasa a ser una vista que las suma, así que las
+-- lecturas (get_stats, versión de la colección) no cambian.
+
+-- Ninguna escritura puede mover los totales mientras se copian a los shards
+LOCK TABLE book_stats IN EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS book_stats_shards (
+    shard          SMALLINT PRIMARY KEY,
+    total_books    BIGINT NOT NULL DEFAULT 0,
+    total_authors  BIGINT NOT NULL DEFAULT 0,
+    total_genres   BIGINT NOT NULL DEFAULT 0
+);
+-- Mismo número de filas que el módulo de books_stats_shard()
+INSERT INTO book_stats_shards (shard) SELECT generate_series(0, 15) ON CONFLICT (shard) DO NOTHING;
+UPDATE book_stats_shards
+SET total_books = s.total_books, total_authors = s.total_authors, total_genres = s.total_genres
+FROM book_stats s
+WHERE shard = 0;
+
+-- Fila de book_stats_shards de la conexión actual: conexiones distintas escriben en
+-- filas distintas y una misma transacción siempre en la misma
+CREATE OR REPLACE FUNCTION books_stats_shard() RETURNS SMALLINT AS $$
+    SELECT (pg_backend_pid() % 16)::smallint;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION books_stats_apply(p_author TEXT, p_genre TEXT, p_year INTEGER, p_delta INTEGER)
+RETURNS void AS $$
+DECLARE
+    remaining BIGINT;
+BEGIN
+    IF coalesce(p_author, '') <> '' THEN
+        INSERT INTO book_author_counts AS c (author, books) VALUES (p_author, p_delta)
+        ON CONFLICT (author) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF p_delta > 0 AND remaining = p_delta THEN
+            UPDATE book_stats_shards SET total_authors = total_authors + 1 WHERE shard = books_stats_shard();
+        ELSIF remaining <= 0 THEN
+            DELETE FROM book_author_counts WHERE author = p_author;
+            UPDATE book_stats_shards SET total_authors = total_authors - 1 WHERE shard = books_stats_shard();
+        END IF;
+    END IF;
+
+    IF coalesce(p_genre, '') <> '' THEN
+        INSERT INTO book_genre_counts AS c (genre, books) VALUES (p_genre, p_delta)
+        ON CONFLICT (genre) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF p_delta > 0 AND remaining = p_delta THEN
+            UPDATE book_stats_shards SET total_genres = total_genres + 1 WHERE shard = books_stats_shard();
+        ELSIF remaining <= 0 THEN
+            DELETE FROM book_genre_counts WHERE genre = p_genre;
+            UPDATE book_stats_shards SET total_genres = total_genres - 1 WHERE shard = books_stats_shard();
+        END IF;
+    END IF;
+
+    IF p_year IS NOT NULL THEN
+        INSERT INTO book_year_counts AS c (year, books) VALUES (p_year, p_delta)
+        ON CONFLICT (year) DO UPDATE SET books = c.books + p_delta
+        RETURNING books INTO remaining;
+        IF remaining <= 0 THEN
+            DELETE FROM book_year_counts WHERE year = p_year;
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE book_stats_shards SET total_books = total_books + 1 WHERE shard = books_stats_shard();
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE book_stats_shards SET total_books = total_books - 1 WHERE shard = books_stats_shard();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM books_stats_apply(OLD.author, OLD.genre, OLD.year, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM books_stats_apply(NEW.author, NEW.genre, NEW.year, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION books_stats_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE book_author_counts, book_genre_counts, book_year_counts;
+    UPDATE book_stats_shards SET total_books = 0, total_authors = 0, total_genres = 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TABLE book_stats;
+CREATE VIEW book_stats AS
+    SELECT sum(total_books)::bigint   AS total_books,
+           sum(total_authors)::bigint AS total_authors,
+           sum(total_genres)::bigint  AS total_genres
+    FROM book_stats_shards;
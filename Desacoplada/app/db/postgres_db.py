@@ -1,43 +1,90 @@
 import psycopg2
 import psycopg2.extras
-from typing import List, Optional
+from psycopg2.extras import execute_values
+from typing import List, Optional, Tuple
 from app.db.db import Database
-from app.models.book import Book
+from app.db.pagination import encode_cursor, decode_cursor, decode_book_cursor, InvalidCursorError
+from app.db.schema import (BOOK_COLUMNS, COLLECTION_VERSION, QUALIFIED_BOOK_COLUMNS, SEARCH_TEXT, filter_conditions,
+                           like_pattern, split_collection_version, with_collection_version)
+from app.db.migrate import DB_AUTO_MIGRATE, check_version, migrate
+from app.models.book import Book, BookUpdate, BookFilter, book_from_row, BookPage, BookStats, BatchResult, TagCount
 import os
 import json
 from datetime import datetime
 
 
+# Segundos que una réplica va por detrás del primario (0 en el primario). Si ya
+# ha aplicado todo lo recibido no hay retraso aunque el primario lleve tiempo
+# sin escribir (pg_last_xact_replay_timestamp no avanza sin transacciones)
+REPLICATION_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _patch_assignments(changes: BookUpdate) -> Tuple[str, list]:
+    """SET de un PATCH: solo las columnas enviadas, más updated_at."""
+    values = changes.model_dump(exclude_unset=True)
+    if 'tags' in values:
+        values['tags'] = json.dumps(values['tags'])
+    values['updated_at'] = datetime.utcnow()
+    return ", ".join(f"{column} = %s" for column in values), list(values.values())
+
+
 class PostgresDatabase(Database):
     
-    def __init__(self):
+    def __init__(self, host: str = None, replica: bool = False, auto_migrate: bool = DB_AUTO_MIGRATE):
+        self.host = host or os.getenv('DB_HOST')
+        self._connect()
+        # Al arrancar solo se compara la versión del esquema y, si está atrasada,
+        # falla: las migraciones las aplica el despliegue (SchemaMigrations en
+        # lambdas.yml, o aquí con auto_migrate). Una réplica es de solo lectura: nunca migra
+        try:
+            check_version(self.connection, auto_migrate=auto_migrate and not replica)
+        except Exception:
+            self.connection.close()
+            raise
+
+    def _connect(self):
         self.connection = psycopg2.connect(
-            host=os.getenv('DB_HOST'),
+            host=self.host,
             user=os.getenv('DB_USER'),
             password=os.getenv('DB_PASS'),
-            database=os.getenv('DB_NAME')
+            database=os.getenv('DB_NAME'),
+            connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
         )
         self.connection.autocommit = True
-        self.initialize()
-    
-    def initialize(self):
-        """Crea la tabla books si no existe."""
+
+    def ensure_connection(self, ping: bool = True) -> bool:
+        """Reabre la conexión si está cerrada o, con ping, si no responde. Devuelve True si reconecta."""
+        if not self.connection.closed:
+            if not ping:
+                return False
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                return False
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                try:
+                    self.connection.close()
+                except psycopg2.Error:
+                    pass
+        self._connect()
+        return True
+
+    def replication_lag(self) -> float:
         with self.connection.cursor() as cursor:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS books (
-                    book_id        VARCHAR(36) PRIMARY KEY,
-                    title          VARCHAR(255) NOT NULL,
-                    author         VARCHAR(255) NOT NULL,
-                    genre          VARCHAR(100),
-                    year           INTEGER CHECK (year >= 0),
-                    status         VARCHAR(20) DEFAULT 'available' CHECK (status IN ('available', 'borrowed', 'reserved', 'lost')),
-                    rating         VARCHAR(10) DEFAULT 'medium' CHECK (rating IN ('low', 'medium', 'high', 'excellent')),
-                    created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    tags           JSONB
-                );
-            """)
+            cursor.execute(REPLICATION_LAG_SQL)
+            return float(cursor.fetchone()[0])
 
+    def close(self):
+        self.connection.close()
+
+    def initialize(self):
+        """Aplica las migraciones pendientes del esquema."""
+        migrate(self.connection)
 
     def _normalize_tags(self, value):
         """Normaliza el campo tags para garantizar siempre una lista."""
@@ -48,7 +95,14 @@ class PostgresDatabase(Database):
                 return json.loads(value)
             except json.JSONDecodeError:
                 return []
-        return value  
+        return value if isinstance(value, list) else []
+
+    def _row_to_book(self, row) -> Book:
+        # Las filas vienen de la propia tabla, cuyas restricciones ya garantizan
+        # lo que validaría Pydantic: se construye el modelo sin revalidar (book_from_row)
+        row = dict(row)
+        row["tags"] = self._normalize_tags(row.get("tags"))
+        return book_from_row(row)
 
 
     def create_book(self, book: Book) -> Book:
@@ -74,53 +128,197 @@ class PostgresDatabase(Database):
 
     def get_book(self, book_id: str) -> Optional[Book]:
         with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-            sql = "SELECT * FROM books WHERE book_id = %s"
+            sql = f"SELECT {BOOK_COLUMNS} FROM books WHERE book_id = %s"
             cursor.execute(sql, (book_id,))
             result = cursor.fetchone()
 
             if result:
-                result = dict(result)
-                result["created_at"] = result["created_at"].isoformat() if result["created_at"] else None
-                result["updated_at"] = result["updated_at"].isoformat() if result["updated_at"] else None
-                result["tags"] = self._normalize_tags(result.get("tags"))
-                return Book(**result)
+                return self._row_to_book(result)
         return None
 
     def get_all_books(self) -> List[Book]:
         with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-            sql = "SELECT * FROM books ORDER BY created_at DESC"
+            sql = f"SELECT {BOOK_COLUMNS} FROM books ORDER BY created_at DESC, book_id DESC"
             cursor.execute(sql)
             results = cursor.fetchall()
+            return [self._row_to_book(row) for row in results]
+
+    def query_books(self, filters: BookFilter, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    with_version: bool = False) -> BookPage:
+        """Libros que cumplen los filtros, de más reciente a más antiguo; sin limit, todos.
+
+        Con ``with_version`` la página trae también la versión de la colección
+        (``page.version``), leída en la misma sentencia que las filas.
+        """
+        conditions, params = filter_conditions(filters)
+        if cursor:
+            params.extend(decode_book_cursor(cursor))
+            conditions.append("(created_at, book_id) < (%s, %s)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {BOOK_COLUMNS} FROM books {where} ORDER BY created_at DESC, book_id DESC"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit + 1)
+        if with_version:
+            sql = with_collection_version(sql)
+
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as db_cursor:
+            db_cursor.execute(sql, params)
+            results = db_cursor.fetchall()
+
+        version = None
+        if with_version:
+            results, version = split_collection_version(results)
+        next_cursor = None
+        if limit is not None and len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor(last["created_at"].isoformat(), last["book_id"])
+        return BookPage(items=[self._row_to_book(row) for row in results], next_cursor=next_cursor, version=version)
+
+    def search_books(self, query: str, limit: int, cursor: Optional[str] = None) -> BookPage:
+        """Búsqueda por texto completo (tsvector) y por subcadena (trigram), ordenada por relevancia."""
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError(f"Cursor no válido: {cursor}")
+
+        sql = f"""
+            SELECT {BOOK_COLUMNS},
+                   ts_rank(search_vector, q) + similarity({SEARCH_TEXT}, %(text)s) AS rank
+            FROM books, websearch_to_tsquery('simple', %(text)s) AS q
+            WHERE search_vector @@ q OR {SEARCH_TEXT} LIKE %(like)s
+            ORDER BY rank DESC, created_at DESC, book_id DESC
+            LIMIT %(limit)s OFFSET %(offset)s
+        """
+        params = {
+            'text': query.lower(),
+            'like': like_pattern(query),
+            'limit': limit + 1,
+            'offset': offset
+        }
+
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as db_cursor:
+            db_cursor.execute(sql, params)
+            results = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(offset + limit)
+        return BookPage(items=[self._row_to_book(row) for row in results], next_cursor=next_cursor)
+    
+    def get_stats(self) -> BookStats:
+        """Estadísticas del catálogo a partir de los contadores mantenidos por triggers."""
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT s.total_books, s.total_authors, s.total_genres,
+                       (SELECT min(year) FROM book_year_counts) AS oldest_year
+                FROM book_stats s
+            """)
+            result = cursor.fetchone()
+        return BookStats(**result) if result else BookStats()
+
+    def get_tag_counts(self, limit: int) -> List[TagCount]:
+        """Libros por etiqueta, de más a menos, a partir de book_tag_counts (migrations/0007_tags.sql)."""
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute("SELECT tag, books FROM book_tag_counts ORDER BY books DESC, tag LIMIT %s", (limit,))
+            return [TagCount(**row) for row in cursor.fetchall()]
+
+    def get_book_version(self, book_id: str) -> Optional[datetime]:
+        """updated_at del libro, sin cargar la fila completa."""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT updated_at FROM books WHERE book_id = %s", (book_id,))
+            result = cursor.fetchone()
+        return result[0] if result else None
 
-            books = []
-            for row in results:
-                row = dict(row)
-                row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
-                row["updated_at"] = row["updated_at"].isoformat() if row["updated_at"] else None
-                row["tags"] = self._normalize_tags(row.get("tags"))
-                books.append(Book(**row))
-            return books
+    def get_collection_version(self) -> Tuple[Optional[datetime], int]:
+        """Versión del catálogo: max(updated_at) por índice y el total desde book_stats."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(COLLECTION_VERSION)
+            max_updated_at, count = cursor.fetchone()
+        return max_updated_at, count
 
     def update_book(self, book_id: str, book: Book) -> Optional[Book]:
         book.updated_at = datetime.utcnow()
-        with self.connection.cursor() as cursor:
-            sql = """
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            sql = f"""
                 UPDATE books 
                 SET title=%s, author=%s, genre=%s, year=%s, status=%s,
                     rating=%s, updated_at=%s, tags=%s
                 WHERE book_id=%s
+                RETURNING {BOOK_COLUMNS}
             """
             cursor.execute(sql, (
                 book.title, book.author, book.genre, book.year,
                 book.status, book.rating, book.updated_at,
                 json.dumps(book.tags), book_id
             ))
-            if cursor.rowcount > 0:
-                return self.get_book(book_id)
-        return None
+            result = cursor.fetchone()
+        return self._row_to_book(result) if result else None
+
+    def patch_book(self, book_id: str, changes: BookUpdate) -> Optional[Book]:
+        """Actualiza solo los campos enviados y devuelve la fila en la misma sentencia."""
+        assignments, params = _patch_assignments(changes)
+        with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            sql = f"UPDATE books SET {assignments} WHERE book_id = %s RETURNING {BOOK_COLUMNS}"
+            cursor.execute(sql, params + [book_id])
+            result = cursor.fetchone()
+        return self._row_to_book(result) if result else None
 
     def delete_book(self, book_id: str) -> bool:
         with self.connection.cursor() as cursor:
             sql = "DELETE FROM books WHERE book_id = %s"
             cursor.execute(sql, (book_id,))
-            return cursor.rowcount > 0
\ No newline at end of file
+            return cursor.rowcount > 0
+
+    def apply_batch(self, creates: List[Book], updates: List[Tuple[str, Book]], deletes: List[str]) -> BatchResult:
+        """Aplica el lote con una sentencia multi-fila por tipo de operación y un único commit."""
+        result = BatchResult()
+        # La conexión trabaja en autocommit: el lote se ejecuta en una transacción explícita
+        self.connection.autocommit = False
+        try:
+            with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                self._apply_batch(cursor, creates, updates, deletes, result)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            self.connection.autocommit = True
+        return result
+
+    def _apply_batch(self, cursor, creates, updates, deletes, result: BatchResult):
+        if creates:
+            rows = execute_values(cursor, f"""
+                INSERT INTO books ({BOOK_COLUMNS})
+                VALUES %s
+                ON CONFLICT (book_id) DO NOTHING
+                RETURNING book_id
+            """, [
+                (b.book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                 b.created_at, b.updated_at, json.dumps(b.tags) if b.tags else None)
+                for b in creates
+            ], page_size=len(creates), fetch=True)
+            result.created = [row['book_id'] for row in rows]
+
+        if updates:
+            rows = execute_values(cursor, f"""
+                UPDATE books AS b
+                SET title = v.title, author = v.author, genre = v.genre, year = v.year,
+                    status = v.status, rating = v.rating, updated_at = v.updated_at, tags = v.tags
+                FROM (VALUES %s) AS v (book_id, title, author, genre, year, status, rating, updated_at, tags)
+                WHERE b.book_id = v.book_id
+                RETURNING {QUALIFIED_BOOK_COLUMNS}
+            """, [
+                (book_id, b.title, b.author, b.genre, b.year, b.status, b.rating,
+                 b.updated_at, json.dumps(b.tags) if b.tags else None)
+                for book_id, b in updates
+            ], template="(%s, %s, %s, %s, %s::integer, %s, %s, %s::timestamp, %s::jsonb)",
+               page_size=len(updates), fetch=True)
+            result.updated = [self._row_to_book(row) for row in rows]
+
+        if deletes:
+            cursor.execute("DELETE FROM books WHERE book_id = ANY(%s) RETURNING book_id", (deletes,))
+            result.deleted = [row['book_id'] for row in cursor.fetchall()]
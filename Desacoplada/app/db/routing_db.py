@@ -0,0 +1,263 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+import psycopg2
+from .db import Database
+from .wrapper import DatabaseWrapper
+
+# Lecturas que pueden servir las réplicas; el resto de operaciones va siempre al primario
+READ_OPERATIONS = (
+    'get_book', 'get_all_books', 'get_books_page', 'query_books', 'search_books', 'get_stats',
+    'get_tag_counts', 'get_book_version', 'get_collection_version',
+)
+
+WRITE_OPERATIONS = (
+    'create_book', 'update_book', 'patch_book', 'delete_book', 'apply_batch', 'import_books',
+)
+
+# Retraso máximo (s) con el que una réplica sigue recibiendo lecturas
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+# Tras escribir, las lecturas del mismo cliente van al primario durante este tiempo (s)
+DB_READ_YOUR_WRITES_WINDOW = float(os.getenv('DB_READ_YOUR_WRITES_WINDOW', '2'))
+# Cada cuánto (s) se vuelve a medir el retraso de una réplica o se reintenta una caída
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
+
+# Errores tras los que se da una réplica por caída y la lectura se repite en el primario
+FAILOVER_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+PRIMARY = 'primary'
+
+# Destino aún sin elegir dentro de un bloque consistent_reads()
+_UNCHOSEN = object()
+
+# on_route(target): se llama con 'primary' o el nombre de la réplica que atiende cada operación
+RouteObserver = Callable[[str], None]
+
+
+class _Replica:
+
+    def __init__(self, name: str, connect: Callable[[], Database]):
+        self.name = name
+        self.connect = connect
+        self.database: Optional[Database] = None
+        self.status = 'unknown'
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at = float('-inf')
+        self.failures = 0
+        self.lock = threading.Lock()
+
+
+class ReplicaRoutingDatabase(DatabaseWrapper):
+    """Envía las lecturas a réplicas de PostgreSQL y las escrituras al primario.
+
+    Las réplicas se reparten por turnos entre las que están disponibles. Cada
+    DB_REPLICA_CHECK_INTERVAL se mide su retraso; si supera ``max_lag`` o la
+    réplica no responde, sus lecturas van al primario hasta la siguiente
+    comprobación correcta. Se conectan de forma diferida (``replicas`` son
+    funciones que crean el backend), así que una réplica caída al arrancar no
+    impide servir desde el primario. Las comprobaciones se hacen en la propia
+    invocación: Lambda congela el proceso entre invocaciones, así que un hilo
+    en segundo plano no llegaría a ejecutarlas.
+
+    Dentro de ``consistent_reads()`` todas las lecturas van al mismo destino,
+    para que la versión de la colección y la página que se sirven juntas
+    salgan de la misma réplica.
+
+    Después de una escritura, las lecturas del mismo cliente (``session_key``)
+    se hacen en el primario durante ``pin_window`` segundos para que vea su
+    propio cambio. Sin ``session_key`` la ventana se aplica a todo el proceso,
+    que es lo necesario si hay una caché compartida por encima.
+    """
+
+    def __init__(self, primary: Database, replicas: Dict[str, Callable[[], Database]],
+                 max_lag: float = DB_REPLICA_MAX_LAG, pin_window: float = DB_READ_YOUR_WRITES_WINDOW,
+                 check_interval: float = DB_REPLICA_CHECK_INTERVAL,
+                 session_key: Callable[[], Optional[str]] = None, on_route: RouteObserver = None):
+        super().__init__(primary)
+        self.replicas = [_Replica(name, connect) for name, connect in replicas.items()]
+        self.max_lag = max_lag
+        self.pin_window = pin_window
+        self.check_interval = check_interval
+        self.session_key = session_key
+        self.on_route = on_route
+        # Consultas por destino ('primary' y cada réplica), lecturas fijadas al primario y reintentos
+        self._stats = {PRIMARY: 0, **{replica.name: 0 for replica in self.replicas}, 'pinned_reads': 0,
+                       'failovers': 0}
+        self._last_write: Dict[Optional[str], float] = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._scope = threading.local()
+
+    def _session(self) -> Optional[str]:
+        return self.session_key() if self.session_key is not None else None
+
+    def _pinned(self) -> bool:
+        last_write = self._last_write.get(self._session())
+        return last_write is not None and time.monotonic() - last_write < self.pin_window
+
+    def _record_write(self):
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[self._session()] = now
+            if len(self._last_write) > 10000:
+                # Se olvidan los clientes cuya ventana ya ha pasado
+                self._last_write = {key: at for key, at in self._last_write.items() if now - at < self.pin_window}
+
+    def _check(self, replica: _Replica):
+        # Si otro hilo ya la está comprobando, se usa el último estado conocido
+        if not replica.lock.acquire(blocking=False):
+            return
+        try:
+            if replica.database is None:
+                replica.database = replica.connect()
+            elif replica.status == 'down':
+                # Cada backend tiene una sola conexión: tras un fallo hay que reabrirla
+                replica.database.ensure_connection()
+            lag = replica.database.replication_lag()
+        except Exception as e:
+            self._mark_down(replica, e)
+        else:
+            if replica.status != 'up' and lag <= self.max_lag:
+                print(f"Réplica {replica.name} disponible (retraso {lag:.2f} s)", file=sys.stderr)
+            elif replica.status == 'up' and lag > self.max_lag:
+                print(f"Réplica {replica.name} retrasada {lag:.2f} s; lecturas al primario", file=sys.stderr)
+            replica.lag = lag
+            replica.error = None
+            replica.status = 'up' if lag <= self.max_lag else 'lagging'
+        finally:
+            replica.checked_at = time.monotonic()
+            replica.lock.release()
+
+    def _mark_down(self, replica: _Replica, error: Exception):
+        if replica.status != 'down':
+            print(f"Réplica {replica.name} no disponible: {error}", file=sys.stderr)
+        replica.status = 'down'
+        replica.error = str(error)
+        replica.failures += 1
+        replica.checked_at = time.monotonic()
+
+    def _choose(self) -> Optional[_Replica]:
+        """Réplica que atiende la siguiente lectura, o None si debe ir al primario."""
+        if not self.replicas:
+            return None
+        if self._pinned():
+            self._count('pinned_reads')
+            return None
+        now = time.monotonic()
+        available = []
+        for replica in self.replicas:
+            if now - replica.checked_at >= self.check_interval:
+                self._check(replica)
+            if replica.status == 'up':
+                available.append(replica)
+        if not available:
+            return None
+        return available[next(self._turn) % len(available)]
+
+    def _target(self) -> Optional[_Replica]:
+        """Como _choose(), pero respetando el destino fijado por consistent_reads()."""
+        scoped = getattr(self._scope, 'target', None)
+        if scoped is None:
+            return self._choose()
+        if scoped is _UNCHOSEN:
+            replica = self._choose()
+            self._scope.target = replica if replica is not None else PRIMARY
+            return replica
+        return scoped if scoped is not PRIMARY else None
+
+    @contextmanager
+    def consistent_reads(self):
+        """Envía todas las lecturas del bloque a una misma réplica o al primario.
+
+        El destino se elige en la primera lectura; si esa réplica falla, el
+        resto del bloque sigue en el primario. Los bloques anidados usan el
+        destino del exterior.
+        """
+        if getattr(self._scope, 'target', None) is not None:
+            yield
+            return
+        self._scope.target = _UNCHOSEN
+        try:
+            yield
+        finally:
+            self._scope.target = None
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _route(self, target: str):
+        self._count(target)
+        if self.on_route is not None:
+            self.on_route(target)
+
+    def _read(self, operation: str, *args, **kwargs):
+        replica = self._target()
+        if replica is not None:
+            try:
+                result = getattr(replica.database, operation)(*args, **kwargs)
+            except FAILOVER_ERRORS as e:
+                self._mark_down(replica, e)
+                self._count('failovers')
+                if getattr(self._scope, 'target', None) is not None:
+                    self._scope.target = PRIMARY
+            else:
+                self._route(replica.name)
+                return result
+        self._route(PRIMARY)
+        return getattr(self.inner, operation)(*args, **kwargs)
+
+    def _write(self, operation: str, *args, **kwargs):
+        self._route(PRIMARY)
+        try:
+            return getattr(self.inner, operation)(*args, **kwargs)
+        finally:
+            # También si falla: la escritura pudo confirmarse antes del error
+            self._record_write()
+
+    def get_routing_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'primary': {'queries': stats[PRIMARY]},
+            'replicas': [{
+                'name': replica.name,
+                'status': replica.status,
+                'lag_s': round(replica.lag, 3) if replica.lag is not None else None,
+                'queries': stats[replica.name],
+                'failures': replica.failures,
+                'error': replica.error,
+                'checked_s_ago': round(now - replica.checked_at, 3) if replica.checked_at > 0 else None,
+            } for replica in self.replicas],
+            'pinned_reads': stats['pinned_reads'],
+            'failovers': stats['failovers'],
+            'max_lag_s': self.max_lag,
+            'pin_window_s': self.pin_window,
+        }
+
+    def close(self):
+        self.inner.close()
+        for replica in self.replicas:
+            if replica.database is not None:
+                replica.database.close()
+                replica.database = None
+                replica.status = 'unknown'
+
+
+def _routed(operation: str, kind: str):
+    def method(self, *args, **kwargs):
+        return getattr(self, kind)(operation, *args, **kwargs)
+    method.__name__ = operation
+    return method
+
+
+for _operation in READ_OPERATIONS:
+    setattr(ReplicaRoutingDatabase, _operation, _routed(_operation, '_read'))
+for _operation in WRITE_OPERATIONS:
+    setattr(ReplicaRoutingDatabase, _operation, _routed(_operation, '_write'))
@@ -0,0 +1,182 @@
+"""Estado compartido por los handlers Lambda dentro de un mismo contenedor.
+
+El backend de base de datos se crea una sola vez por contenedor, en la primera
+invocación, y se reutiliza en las siguientes. Antes de usarlo se comprueba que
+la conexión sigue viva (con un ping solo si ha estado inactiva un tiempo) y se
+reabre si no.
+
+Cada invocación deja una línea de log en JSON con su duración, el código de
+estado, si fue un arranque en frío, el tiempo, las filas y los errores de cada
+operación de base de datos y, con réplicas (DB_REPLICA_HOSTS), cuántas atendió
+el primario y cuántas cada réplica. La línea sigue el formato EMF (Embedded Metric
+Format) de CloudWatch, que la convierte en métricas sin llamadas a la API; se
+desactiva con LAMBDA_METRICS=false. Con la Lambda única (lambdas/router) la
+línea la escribe el router e indica en ``route`` qué handler atendió la petición.
+
+Aquí están también las cabeceras CORS y la construcción de respuestas, comunes
+a todos los handlers y al router.
+"""
+import functools
+import json
+import logging
+import os
+import time
+from app.serialization import dumps
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Segundos de inactividad tras los que se hace ping antes de reutilizar la conexión
+DB_PING_AFTER = float(os.getenv('DB_PING_AFTER', '30'))
+
+LAMBDA_METRICS = os.getenv('LAMBDA_METRICS', 'true').lower() in ('1', 'true', 'yes')
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'BookManager')
+
+# Cabeceras CORS de todas las respuestas: los métodos de toda la API, el ETag
+# expuesto y If-None-Match permitido para las peticiones condicionales
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type,x-api-key,If-None-Match",
+    "Access-Control-Allow-Methods": "GET,POST,PUT,PATCH,DELETE,OPTIONS",
+    "Access-Control-Expose-Headers": "ETag"
+}
+
+_loaded_at = time.monotonic()
+_db = None
+_last_used = 0.0
+_cold = True
+_timings = {}
+# Operaciones de base de datos de la invocación en curso: {operación: [llamadas, ms, filas, errores]}
+_db_operations = {}
+# Operaciones de la invocación en curso por destino: {'primary' o réplica: llamadas}
+_db_targets = {}
+# Invocación en curso: un lambda_entrypoint llamado desde otro (el router) no la vuelve a medir
+_active = False
+_route = None
+
+
+def _observe_db(operation: str, seconds: float, rows, error: bool):
+    entry = _db_operations.get(operation)
+    if entry is None:
+        entry = _db_operations[operation] = [0, 0.0, 0, 0]
+    entry[0] += 1
+    entry[1] += seconds * 1000
+    entry[2] += rows or 0
+    entry[3] += int(error)
+
+
+def _observe_route(target: str):
+    _db_targets[target] = _db_targets.get(target, 0) + 1
+
+
+def get_db():
+    """Devuelve el backend del contenedor, creándolo o reconectándolo si hace falta."""
+    global _db, _last_used
+    started = time.monotonic()
+    if _db is None:
+        # Import diferido: el módulo del backend (psycopg2, esquema...) solo se
+        # carga cuando una invocación necesita la base de datos
+        from app.db.factory import DatabaseFactory
+        # El constructor solo comprueba la versión del esquema (ver app.db.migrate)
+        _db = DatabaseFactory.create(observer=_observe_db if LAMBDA_METRICS else None,
+                                     on_route=_observe_route if LAMBDA_METRICS else None)
+        _timings['db_connect_ms'] = (time.monotonic() - started) * 1000
+    elif _db.ensure_connection(ping=started - _last_used > DB_PING_AFTER):
+        logger.warning("Conexión a la base de datos perdida; reconectada")
+        _timings['db_connect_ms'] = (time.monotonic() - started) * 1000
+    _last_used = time.monotonic()
+    return _db
+
+
+def build_response(status_code: int, body=None, headers: dict = None) -> dict:
+    """Respuesta para API Gateway: cuerpo JSON (vacío si ``body`` es None) y cabeceras CORS."""
+    return {
+        "statusCode": status_code,
+        "headers": {**CORS_HEADERS, **(headers or {})},
+        "body": "" if body is None else dumps(body)
+    }
+
+
+def get_header(event, name: str):
+    """Cabecera de la petición sin distinguir mayúsculas (API Gateway respeta las del cliente)."""
+    headers = event.get("headers") or {}
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def _metrics_record(handler: str, request_id, cold: bool, status, duration_ms: float, route=None) -> dict:
+    db_ms = sum(entry[1] for entry in _db_operations.values())
+    record = {
+        'handler': handler,
+        'request_id': request_id,
+        'start': 'cold' if cold else 'warm',
+        'status': status,
+        **({'route': route} if route else {}),
+        'duration_ms': round(duration_ms, 2),
+        'db_ms': round(db_ms, 2),
+        'db_calls': sum(entry[0] for entry in _db_operations.values()),
+        'db_errors': sum(entry[3] for entry in _db_operations.values()),
+        'db': {
+            operation: {'calls': calls, 'ms': round(ms, 2), 'rows': rows, 'errors': errors}
+            for operation, (calls, ms, rows, errors) in _db_operations.items()
+        },
+    }
+    if _db_targets:
+        record['db_targets'] = dict(_db_targets)
+    metrics = [{'Name': 'duration_ms', 'Unit': 'Milliseconds'}, {'Name': 'db_ms', 'Unit': 'Milliseconds'},
+               {'Name': 'db_calls', 'Unit': 'Count'}, {'Name': 'db_errors', 'Unit': 'Count'}]
+    for name, value in _timings.items():
+        record[name] = round(value, 2)
+        metrics.append({'Name': name, 'Unit': 'Milliseconds'})
+    record['_aws'] = {
+        'Timestamp': int(time.time() * 1000),
+        'CloudWatchMetrics': [{
+            'Namespace': METRICS_NAMESPACE,
+            'Dimensions': [['handler'], ['handler', 'route']] if route else [['handler']],
+            'Metrics': metrics
+        }]
+    }
+    return record
+
+
+def lambda_entrypoint(func):
+    """Decorador para ``lambda_handler`` que registra la duración de cada invocación."""
+    # Todos los handlers se llaman handler.py: el nombre de la función identifica mejor cada uno
+    name = os.getenv('AWS_LAMBDA_FUNCTION_NAME', func.__module__)
+
+    @functools.wraps(func)
+    def wrapper(event, context):
+        global _cold, _active, _route
+        if _active:
+            _route = func.__module__
+            return func(event, context)
+        started = time.monotonic()
+        cold, _cold = _cold, False
+        _timings.clear()
+        _db_operations.clear()
+        _db_targets.clear()
+        _active, _route = True, None
+        status = None
+        try:
+            response = func(event, context)
+            status = response.get('statusCode') if isinstance(response, dict) else None
+            return response
+        finally:
+            _active = False
+            duration_ms = (time.monotonic() - started) * 1000
+            if cold:
+                # Desde que se cargó este módulo hasta la primera invocación
+                _timings['init_ms'] = (started - _loaded_at) * 1000
+            if LAMBDA_METRICS:
+                record = _metrics_record(name, getattr(context, 'aws_request_id', None),
+                                         cold, status, duration_ms, _route)
+                # print y no logger: EMF necesita que la línea sea JSON sin el prefijo del runtime
+                print(json.dumps(record, separators=(',', ':')), flush=True)
+            else:
+                extra = ''.join(f" {key}={value:.1f}" for key, value in _timings.items())
+                route = f" route={_route}" if _route else ''
+                logger.info("%s%s start=%s status=%s duration_ms=%.1f%s",
+                            name, route, 'cold' if cold else 'warm', status, duration_ms, extra)
+    return wrapper
@@ -0,0 +1,36 @@
+import json
+import logging
+import psycopg2
+
+from app.db.batch import execute_batch, BatchTooLargeError
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+@lambda_entrypoint
+def lambda_handler(event, context):
+    """POST /books/batch → crea, actualiza y elimina libros en una sola transacción"""
+    try:
+        body = json.loads(event.get("body") or "{}")
+        operations = body.get("operations") if isinstance(body, dict) else body
+        if not isinstance(operations, list) or not operations:
+            return build_response(400, {"error": 'Se esperaba una lista de operaciones en "operations"'})
+
+        results = execute_batch(get_db(), operations)
+        logger.info("Lote de %d operaciones procesado", len(results))
+        return build_response(200, {"results": results})
+
+    except json.JSONDecodeError as e:
+        return build_response(400, {"error": "Invalid JSON", "details": str(e)})
+    except BatchTooLargeError as e:
+        return build_response(413, {"error": "Batch too large", "details": str(e)})
+    except psycopg2.IntegrityError as e:
+        return build_response(409, {"error": "Database integrity error", "details": str(e)})
+    except psycopg2.OperationalError as e:
+        return build_response(503, {"error": "Database connection error", "details": str(e)})
+    except psycopg2.Error as e:
+        return build_response(500, {"error": "Database error", "details": str(e)})
+    except Exception as e:
+        logger.exception("Error inesperado en Lambda")
+        return build_response(500, {"error": "Internal server error", "details": str(e)})
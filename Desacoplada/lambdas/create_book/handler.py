@@ -1,34 +1,21 @@
 import json
 from pydantic import ValidationError
 import psycopg2
-from botocore.exceptions import ClientError
 
 from app.models.book import Book, BookCreate
-from app.db.factory import DatabaseFactory
-
-db = DatabaseFactory.create()
-
-CORS_HEADERS = {
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-}
-
-def build_response(status_code: int, body: dict):
-    return {
-        "statusCode": status_code,
-        "headers": CORS_HEADERS,
-        "body": json.dumps(body, default=str)
-    }
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
 
+@lambda_entrypoint
 def lambda_handler(event, context):
     try:
         body = json.loads(event.get("body") or "{}")
         payload = BookCreate(**body)
         book = Book(**payload.model_dump()) 
-        created = db.create_book(book)
-        return build_response(201, created.model_dump())
+        created = get_db().create_book(book)
+        return build_response(201, created)
 
+    except json.JSONDecodeError as e:
+        return build_response(400, {"error": "Invalid JSON", "details": str(e)})
     except ValidationError as e:
         return build_response(400, {"error": "Validation error", "details": e.errors()})
     except psycopg2.IntegrityError as e:
@@ -37,5 +24,5 @@ def lambda_handler(event, context):
         return build_response(503, {"error": "Database connection error", "details": str(e)})
     except psycopg2.Error as e:
         return build_response(500, {"error": "Database error", "details": str(e)})
-    except ClientError as e:
-        return build_response(500, {"error": "AWS error", "details": e.response.get("Error", {}).get("Message")})
+    except Exception as e:
+        return build_response(500, {"error": "Internal server error", "details": str(e)})
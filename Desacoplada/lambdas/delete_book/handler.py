@@ -1,49 +1,26 @@
-import json
-from app.db.factory import DatabaseFactory
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
 import psycopg2
 
+@lambda_entrypoint
 def lambda_handler(event, context):
     try:
-        db = DatabaseFactory.create()
+        db = get_db()
         
         if event.get('httpMethod') != 'DELETE':
-            return {
-                'statusCode': 405,
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+            return build_response(405, {'error': 'Method not allowed'})
         
         book_id = event.get('pathParameters', {}).get('id')
         if not book_id:
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Book ID is required'})
-            }
+            return build_response(400, {'error': 'Book ID is required'})
         
         deleted = db.delete_book(book_id)
         
         if deleted:
-            return {
-                'statusCode': 204,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-                    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-                },
-                'body': ''
-            }
+            return build_response(204)
         else:
-            return {
-                'statusCode': 404,
-                'body': json.dumps({'error': 'Book not found'})
-            }
+            return build_response(404, {'error': 'Book not found'})
             
     except psycopg2.OperationalError as e:
-        return {
-            'statusCode': 503,
-            'body': json.dumps({'error': 'Database connection error', 'details': str(e)})
-        }
+        return build_response(503, {'error': 'Database connection error', 'details': str(e)})
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error', 'details': str(e)})
-        }
\ No newline at end of file
+        return build_response(500, {'error': 'Internal server error', 'details': str(e)})
@@ -1,55 +1,41 @@
-import json
-from app.db.factory import DatabaseFactory
+import contextlib
+from app.lambda_runtime import build_response, get_db, get_header, lambda_entrypoint
 from app.models.book import Book
+from app.etag import book_etag, etag_matches
 import psycopg2
 
+@lambda_entrypoint
 def lambda_handler(event, context):
     try:
-        db = DatabaseFactory.create()
+        db = get_db()
 
         if event.get('httpMethod') != 'GET':
-            return {
-                'statusCode': 405,
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+            return build_response(405, {'error': 'Method not allowed'})
 
         book_id = event.get('pathParameters', {}).get('id')
         if not book_id:
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'Book ID is required'})
-            }
+            return build_response(400, {'error': 'Book ID is required'})
 
-        book = db.get_book(book_id)
+        # Versión y libro salen del mismo destino (réplica o primario)
+        scope = db.consistent_reads() if hasattr(db, 'consistent_reads') else contextlib.nullcontext()
+        with scope:
+            if_none_match = get_header(event, 'If-None-Match')
+            if if_none_match:
+                version = db.get_book_version(book_id)
+                if version is None:
+                    return build_response(404, {'error': 'Book not found'})
+                etag = book_etag(book_id, version)
+                if etag_matches(if_none_match, etag):
+                    return build_response(304, headers={'ETag': etag})
+
+            book = db.get_book(book_id)
 
         if book and isinstance(book, Book):
-            book_serialized = {
-                **book.model_dump(),
-                'created_at': book.created_at.isoformat() if book.created_at else None,
-                'updated_at': book.updated_at.isoformat() if book.updated_at else None
-            }
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-                    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-                },
-                'body': json.dumps(book_serialized, default=str)  
-            }
+            return build_response(200, book, {'ETag': book_etag(book.book_id, book.updated_at)})
         else:
-            return {
-                'statusCode': 404,
-                'body': json.dumps({'error': 'Book not found'})
-            }
+            return build_response(404, {'error': 'Book not found'})
 
     except psycopg2.OperationalError as e:
-        return {
-            'statusCode': 503,
-            'body': json.dumps({'error': 'Database connection error', 'details': str(e)})
-        }
+        return build_response(503, {'error': 'Database connection error', 'details': str(e)})
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': 'Internal server error', 'details': str(e)})
-        }
\ No newline at end of file
+        return build_response(500, {'error': 'Internal server error', 'details': str(e)})
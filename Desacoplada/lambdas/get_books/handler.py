@@ -1,68 +1,77 @@
+import contextlib
 import json
 import logging
-from datetime import datetime
-from app.db.factory import DatabaseFactory
+from app.db.pagination import parse_limit, decode_book_cursor, InvalidCursorError
+from app.models.book import BookFilter
+from app.etag import collection_etag, etag_matches
+from app.lambda_runtime import build_response, get_db, get_header, lambda_entrypoint
+from pydantic import ValidationError
 import psycopg2
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-try:
-    logger.info("Inicializando la base de datos...")
-    db = DatabaseFactory.create()
-    logger.info("Base de datos inicializada correctamente")
-except Exception as e:
-    logger.exception("Error al crear la instancia de la base de datos")
-    db = None  
+@lambda_entrypoint
+def lambda_handler(event, context):
+    """GET /books → obtiene todos los libros (o los que cumplen los filtros), o una página si se indica limit/cursor"""
+    logger.info("Evento recibido: %s", json.dumps(event))
+    params = event.get("queryStringParameters") or {}
+    try:
+        # Los parámetros se validan antes de consultar nada: un error responde 400 sin tocar la base de datos
+        # ?tag= se repite: API Gateway da todos sus valores en multiValueQueryStringParameters
+        tags = (event.get("multiValueQueryStringParameters") or {}).get("tag")
+        # Filtros (status, rating, genre, author, year_min, year_max, tag) resueltos en la base de datos
+        filters = BookFilter.from_query(params, tags if tags is not None else [params.get("tag")]) or BookFilter()
+        paginated = "limit" in params or "cursor" in params
+        limit = parse_limit(params.get("limit")) if paginated else None
+        cursor = params.get("cursor") or None
+        if cursor:
+            decode_book_cursor(cursor)
+        variant = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k != "tag")
+        if tags:
+            variant += "".join(f"&tag={tag}" for tag in tags)
 
-CORS_HEADERS = {
-    "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,x-api-key",
-    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
-}
+        db = get_db()
+        # Versión y listado salen del mismo destino (réplica o primario)
+        scope = db.consistent_reads() if hasattr(db, "consistent_reads") else contextlib.nullcontext()
+        with scope:
+            # Solo si el cliente trae un ETag se consulta antes la versión (sin leer
+            # filas) para responder 304; si no, basta la consulta del listado
+            if_none_match = get_header(event, "If-None-Match")
+            if if_none_match:
+                etag = collection_etag(*db.get_collection_version(), variant)
+                if etag_matches(if_none_match, etag):
+                    return build_response(304, headers={"ETag": etag})
 
-def build_response(status_code: int, body):
-    """Construye respuesta JSON con cabeceras CORS y manejo de datetime"""
-    return {
-        "statusCode": status_code,
-        "headers": CORS_HEADERS,
-        "body": json.dumps(body, default=str)
-    }
+            # El ETag sale de la versión leída en la misma sentencia que las filas
+            page = db.query_books(filters, limit, cursor, with_version=True)
+            etag = collection_etag(*page.version, variant)
 
-def normalize_book(book_dict: dict) -> dict:
-    """Normaliza tags y fechas de un libro"""
-    tags = book_dict.get("tags")
-    if isinstance(tags, str):
-        try:
-            book_dict["tags"] = json.loads(tags)
-        except json.JSONDecodeError:
-            book_dict["tags"] = []
-    elif tags is None:
-        book_dict["tags"] = []
+        if paginated:
+            logger.info("Se recuperó una página de %d libros", len(page.items))
+            return build_response(200, {
+                "items": page.items,
+                "next_cursor": page.next_cursor
+            }, {"ETag": etag})
 
-    for date_field in ["created_at", "updated_at"]:
-        val = book_dict.get(date_field)
-        if isinstance(val, datetime):
-            book_dict[date_field] = val.isoformat()
-        elif val is None:
-            book_dict[date_field] = None
+        logger.info("Se recuperaron %d libros", len(page.items))
+        return build_response(200, page.items, {"ETag": etag})
 
-    return book_dict
+    except ValidationError as e:
+        return build_response(400, {
+            "error": "Invalid filter parameters",
+            "details": e.errors(include_url=False, include_context=False)
+        })
 
-def lambda_handler(event, context):
-    """GET /books → obtiene todos los libros"""
-    if db is None:
-        logger.error("La base de datos no está disponible")
-        return build_response(500, {"error": "Database not initialized"})
-
-    logger.info("Evento recibido: %s", json.dumps(event))
-    try:
-        books = db.get_all_books()
-        logger.info("Se recuperaron %d libros", len(books))
+    except InvalidCursorError as e:
+        return build_response(400, {"error": "Invalid cursor", "details": str(e)})
 
-        serialized_books = [normalize_book(b.model_dump()) for b in books]
+    except ValueError as e:
+        return build_response(400, {"error": "Invalid pagination parameters", "details": str(e)})
 
-        return build_response(200, serialized_books)
+    except psycopg2.OperationalError as db_err:
+        logger.exception("Error de conexión con la base de datos")
+        return build_response(503, {"error": "Database connection error", "details": str(db_err)})
 
     except psycopg2.Error as db_err:
         logger.exception("Error en la base de datos")
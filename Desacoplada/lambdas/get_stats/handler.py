@@ -0,0 +1,25 @@
+import logging
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
+import psycopg2
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+@lambda_entrypoint
+def lambda_handler(event, context):
+    """GET /books/stats → totales de libros, autores y géneros y el año más antiguo"""
+    try:
+        stats = get_db().get_stats()
+        return build_response(200, stats)
+
+    except psycopg2.OperationalError as db_err:
+        logger.exception("Error de conexión con la base de datos")
+        return build_response(503, {"error": "Database connection error", "details": str(db_err)})
+
+    except psycopg2.Error as db_err:
+        logger.exception("Error en la base de datos")
+        return build_response(500, {"error": "Database error", "details": str(db_err)})
+
+    except Exception as e:
+        logger.exception("Error inesperado en Lambda")
+        return build_response(500, {"error": "Unexpected error", "details": str(e)})
@@ -0,0 +1,32 @@
+import logging
+from app.db.pagination import parse_limit
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
+import psycopg2
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+@lambda_entrypoint
+def lambda_handler(event, context):
+    """GET /tags → etiquetas con su número de libros, de más a menos (hasta limit)"""
+    params = event.get("queryStringParameters") or {}
+    try:
+        limit = parse_limit(params.get("limit"))
+        tags = get_db().get_tag_counts(limit)
+        logger.info("Se recuperaron %d etiquetas", len(tags))
+        return build_response(200, tags)
+
+    except ValueError as e:
+        return build_response(400, {"error": "Invalid pagination parameters", "details": str(e)})
+
+    except psycopg2.OperationalError as db_err:
+        logger.exception("Error de conexión con la base de datos")
+        return build_response(503, {"error": "Database connection error", "details": str(db_err)})
+
+    except psycopg2.Error as db_err:
+        logger.exception("Error en la base de datos")
+        return build_response(500, {"error": "Database error", "details": str(db_err)})
+
+    except Exception as e:
+        logger.exception("Error inesperado en Lambda")
+        return build_response(500, {"error": "Unexpected error", "details": str(e)})
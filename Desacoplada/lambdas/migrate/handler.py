@@ -0,0 +1,50 @@
+"""Paso de despliegue: aplica las migraciones del esquema (ver app.db.migrate).
+
+Lo invoca CloudFormation como recurso personalizado (SchemaMigrations en
+lambdas.yml) al crear o actualizar la pila, antes que las demás funciones, que
+al arrancar solo comprueban la versión. La respuesta se envía a la URL firmada
+del evento; si no llega, CloudFormation espera hasta su timeout.
+"""
+import json
+import logging
+import urllib.request
+from app.db.migrate import connect, current_version, migrate
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def send_response(event, context, status: str, reason: str = None, data: dict = None):
+    body = json.dumps({
+        "Status": status,
+        "Reason": reason or f"Ver el log {context.log_stream_name}",
+        "PhysicalResourceId": event.get("PhysicalResourceId") or "schema-migrations",
+        "StackId": event["StackId"],
+        "RequestId": event["RequestId"],
+        "LogicalResourceId": event["LogicalResourceId"],
+        "Data": data or {}
+    }).encode("utf-8")
+    request = urllib.request.Request(event["ResponseURL"], data=body, method="PUT",
+                                     headers={"Content-Type": "", "Content-Length": str(len(body))})
+    with urllib.request.urlopen(request, timeout=10):
+        pass
+
+
+def lambda_handler(event, context):
+    # Borrar la pila no deshace el esquema
+    if event.get("RequestType") == "Delete":
+        send_response(event, context, "SUCCESS")
+        return
+    try:
+        conn = connect()
+        try:
+            applied = migrate(conn, log=logger.info)
+            version = current_version(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.exception("Error aplicando las migraciones")
+        send_response(event, context, "FAILED", f"Error aplicando las migraciones: {e}")
+        return
+    logger.info("%d migraciones aplicadas; versión actual: %d", len(applied), version)
+    send_response(event, context, "SUCCESS", data={"Version": version})
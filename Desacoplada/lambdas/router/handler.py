@@ -0,0 +1,62 @@
+"""Lambda única que atiende toda la API delegando en los handlers de cada ruta.
+
+Enruta por ``httpMethod`` y ``resource`` (la plantilla de API Gateway, p. ej.
+/books/{id}) al ``lambda_handler`` de la carpeta correspondiente, sin copiar su
+lógica. Todos comparten el mismo contenedor: un solo arranque en frío, un solo
+backend de base de datos (app.lambda_runtime) y la misma serialización, en
+lugar de uno por función. Los handlers se importan durante la inicialización
+del contenedor, no en la primera petición de cada ruta.
+"""
+import importlib.util
+import os
+from app.lambda_runtime import build_response, lambda_entrypoint
+
+# (método, recurso de API Gateway) → carpeta del handler en lambdas/
+ROUTES = {
+    ('POST', '/books'): 'create_book',
+    ('GET', '/books'): 'get_books',
+    ('GET', '/books/{id}'): 'get_book',
+    ('PUT', '/books/{id}'): 'update_book',
+    ('PATCH', '/books/{id}'): 'update_book',
+    ('DELETE', '/books/{id}'): 'delete_book',
+    ('GET', '/books/search'): 'search_books',
+    ('GET', '/books/stats'): 'get_stats',
+    ('POST', '/books/batch'): 'batch_books',
+    ('GET', '/tags'): 'get_tags',
+}
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# En la imagen los handlers se copian a lambdas/ junto a este fichero; en el
+# repositorio están en las carpetas hermanas de router/
+HANDLERS_DIR = os.getenv('LAMBDA_HANDLERS_DIR') or (
+    os.path.join(_HERE, 'lambdas') if os.path.isdir(os.path.join(_HERE, 'lambdas')) else os.path.dirname(_HERE)
+)
+
+
+def _load(name: str):
+    # El nombre del módulo es el de la carpeta: lambda_runtime lo usa como ruta en las métricas
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HANDLERS_DIR, name, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+
+HANDLERS = {name: _load(name) for name in sorted(set(ROUTES.values()))}
+
+RESOURCES = {resource for _, resource in ROUTES}
+
+
+@lambda_entrypoint
+def lambda_handler(event, context):
+    method = event.get('httpMethod')
+    resource = event.get('resource')
+
+    if method == 'OPTIONS' and resource in RESOURCES:
+        return build_response(200, {'status': 'ok'})
+
+    name = ROUTES.get((method, resource))
+    if name is None:
+        if resource in RESOURCES:
+            return build_response(405, {'error': 'Method not allowed'})
+        return build_response(404, {'error': 'Route not found'})
+    return HANDLERS[name](event, context)
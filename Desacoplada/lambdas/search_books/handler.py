@@ -0,0 +1,42 @@
+import logging
+from app.db.pagination import parse_limit, InvalidCursorError
+from app.lambda_runtime import build_response, get_db, lambda_entrypoint
+import psycopg2
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+@lambda_entrypoint
+def lambda_handler(event, context):
+    """GET /books/search?q= → búsqueda por relevancia, paginada con limit/cursor"""
+    params = event.get("queryStringParameters") or {}
+    query = (params.get("q") or "").strip()
+    if not query:
+        return build_response(400, {"error": "Query parameter q is required"})
+
+    try:
+        limit = parse_limit(params.get("limit"))
+        page = get_db().search_books(query, limit, params.get("cursor") or None)
+        logger.info("La búsqueda '%s' devolvió %d libros", query, len(page.items))
+        return build_response(200, {
+            "items": page.items,
+            "next_cursor": page.next_cursor
+        })
+
+    except InvalidCursorError as e:
+        return build_response(400, {"error": "Invalid cursor", "details": str(e)})
+
+    except ValueError as e:
+        return build_response(400, {"error": "Invalid pagination parameters", "details": str(e)})
+
+    except psycopg2.OperationalError as db_err:
+        logger.exception("Error de conexión con la base de datos")
+        return build_response(503, {"error": "Database connection error", "details": str(db_err)})
+
+    except psycopg2.Error as db_err:
+        logger.exception("Error en la base de datos")
+        return build_response(500, {"error": "Database error", "details": str(db_err)})
+
+    except Exception as e:
+        logger.exception("Error inesperado en Lambda")
+        return build_response(500, {"error": "Unexpected error", "details": str(e)})
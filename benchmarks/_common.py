@@ -0,0 +1,212 @@
+"""Utilidades compartidas por los benchmarks: carga concurrente, percentiles y resultados en JSON.
+
+Todos los scripts escriben el mismo formato (``--output``), que compare.py
+sabe comparar entre ejecuciones::
+
+    {"suite": "http", "meta": {...}, "results": {"GET /books/{id}": {"throughput_rps": ..., "p95_ms": ...}}}
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+STATUSES = ('available', 'borrowed', 'reserved', 'lost')
+RATINGS = ('low', 'medium', 'high', 'excellent')
+WORDS = ('sombra', 'viento', 'ciudad', 'mar', 'noche', 'jardín', 'río', 'memoria', 'fuego', 'isla')
+
+
+def book_payload(i: int) -> dict:
+    """Libro sintético determinista (para POST /books y la carga del catálogo)."""
+    return {
+        'title': f'{WORDS[i % 10].capitalize()} {WORDS[(i // 10) % 10]} {i}',
+        'author': f'Autor {i % 500}',
+        'genre': f'Género {i % 20}',
+        'year': 1900 + i % 120,
+        'status': STATUSES[i % 4],
+        'rating': RATINGS[i % 4],
+        'tags': [WORDS[i % 10], f'tag{i % 50}']
+    }
+
+
+def new_book_payload() -> dict:
+    payload = book_payload(int(time.time() * 1000) % 100000)
+    payload['title'] = f'Bench {uuid.uuid4().hex[:12]}'
+    return payload
+
+
+class Scenario(NamedTuple):
+    """Petición de un escenario, común a la API Flask y a los handlers Lambda."""
+    name: str
+    method: str
+    resource: str                      # plantilla de la ruta en API Gateway (/books/{id})
+    handler: str                       # carpeta del handler en Desacoplada/lambdas
+    query: Optional[dict] = None
+    needs_id: bool = False             # usa un book_id existente del catálogo
+    body: Optional[Callable[[], dict]] = None
+    conditional: bool = False          # envía If-None-Match con el ETag actual del libro
+    ok: Tuple[int, ...] = (200,)
+    optional: bool = False             # solo si se pide explícitamente con --scenarios
+
+
+# En este orden: el PATCH cambia los ETag, así que va después de las lecturas condicionales
+SCENARIOS = [
+    Scenario('list_page', 'GET', '/books', 'get_books', {'limit': '50'}),
+    Scenario('get_book', 'GET', '/books/{id}', 'get_book', needs_id=True),
+    Scenario('get_book_304', 'GET', '/books/{id}', 'get_book', needs_id=True, conditional=True, ok=(304,)),
+    Scenario('search', 'GET', '/books/search', 'search_books', {'q': 'viento memoria', 'limit': '20'}),
+    Scenario('stats', 'GET', '/books/stats', 'get_stats'),
+    Scenario('create', 'POST', '/books', 'create_book', body=lambda: new_book_payload(), ok=(201,)),
+    Scenario('patch', 'PATCH', '/books/{id}', 'update_book', needs_id=True,
+             body=lambda: {'rating': RATINGS[int(time.time()) % 4]}),
+    Scenario('list_all', 'GET', '/books', 'get_books', optional=True),
+]
+
+
+def select_scenarios(names: Optional[str]) -> List[Scenario]:
+    if not names:
+        return [s for s in SCENARIOS if not s.optional]
+    wanted = [name.strip() for name in names.split(',') if name.strip()]
+    known = {s.name: s for s in SCENARIOS}
+    unknown = [name for name in wanted if name not in known]
+    if unknown:
+        raise SystemExit(f"Escenarios desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(known)}")
+    return [s for s in SCENARIOS if s.name in wanted]
+
+
+def add_common_arguments(parser):
+    parser.add_argument('--books', type=int, default=0,
+                        help='Tamaño del catálogo; si se indica, se carga antes con seed.py')
+    parser.add_argument('--reset', action='store_true', help='Vacía el catálogo antes de cargarlo')
+    parser.add_argument('--requests', type=int, default=1000, help='Peticiones por escenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=20, help='Peticiones de calentamiento por escenario')
+    parser.add_argument('--scenarios', help='Lista separada por comas (por defecto, todos salvo list_all)')
+    parser.add_argument('--output', help='Fichero JSON de resultados (- para imprimirlo por stdout)')
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(p / 100.0 * len(sorted_samples)), 1) - 1
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Resumen de un escenario a partir de las latencias en segundos."""
+    samples = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        'requests': len(samples) + errors,
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        'mean_ms': ms(sum(samples) / len(samples)) if samples else 0.0,
+        'p50_ms': ms(percentile(samples, 50)),
+        'p95_ms': ms(percentile(samples, 95)),
+        'p99_ms': ms(percentile(samples, 99)),
+        'max_ms': ms(samples[-1]) if samples else 0.0,
+    }
+
+
+def run_load(call: Callable[[int], bool], requests: int, concurrency: int, warmup: int = 0) -> dict:
+    """Ejecuta ``call(i)`` ``requests`` veces con ``concurrency`` hilos y resume las latencias.
+
+    ``call`` devuelve False (o lanza una excepción) si la petición falló; las
+    fallidas cuentan como errores y no entran en los percentiles.
+    """
+    for i in range(warmup):
+        try:
+            call(-1 - i)
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        nonlocal errors
+        local, local_errors = [], 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            try:
+                ok = call(i)
+            except Exception:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(**extra) -> dict:
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def write_results(suite: str, meta: dict, results: Dict[str, dict], output: Optional[str]):
+    """Imprime la tabla de resultados y, si se indica, los guarda en JSON (``-`` = stdout)."""
+    document = {'suite': suite, 'meta': meta, 'results': results}
+    if output == '-':
+        print(json.dumps(document, indent=2, ensure_ascii=False))
+        return
+    print_table(results)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        print(f'Resultados guardados en {output}', file=sys.stderr)
+
+
+def print_table(results: Dict[str, dict]):
+    width = max((len(name) for name in results), default=10)
+    print(f"{'escenario':<{width}}  {'req/s':>10}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'errores':>7}")
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['throughput_rps']:>10,.1f}  {r.get('p50_ms', 0):>9.2f}  "
+              f"{r.get('p95_ms', 0):>9.2f}  {r.get('p99_ms', 0):>9.2f}  {r.get('errors', 0):>7}")
+
+
+def seed_catalog(books: int, reset: bool = False):
+    """Deja el catálogo con ``books`` libros usando seed.py en un proceso aparte."""
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'seed.py'), '--books', str(books)]
+    if reset:
+        command.append('--reset')
+    subprocess.run(command, check=True)
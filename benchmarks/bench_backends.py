@@ -0,0 +1,107 @@
+"""Latencia de cada backend de la API acoplada (PostgreSQL y SQLite) llamado en proceso.
+
+Ejecuta los escenarios de _common.SCENARIOS directamente sobre la interfaz
+Database, sin HTTP, para aislar el coste de la base de datos: con PostgreSQL
+cada operación es un viaje de red, con SQLite una llamada sobre un fichero
+local. Los resultados se nombran ``<backend>/<escenario>`` y al final se
+muestra cuánto ahorra SQLite en p50 y p95::
+
+    SQLITE_PATH=/tmp/books.db python benchmarks/bench_backends.py --backends sqlite,postgres \\
+        --books 10000 --concurrency 8 --requests 2000 --output backends.json
+
+Para medir la API completa con SQLite basta con arrancarla con DB_TYPE=sqlite
+y usar bench_http.py.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'Acoplada', 'app'))
+sys.path.insert(0, BENCH_DIR)
+
+from _common import (  # noqa: E402
+    RATINGS, add_common_arguments, metadata, new_book_payload, run_load, seed_catalog, select_scenarios,
+    write_results
+)
+from db.factory import DatabaseFactory  # noqa: E402
+from models.book import Book, BookUpdate  # noqa: E402
+
+# Llamada a Database equivalente a cada escenario HTTP (get_book_304 solo consulta la versión)
+OPERATIONS = {
+    'list_page': lambda db, book_id: db.get_books_page(50),
+    'get_book': lambda db, book_id: db.get_book(book_id) is not None,
+    'get_book_304': lambda db, book_id: db.get_book_version(book_id) is not None,
+    'search': lambda db, book_id: db.search_books('viento memoria', 20),
+    'stats': lambda db, book_id: db.get_stats(),
+    'create': lambda db, book_id: db.create_book(Book(**new_book_payload())),
+    'patch': lambda db, book_id: db.patch_book(book_id, BookUpdate(rating=RATINGS[int(time.time()) % 4])) is not None,
+    'list_all': lambda db, book_id: db.get_all_books(),
+}
+
+
+def run_backend(backend: str, scenarios, args) -> dict:
+    os.environ['DB_TYPE'] = backend
+    if args.books:
+        seed_catalog(args.books, args.reset)
+    db = DatabaseFactory.create(backend)
+    try:
+        ids = [book.book_id for book in db.get_books_page(500).items]
+        if not ids and any(s.needs_id for s in scenarios):
+            raise SystemExit(f"El catálogo de {backend} está vacío: usa --books para cargarlo")
+        results = {}
+        for scenario in scenarios:
+            print(f"{backend}: escenario {scenario.name}...", file=sys.stderr)
+            operation = OPERATIONS[scenario.name]
+
+            def call(i: int) -> bool:
+                book_id = random.choice(ids) if scenario.needs_id else None
+                return bool(operation(db, book_id))
+
+            results[f'{backend}/{scenario.name}'] = run_load(call, args.requests, args.concurrency, args.warmup)
+        return results
+    finally:
+        db.close()
+
+
+def print_savings(results: dict, baseline: str, candidate: str, scenarios):
+    print(f"\n{candidate} frente a {baseline} (ms ahorrados por operación)")
+    print(f"{'escenario':<14}  {'p50':>9}  {'p95':>9}")
+    for scenario in scenarios:
+        base = results.get(f'{baseline}/{scenario.name}')
+        other = results.get(f'{candidate}/{scenario.name}')
+        if base and other:
+            print(f"{scenario.name:<14}  {base['p50_ms'] - other['p50_ms']:>9.3f}  "
+                  f"{base['p95_ms'] - other['p95_ms']:>9.3f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', default='sqlite,postgres',
+                        help=f"Lista separada por comas ({', '.join(DatabaseFactory.get_available_databases())})")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = select_scenarios(args.scenarios)
+    backends = [name.strip().lower() for name in args.backends.split(',') if name.strip()]
+    unknown = [name for name in backends if name not in DatabaseFactory.get_available_databases()]
+    if unknown:
+        raise SystemExit(f"Backends desconocidos: {', '.join(unknown)}")
+
+    results = {}
+    for backend in backends:
+        results.update(run_backend(backend, scenarios, args))
+
+    meta = metadata(target='database', backends=backends, books=args.books or None, requests=args.requests,
+                    concurrency=args.concurrency, sqlite_path=os.getenv('SQLITE_PATH', 'books.db'))
+    write_results('backends', meta, results, args.output)
+    if 'postgres' in backends and 'sqlite' in backends and args.output != '-':
+        print_savings(results, 'postgres', 'sqlite', scenarios)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Prueba de carga HTTP de la API acoplada (Flask o la variante ASGI).
+
+Lanza cada escenario de _common.SCENARIOS contra una instancia ya arrancada,
+con ``--concurrency`` clientes que reutilizan su conexión (keep-alive), e
+informa de req/s y latencias p50/p95/p99 por escenario::
+
+    cd Acoplada/app && SERVER_MODE=gunicorn sh serve.sh &
+    python benchmarks/bench_http.py --url http://localhost:8080 --books 10000 \\
+        --concurrency 16 --requests 2000 --output http.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _common import add_common_arguments, metadata, run_load, seed_catalog, select_scenarios, write_results  # noqa: E402
+
+
+class Client:
+    """Una conexión HTTP persistente por hilo."""
+
+    def __init__(self, url: str, api_key: str = None, timeout: float = 30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == 'https'
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self.headers['x-api-key'] = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        payload = json.dumps(body) if body is not None else None
+        conn = self._connection()
+        try:
+            conn.request(method, self.prefix + path, payload, {**self.headers, **(headers or {})})
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # Conexión cerrada por el servidor: se descarta y el error cuenta para el escenario
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status, response.headers, data
+
+
+def _path(scenario, book_id=None) -> str:
+    path = scenario.resource.replace('{id}', book_id or '')
+    return path + ('?' + urlencode(scenario.query) if scenario.query else '')
+
+
+def sample_ids(client: Client, count: int = 500) -> list:
+    status, _, data = client.request('GET', f'/books?limit={min(count, 1000)}')
+    if status != 200:
+        raise SystemExit(f"No se pudo leer el catálogo: HTTP {status} {data[:200]!r}")
+    return [book['book_id'] for book in json.loads(data)['items']]
+
+
+def etags_for(client: Client, ids: list) -> dict:
+    etags = {}
+    for book_id in ids:
+        status, headers, _ = client.request('GET', f'/books/{book_id}')
+        if status == 200 and headers.get('ETag'):
+            etags[book_id] = headers['ETag']
+    return etags
+
+
+def run_scenario(client: Client, scenario, ids: list, args) -> dict:
+    etags = etags_for(client, ids[:100]) if scenario.conditional else {}
+    candidates = list(etags) if scenario.conditional else ids
+
+    def call(i: int) -> bool:
+        book_id = random.choice(candidates) if scenario.needs_id else None
+        headers = {'If-None-Match': etags[book_id]} if scenario.conditional else None
+        body = scenario.body() if scenario.body else None
+        status, _, _ = client.request(scenario.method, _path(scenario, book_id), body, headers)
+        return status in scenario.ok
+
+    return run_load(call, args.requests, args.concurrency, args.warmup)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=os.getenv('BENCH_URL', 'http://localhost:8080'))
+    parser.add_argument('--api-key', default=os.getenv('BENCH_API_KEY'))
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = select_scenarios(args.scenarios)
+    if args.books:
+        seed_catalog(args.books, args.reset)
+
+    client = Client(args.url, args.api_key)
+    ids = sample_ids(client)
+    if not ids and any(s.needs_id for s in scenarios):
+        raise SystemExit("El catálogo está vacío: usa --books para cargarlo")
+
+    results = {}
+    for scenario in scenarios:
+        print(f"Escenario {scenario.name}...", file=sys.stderr)
+        results[scenario.name] = run_scenario(client, scenario, ids, args)
+
+    meta = metadata(target=args.url, books=args.books or None, requests=args.requests,
+                    concurrency=args.concurrency)
+    write_results('http', meta, results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
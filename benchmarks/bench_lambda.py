@@ -0,0 +1,172 @@
+"""Benchmark de los handlers Lambda de la arquitectura desacoplada, invocados directamente.
+
+Cada escenario de _common.SCENARIOS se traduce en un evento sintético de API
+Gateway (proxy REST) para su ``lambda_handler``. La concurrencia se simula con
+procesos: cada proceso es un "contenedor" que importa los handlers, hace su
+arranque en frío y luego atiende invocaciones de una en una, como en Lambda.
+El informe incluye el arranque en frío (import + primera invocación)::
+
+    python benchmarks/bench_lambda.py --books 10000 --concurrency 8 --requests 2000 --output lambda.json
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import types
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DESACOPLADA = os.path.join(BENCH_DIR, '..', 'Desacoplada')
+
+sys.path.insert(0, BENCH_DIR)
+
+from _common import (  # noqa: E402
+    SCENARIOS, add_common_arguments, metadata, seed_catalog, select_scenarios, summarize, write_results
+)
+
+_handlers = {}
+
+
+def make_context():
+    return types.SimpleNamespace(
+        aws_request_id=str(uuid.uuid4()),
+        function_name='bench',
+        get_remaining_time_in_millis=lambda: 30000
+    )
+
+
+def make_event(scenario, book_id=None, etag=None) -> dict:
+    path = scenario.resource.replace('{id}', book_id or '')
+    body = scenario.body() if scenario.body else None
+    return {
+        'resource': scenario.resource,
+        'path': path,
+        'httpMethod': scenario.method,
+        'headers': {'Content-Type': 'application/json', **({'If-None-Match': etag} if etag else {})},
+        'queryStringParameters': dict(scenario.query) if scenario.query else None,
+        'pathParameters': {'id': book_id} if book_id else None,
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False,
+        'requestContext': {'stage': 'bench', 'requestTimeEpoch': int(time.time() * 1000)}
+    }
+
+
+def _load_handler(name: str):
+    handler = _handlers.get(name)
+    if handler is None:
+        path = os.path.join(DESACOPLADA, 'lambdas', name, 'handler.py')
+        spec = importlib.util.spec_from_file_location(f'lambdas_{name}_handler', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        handler = _handlers[name] = module.lambda_handler
+    return handler
+
+
+def invoke(scenario, book_id=None, etag=None) -> dict:
+    return _load_handler(scenario.handler)(make_event(scenario, book_id, etag), make_context())
+
+
+def _init_worker(with_metrics: bool, cold_starts):
+    # Cada proceso hace de contenedor: los imports y la primera conexión cuentan como arranque en frío
+    if not with_metrics:
+        os.environ['LAMBDA_METRICS'] = 'false'
+    sys.path.insert(0, DESACOPLADA)
+    started = time.perf_counter()
+    for scenario in SCENARIOS:
+        _load_handler(scenario.handler)
+    import_done = time.perf_counter()
+    response = invoke(next(s for s in SCENARIOS if s.name == 'stats'))
+    cold_starts.put((import_done - started, time.perf_counter() - started, response.get('statusCode')))
+
+
+def _run_chunk(task):
+    scenario_name, count, ids, etags = task
+    scenario = next(s for s in SCENARIOS if s.name == scenario_name)
+    candidates = list(etags) if scenario.conditional else ids
+    latencies, errors = [], 0
+    for _ in range(count):
+        book_id = random.choice(candidates) if scenario.needs_id else None
+        started = time.perf_counter()
+        try:
+            etag = etags.get(book_id) if scenario.conditional else None
+            ok = invoke(scenario, book_id, etag).get('statusCode') in scenario.ok
+        except Exception:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+def sample_catalog():
+    """Lee en el proceso principal los ids y ETag de muestra que necesitan los escenarios."""
+    sys.path.insert(0, DESACOPLADA)
+    page = next(s for s in SCENARIOS if s.name == 'list_page')
+    response = invoke(page._replace(query={'limit': '500'}))
+    if response.get('statusCode') != 200:
+        raise SystemExit(f"No se pudo leer el catálogo: {response.get('statusCode')} {response.get('body', '')[:200]}")
+    ids = [book['book_id'] for book in json.loads(response['body'])['items']]
+    get_book = next(s for s in SCENARIOS if s.name == 'get_book')
+    etags = {}
+    for book_id in ids[:100]:
+        headers = invoke(get_book, book_id).get('headers') or {}
+        if headers.get('ETag'):
+            etags[book_id] = headers['ETag']
+    return ids, etags
+
+
+def _split(total: int, parts: int) -> list:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--with-metrics', action='store_true',
+                        help='Deja activas las líneas de métricas EMF de los handlers (mide su coste)')
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = select_scenarios(args.scenarios)
+    if args.books:
+        seed_catalog(args.books, args.reset)
+    os.environ['LAMBDA_METRICS'] = 'true' if args.with_metrics else 'false'
+    ids, etags = sample_catalog()
+    if not ids and any(s.needs_id for s in scenarios):
+        raise SystemExit("El catálogo está vacío: usa --books para cargarlo")
+
+    # spawn: cada proceso arranca un intérprete limpio, como un contenedor nuevo
+    context = multiprocessing.get_context('spawn')
+    cold_starts = context.Queue()
+    results = {}
+    with context.Pool(args.concurrency, initializer=_init_worker,
+                      initargs=(args.with_metrics, cold_starts)) as pool:
+        colds = [cold_starts.get() for _ in range(args.concurrency)]
+        # Sin throughput: cada muestra es el arranque de un proceso distinto
+        results['cold_start'] = summarize([total for _, total, _ in colds], 0, 0)
+        results['cold_start']['import_p50_ms'] = round(sorted(i for i, _, _ in colds)[len(colds) // 2] * 1000, 3)
+
+        for scenario in scenarios:
+            print(f"Escenario {scenario.name}...", file=sys.stderr)
+            if args.warmup:
+                pool.map(_run_chunk, [(scenario.name, n, ids, etags)
+                                      for n in _split(args.warmup, args.concurrency)], chunksize=1)
+            started = time.perf_counter()
+            chunks = pool.map(_run_chunk, [(scenario.name, n, ids, etags)
+                                           for n in _split(args.requests, args.concurrency)], chunksize=1)
+            elapsed = time.perf_counter() - started
+            results[scenario.name] = summarize([s for latencies, _ in chunks for s in latencies],
+                                               sum(errors for _, errors in chunks), elapsed)
+
+    meta = metadata(target='lambda_handler', books=args.books or None, requests=args.requests,
+                    concurrency=args.concurrency, with_metrics=args.with_metrics)
+    write_results('lambda', meta, results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
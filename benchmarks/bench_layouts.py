@@ -0,0 +1,208 @@
+"""Compara los dos despliegues de la arquitectura desacoplada: una Lambda por ruta o el router único.
+
+Simula la flota de contenedores de Lambda con procesos: cada contenedor es un
+proceso nuevo (spawn) que importa su handler, abre su conexión en la primera
+invocación y atiende una petición cada vez. Como en Lambda, una invocación usa
+un contenedor libre de su función y, si no hay ninguno, se crea otro (arranque
+en frío). Con ``split`` cada ruta es una función con sus propios contenedores;
+con ``router`` todas comparten los de lambdas/router.
+
+La carga mezcla los escenarios por turnos con ``--concurrency`` clientes. El
+informe incluye, por despliegue, los arranques en frío, los contenedores por
+función, las conexiones abiertas a la base de datos y las latencias::
+
+    python benchmarks/bench_layouts.py --books 10000 --concurrency 8 --requests 2000 --output layouts.json
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DESACOPLADA = os.path.join(BENCH_DIR, '..', 'Desacoplada')
+
+sys.path.insert(0, BENCH_DIR)
+
+from _common import (  # noqa: E402
+    add_common_arguments, metadata, run_load, seed_catalog, select_scenarios, summarize, write_results
+)
+from bench_lambda import make_context, make_event, sample_catalog  # noqa: E402
+
+LAYOUTS = ('split', 'router')
+
+
+def _container_main(function: str, channel):
+    """Proceso de un contenedor: arranque en frío y después invocaciones de una en una."""
+    os.environ['LAMBDA_METRICS'] = 'false'
+    sys.path.insert(0, DESACOPLADA)
+    started = time.perf_counter()
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        function, os.path.join(DESACOPLADA, 'lambdas', function, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    channel.send(time.perf_counter() - started)
+
+    from app import lambda_runtime
+    while True:
+        event = channel.recv()
+        if event is None:
+            break
+        started = time.perf_counter()
+        try:
+            status = module.lambda_handler(event, make_context()).get('statusCode')
+        except Exception:
+            status = None
+        channel.send((status, time.perf_counter() - started))
+
+    # Conexiones abiertas por el contenedor: la del primario y las de las réplicas usadas
+    db = lambda_runtime._db
+    connections = 0
+    if db is not None:
+        connections = 1 + sum(replica.database is not None for replica in getattr(db, 'replicas', []))
+    channel.send(connections)
+
+
+class Container:
+
+    def __init__(self, context, function: str):
+        self.function = function
+        self.channel, child = context.Pipe()
+        started = time.perf_counter()
+        self.process = context.Process(target=_container_main, args=(function, child), daemon=True)
+        self.process.start()
+        # Sin este extremo en el padre, recv() falla con EOFError si el contenedor muere
+        child.close()
+        self.import_seconds = self.channel.recv()
+        self.startup_seconds = time.perf_counter() - started
+        self.invocations = 0
+        self.first_invocation_seconds = None
+
+    def invoke(self, event) -> int:
+        self.channel.send(event)
+        status, seconds = self.channel.recv()
+        if self.invocations == 0:
+            self.first_invocation_seconds = seconds
+        self.invocations += 1
+        return status
+
+    def stop(self) -> int:
+        self.channel.send(None)
+        connections = self.channel.recv()
+        self.process.join(timeout=10)
+        return connections
+
+
+class Fleet:
+    """Contenedores por función: se reutiliza uno libre o se arranca otro."""
+
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')
+        self.idle = {}
+        self.containers = []
+        self.lock = threading.Lock()
+
+    def invoke(self, function: str, event) -> int:
+        with self.lock:
+            idle = self.idle.setdefault(function, [])
+            container = idle.pop() if idle else None
+        if container is None:
+            container = Container(self.context, function)
+            with self.lock:
+                self.containers.append(container)
+        try:
+            return container.invoke(event)
+        finally:
+            with self.lock:
+                self.idle[function].append(container)
+
+    def report(self) -> dict:
+        per_function = {}
+        for container in self.containers:
+            per_function[container.function] = per_function.get(container.function, 0) + 1
+        colds = [c.startup_seconds + (c.first_invocation_seconds or 0) for c in self.containers]
+        cold_start = summarize(colds, 0, 0)
+        cold_start['import_p50_ms'] = round(sorted(c.import_seconds for c in self.containers)[len(colds) // 2] * 1000, 3)
+        return {
+            'cold_starts': len(self.containers),
+            'containers': per_function,
+            'db_connections': sum(container.stop() for container in self.containers),
+            'cold_start': cold_start,
+        }
+
+
+def run_layout(layout: str, scenarios, ids, etags, args) -> dict:
+    fleet = Fleet()
+    latencies = {scenario.name: [] for scenario in scenarios}
+    errors = {scenario.name: 0 for scenario in scenarios}
+    lock = threading.Lock()
+
+    def call(i: int) -> bool:
+        scenario = scenarios[abs(i) % len(scenarios)]
+        candidates = list(etags) if scenario.conditional else ids
+        book_id = random.choice(candidates) if scenario.needs_id else None
+        etag = etags.get(book_id) if scenario.conditional else None
+        function = 'router' if layout == 'router' else scenario.handler
+        started = time.perf_counter()
+        ok = fleet.invoke(function, make_event(scenario, book_id, etag)) in scenario.ok
+        elapsed = time.perf_counter() - started
+        if i >= 0:
+            with lock:
+                if ok:
+                    latencies[scenario.name].append(elapsed)
+                else:
+                    errors[scenario.name] += 1
+        return ok
+
+    # Los arranques en frío forman parte del resultado: el calentamiento no los oculta
+    overall = run_load(call, args.requests, args.concurrency, args.warmup)
+    results = {f'{layout}/all': overall}
+    for scenario in scenarios:
+        results[f'{layout}/{scenario.name}'] = summarize(latencies[scenario.name], errors[scenario.name], 0)
+    report = fleet.report()
+    results[f'{layout}/cold_start'] = report.pop('cold_start')
+    results[f'{layout}/all'].update(report)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--layouts', default=','.join(LAYOUTS), help='split, router o ambos separados por comas')
+    add_common_arguments(parser)
+    parser.set_defaults(warmup=0)
+    args = parser.parse_args(argv)
+
+    layouts = [name.strip() for name in args.layouts.split(',') if name.strip()]
+    unknown = [name for name in layouts if name not in LAYOUTS]
+    if unknown:
+        raise SystemExit(f"Despliegues desconocidos: {', '.join(unknown)}")
+    scenarios = select_scenarios(args.scenarios)
+    if args.books:
+        seed_catalog(args.books, args.reset)
+    os.environ['LAMBDA_METRICS'] = 'false'
+    ids, etags = sample_catalog()
+    if not ids and any(s.needs_id for s in scenarios):
+        raise SystemExit("El catálogo está vacío: usa --books para cargarlo")
+
+    results = {}
+    for layout in layouts:
+        print(f"Despliegue {layout}...", file=sys.stderr)
+        results.update(run_layout(layout, scenarios, ids, etags, args))
+
+    meta = metadata(target='lambda_layouts', layouts=layouts, books=args.books or None, requests=args.requests,
+                    concurrency=args.concurrency)
+    write_results('layouts', meta, results, args.output)
+    if args.output != '-':
+        print(f"\n{'despliegue':<10}  {'arranques en frío':>17}  {'conexiones':>10}  contenedores por función")
+        for layout in layouts:
+            summary = results[f'{layout}/all']
+            print(f"{layout:<10}  {summary['cold_starts']:>17}  {summary['db_connections']:>10}  "
+                  f"{summary['containers']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Filas por segundo de la ruta de lectura: hidratación de Book y codificación JSON.
+
+Compara la ruta anterior (fechas a ISO, Book(**fila) con validación completa,
+model_dump y json.dumps(default=str)) con la actual (book_from_row y
+serialization.dumps con json u orjson). No necesita base de datos: las filas
+se generan con la misma forma que devuelve RealDictCursor.
+
+Uso::
+
+    python benchmarks/bench_serialization.py --rows 50000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Acoplada', 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.book import Book, book_from_row  # noqa: E402
+from serialization import load_encoder  # noqa: E402
+from _common import metadata  # noqa: E402
+
+STATUSES = ('available', 'borrowed', 'reserved', 'lost')
+RATINGS = ('low', 'medium', 'high', 'excellent')
+
+
+def make_rows(count: int) -> list:
+    now = datetime(2024, 1, 1)
+    return [{
+        'book_id': str(uuid.uuid4()),
+        'title': f'Libro {i}',
+        'author': f'Autor {i % 500}',
+        'genre': f'Género {i % 20}',
+        'year': 1900 + i % 120,
+        'status': STATUSES[i % 4],
+        'rating': RATINGS[i % 4],
+        'created_at': now + timedelta(seconds=i),
+        'updated_at': now + timedelta(seconds=i, minutes=5),
+        'tags': ['ficción', f'tag{i % 50}']
+    } for i in range(count)]
+
+
+def legacy_row_to_book(row) -> Book:
+    row = dict(row)
+    row['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+    row['updated_at'] = row['updated_at'].isoformat() if row['updated_at'] else None
+    row['tags'] = row['tags'] if isinstance(row['tags'], list) else []
+    return Book(**row)
+
+
+def construct_row_to_book(row) -> Book:
+    row = dict(row)
+    row['tags'] = row['tags'] if isinstance(row['tags'], list) else []
+    return Book.model_construct(**row)
+
+
+def fast_row_to_book(row) -> Book:
+    row = dict(row)
+    row['tags'] = row['tags'] if isinstance(row['tags'], list) else []
+    return book_from_row(row)
+
+
+def legacy_encode(books) -> str:
+    return json.dumps([b.model_dump() for b in books], default=str)
+
+
+def run_case(rows, to_book, encode, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode([to_book(row) for row in rows])
+        best = min(best, time.perf_counter() - started)
+    return len(rows) / best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por caso (se toma la mejor)')
+    parser.add_argument('--output', help='Fichero JSON de resultados para compare.py (- para imprimirlo por stdout)')
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    identity = lambda books: books  # noqa: E731
+    cases = [
+        ('hydrate: Book(**row) [antes]', legacy_row_to_book, identity),
+        ('hydrate: Book.model_construct', construct_row_to_book, identity),
+        ('hydrate: book_from_row', fast_row_to_book, identity),
+        ('end-to-end: validate + json.dumps [antes]', legacy_row_to_book, legacy_encode),
+        ('end-to-end: book_from_row + json', fast_row_to_book, load_encoder('json')),
+    ]
+    try:
+        cases.append(('end-to-end: book_from_row + orjson', fast_row_to_book, load_encoder('orjson')))
+    except ImportError:
+        print('orjson no está instalado; se omite su caso', file=sys.stderr)
+
+    results = {name: run_case(rows, to_book, encode, args.repeat) for name, to_book, encode in cases}
+
+    if args.output:
+        document = {
+            'suite': 'serialization',
+            'meta': metadata(rows=args.rows, repeat=args.repeat),
+            'results': {name: {'throughput_rps': round(rate, 1)} for name, rate in results.items()}
+        }
+        if args.output == '-':
+            print(json.dumps(document, indent=2, ensure_ascii=False))
+            return 0
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+    baseline = results['end-to-end: validate + json.dumps [antes]']
+    width = max(len(name) for name in results)
+    for name, rate in results.items():
+        speedup = f'x{rate / baseline:.1f}' if name.startswith('end-to-end') else ''
+        print(f'{name:<{width}}  {rate:>12,.0f} filas/s  {speedup}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
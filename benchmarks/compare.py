@@ -0,0 +1,67 @@
+"""Compara dos ficheros de resultados de los benchmarks (--output) escenario a escenario.
+
+Sirve tanto para detectar regresiones entre dos commits de la misma suite como
+para comparar las dos arquitecturas (http frente a lambda) con la misma carga::
+
+    python benchmarks/compare.py antes.json despues.json --threshold 10 --fail-on-regression
+"""
+import argparse
+import json
+import sys
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """Filas de la comparación; ``regression`` marca las que empeoran más de ``threshold`` %."""
+    rows = []
+    for name, old in baseline['results'].items():
+        new = candidate['results'].get(name)
+        if new is None:
+            continue
+        throughput = _change(old['throughput_rps'], new['throughput_rps'])
+        p95 = _change(old.get('p95_ms', 0), new.get('p95_ms', 0))
+        rows.append({
+            'scenario': name,
+            'throughput_rps': (old['throughput_rps'], new['throughput_rps'], round(throughput, 1)),
+            'p95_ms': (old.get('p95_ms', 0), new.get('p95_ms', 0), round(p95, 1)),
+            'regression': (old['throughput_rps'] > 0 and throughput < -threshold) or p95 > threshold,
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Porcentaje de empeoramiento (req/s o p95) que cuenta como regresión')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Termina con código 1 si hay regresiones')
+    parser.add_argument('--json', action='store_true', help='Imprime la comparación en JSON')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.threshold)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{baseline['suite']} ({baseline['meta'].get('commit')}) -> "
+              f"{candidate['suite']} ({candidate['meta'].get('commit')})")
+        width = max((len(row['scenario']) for row in rows), default=10)
+        for row in rows:
+            old_rps, new_rps, rps_change = row['throughput_rps']
+            old_p95, new_p95, p95_change = row['p95_ms']
+            flag = '  REGRESIÓN' if row['regression'] else ''
+            print(f"{row['scenario']:<{width}}  req/s {old_rps:>10,.1f} -> {new_rps:>10,.1f} ({rps_change:+6.1f}%)  "
+                  f"p95 {old_p95:>8.2f} -> {new_p95:>8.2f} ms ({p95_change:+6.1f}%){flag}")
+    return 1 if args.fail_on_regression and any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Prepara un catálogo sintético de N libros en la base de datos de DB_TYPE (DB_HOST/DB_NAME o SQLITE_PATH).
+
+Aplica las migraciones pendientes y completa el catálogo hasta ``--books``
+libros con Database.import_books (COPY); ``--reset`` lo vacía antes. Lo usan
+bench_http.py, bench_lambda.py y bench_backends.py, pero también puede ejecutarse solo::
+
+    python benchmarks/seed.py --books 100000 --reset
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Acoplada', 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _common import book_payload  # noqa: E402
+from db.factory import DatabaseFactory  # noqa: E402
+from db.migrate import connect, migrate  # noqa: E402
+from models.book import Book  # noqa: E402
+
+CHUNK_SIZE = 5000
+
+
+def make_books(start: int, count: int) -> list:
+    # Fechas repartidas hacia atrás para que la paginación por created_at recorra varias páginas
+    now = datetime.utcnow()
+    books = []
+    for i in range(start, start + count):
+        created_at = now - timedelta(seconds=i)
+        books.append(Book(book_id=str(uuid.uuid4()), created_at=created_at, updated_at=created_at,
+                          **book_payload(i)))
+    return books
+
+
+def _prepare_postgres(reset: bool):
+    conn = connect()
+    try:
+        migrate(conn)
+        if reset:
+            with conn.cursor() as cursor:
+                # El trigger de TRUNCATE pone a cero las estadísticas (migración 0005)
+                cursor.execute("TRUNCATE books")
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def _prepare_sqlite(reset: bool):
+    # El esquema lo crea SQLiteDatabase al abrir el fichero; vaciarlo es borrarlo
+    if reset:
+        path = os.getenv('SQLITE_PATH', 'books.db')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def seed(books: int, reset: bool = False):
+    if os.getenv('DB_TYPE', 'postgres').lower() == 'sqlite':
+        _prepare_sqlite(reset)
+    else:
+        _prepare_postgres(reset)
+
+    db = DatabaseFactory.create()
+    try:
+        _, existing = db.get_collection_version()
+        missing = books - existing
+        if missing <= 0:
+            print(f"El catálogo ya tiene {existing} libros", file=sys.stderr)
+            return
+        started = time.perf_counter()
+        for offset in range(0, missing, CHUNK_SIZE):
+            db.import_books(make_books(existing + offset, min(CHUNK_SIZE, missing - offset)))
+        print(f"{missing} libros cargados en {time.perf_counter() - started:.1f} s "
+              f"(catálogo: {books})", file=sys.stderr)
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, required=True, help='Tamaño del catálogo')
+    parser.add_argument('--reset', action='store_true', help='Vacía el catálogo antes de cargarlo')
+    args = parser.parse_args(argv)
+    seed(args.books, args.reset)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())